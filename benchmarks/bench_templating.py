@@ -0,0 +1,63 @@
+"""
+Compare the compiled, single-pass rendering of `Template` with the previous approach (one `str.replace` per field) on system prompts of realistic sizes.
+
+Usage:
+    uv run python benchmarks/bench_templating.py
+"""
+
+import functools
+import timeit
+
+from workflows_acp._templating import Template
+from workflows_acp.constants import SYSTEM_PROMPT_STRING, DEFAULT_TASK
+from workflows_acp.tools import TOOLS
+
+
+def render_with_replace(template: Template, args: dict[str, str]) -> str:
+    content = template.content
+    for word in template._to_render:
+        content = content.replace("{{" + word + "}}", args[word])
+    return content
+
+
+def prompt_args(n_tools: int, agents_md_size: int) -> dict[str, str]:
+    tools = [TOOLS[i % len(TOOLS)].to_string() for i in range(n_tools)]
+    agents_md = ("Always run the tests before committing. " * agents_md_size)[
+        :agents_md_size
+    ]
+    return {
+        "task": DEFAULT_TASK,
+        "tools": "\n\n".join(tools),
+        "additional_instructions": f"## Additional Instructions\n\n```md\n{agents_md}\n```\n",
+    }
+
+
+def main() -> None:
+    template = Template(SYSTEM_PROMPT_STRING)
+    print(
+        f"{'tools':>6} {'AGENTS.md':>10} {'prompt':>9} {'replace':>10} {'compiled':>10}"
+    )
+    for n_tools, agents_md_size in [
+        (15, 0),
+        (50, 4_000),
+        (200, 20_000),
+        (500, 100_000),
+    ]:
+        args = prompt_args(n_tools, agents_md_size)
+        assert template.render(args) == render_with_replace(template, args)
+        size = len(template.render(args))
+        number = 2_000
+        replace = timeit.timeit(
+            functools.partial(render_with_replace, template, args), number=number
+        )
+        compiled = timeit.timeit(
+            functools.partial(template.render, args), number=number
+        )
+        print(
+            f"{n_tools:>6} {agents_md_size:>10} {size:>9} "
+            f"{replace / number * 1e6:>8.1f}us {compiled / number * 1e6:>8.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ MCP_CONFIG: McpServersConfig = {
         "context7": {
             "url": "https://mcp.context7.com/mcp",
             "headers": {"CONTEXT7_API_KEY": os.getenv("CONTEXT7_API_KEY")},
+            # documentation lookups can be served from the result cache
+            "readOnlyTools": ["resolve-library-id", "get-library-docs"],
         }
     }
 }
@@ -39,6 +41,7 @@ async def main() -> None:
         tools=TOOLS,
         mode="ask",
         mcp_config=MCP_CONFIG,
+        mcp_cache_results=True,
     )
 
 
@@ -1,6 +1,8 @@
 import asyncio
 import mimetypes
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI, HTTPException
 from fastapi.datastructures import UploadFile
@@ -11,8 +13,12 @@ from starlette.middleware.authentication import AuthenticationMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 
-from ..constants import DATA_DIR
-from ..utils import _download_file_to_agentfs, handle_prompt
+from ..constants import DATA_DIR, DEFAULT_CHECKPOINT_INTERVAL
+from ..utils import (
+    _download_file_to_agentfs,
+    _start_agentfs_maintenance,
+    handle_prompt,
+)
 from .auth import LobsterXAuthentication, on_auth_error
 from .shared import (
     GetTaskResponse,
@@ -49,8 +55,24 @@ def create_api_app(
     delete_tasks_per_minute: int | None,
     poll_tasks_per_minute: int | None,
     server_api_key: str | None,
+    checkpoint_interval: float | None = None,
+    retention_days: float | None = None,
 ) -> FastAPI:
-    app = FastAPI()
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        maintenance = _start_agentfs_maintenance(
+            checkpoint_interval
+            if checkpoint_interval is not None
+            else DEFAULT_CHECKPOINT_INTERVAL,
+            retention_days,
+        )
+        try:
+            yield
+        finally:
+            if maintenance is not None:
+                maintenance.cancel()
+
+    app = FastAPI(lifespan=lifespan)
 
     file_downloads_per_minute = (
         file_downloads_per_minute or DEFAULT_FILE_DOWNLOADS_PER_MINUTE
@@ -22,6 +22,8 @@ class LobsterXApiConfig:
     host: str | None = None
     port: int | None = None
     protocol: Literal["http", "https"] = "http"
+    checkpoint_interval: float | None = None
+    retention_days: float | None = None
 
     @classmethod
     def load_from_config(cls, config_file: str) -> "LobsterXApiConfig":
@@ -37,6 +39,8 @@ class LobsterXApiConfig:
             "delete_tasks_per_minute": self.delete_tasks_per_minute,
             "poll_tasks_per_minute": self.poll_tasks_per_minute,
             "server_api_key": self.server_api_key,
+            "checkpoint_interval": self.checkpoint_interval,
+            "retention_days": self.retention_days,
         }
 
 
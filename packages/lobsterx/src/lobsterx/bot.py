@@ -17,11 +17,12 @@ from telegram.ext import (
 )
 from telegram.ext._utils.types import HandlerCallback
 
-from .constants import STR_TO_LOG_LEVEL
+from .constants import DEFAULT_CHECKPOINT_INTERVAL, STR_TO_LOG_LEVEL
 from .utils import (
     _escape_markdow_for_tg,
     _remove_temporary_report_file,
     _setup_agentfs,
+    _start_agentfs_maintenance,
     _write_temporary_report_file,
     handle_documents,
     handle_prompt,
@@ -71,7 +72,12 @@ async def error_handler(update: Update, context: CallbackContext) -> None:
         await update.message.reply_text(f"An error occurred: {str(context.error)}")
 
 
-async def run_bot(log_level: str) -> None:
+async def run_bot(
+    log_level: str,
+    sync_agentfs: bool = False,
+    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+    retention_days: float | None = None,
+) -> None:
     load_dotenv()
     TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", None)
     if TOKEN is None:
@@ -83,7 +89,8 @@ async def run_bot(log_level: str) -> None:
             level=STR_TO_LOG_LEVEL.get(log_level, logging.INFO),
             format="%(asctime)s [%(levelname)s] %(message)s",
         )
-        await _setup_agentfs()
+        await _setup_agentfs(sync=sync_agentfs)
+        maintenance = _start_agentfs_maintenance(checkpoint_interval, retention_days)
         logging.info("Starting Telegram bot...")
         application = Application.builder().token(TOKEN).build()
         cmd_handler = cast(BaseHandler, CommandHandler("start", start_tg))
@@ -112,6 +119,8 @@ async def run_bot(log_level: str) -> None:
                 logging.error(f"An error occurred: {e}")
                 return
             finally:
+                if maintenance is not None:
+                    maintenance.cancel()
                 await application.updater.stop()
                 await application.stop()
                 await application.shutdown()
@@ -14,7 +14,7 @@ from .api.api import create_api_app
 from .api.client import LobsterXClient
 from .api.shared import LobsterXApiConfig
 from .bot import run_bot
-from .constants import LOG_LEVELS
+from .constants import DEFAULT_CHECKPOINT_INTERVAL, LOG_LEVELS
 from .utils import _setup_agentfs
 
 app = Typer()
@@ -31,8 +31,36 @@ def run(
             show_choices=True,
         ),
     ] = "info",
+    sync_agentfs: Annotated[
+        bool,
+        Option(
+            "--sync-agentfs/--no-sync-agentfs",
+            help="Incrementally sync an existing AgentFS database with the current directory before starting.",
+        ),
+    ] = False,
+    checkpoint_interval: Annotated[
+        float,
+        Option(
+            "--checkpoint-interval",
+            help="Seconds between two AgentFS maintenance runs (WAL checkpoint and cleanup of old downloads). Use 0 to disable maintenance. Defaults to 300.",
+        ),
+    ] = DEFAULT_CHECKPOINT_INTERVAL,
+    retention_days: Annotated[
+        float | None,
+        Option(
+            "--retention-days",
+            help="Remove downloaded files older than this number of days from AgentFS. By default, downloads are kept forever.",
+        ),
+    ] = None,
 ) -> None:
-    asyncio.run(run_bot(log_level=log_level))
+    asyncio.run(
+        run_bot(
+            log_level=log_level,
+            sync_agentfs=sync_agentfs,
+            checkpoint_interval=checkpoint_interval,
+            retention_days=retention_days,
+        )
+    )
 
 
 @app.command(name="setup", help="Define LLM-related settings for the bot.")
@@ -201,6 +229,27 @@ def serve(
             help="Config file from which to read the LobsterX server configuration. Configured options have precedence over CLI.",
         ),
     ] = None,
+    sync_agentfs: Annotated[
+        bool,
+        Option(
+            "--sync-agentfs/--no-sync-agentfs",
+            help="Incrementally sync an existing AgentFS database with the current directory before starting.",
+        ),
+    ] = False,
+    checkpoint_interval: Annotated[
+        float,
+        Option(
+            "--checkpoint-interval",
+            help="Seconds between two AgentFS maintenance runs (WAL checkpoint and cleanup of old downloads). Use 0 to disable maintenance. Defaults to 300.",
+        ),
+    ] = DEFAULT_CHECKPOINT_INTERVAL,
+    retention_days: Annotated[
+        float | None,
+        Option(
+            "--retention-days",
+            help="Remove downloaded files older than this number of days from AgentFS. By default, downloads are kept forever.",
+        ),
+    ] = None,
 ) -> None:
     if config_file is not None:
         args = LobsterXApiConfig.load_from_config(config_file)
@@ -215,8 +264,10 @@ def serve(
             poll_tasks_per_minute=poll_tasks_per_minute,
             file_downloads_per_minute=file_downloads_per_minute,
             server_api_key=server_api_key,
+            checkpoint_interval=checkpoint_interval,
+            retention_days=retention_days,
         )
-    asyncio.run(_setup_agentfs(with_print=True))
+    asyncio.run(_setup_agentfs(with_print=True, sync=sync_agentfs))
     uvicorn.run(app, host=host, port=port)
 
 
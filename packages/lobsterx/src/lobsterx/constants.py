@@ -2,30 +2,8 @@ import logging
 from pathlib import Path
 from typing import Literal
 
-DEFAULT_TO_AVOID = [
-    ".git",
-    ".venv",
-    "__pycache__",
-    "node_modules",
-    "dist",
-    "build",
-    "wheels",
-]
-DEFAULT_TO_AVOID_FILES = [
-    ".env",
-    ".env.local",
-    ".env.production",
-    ".env.staging",
-    ".npmrc",
-    ".netrc",
-    ".pypirc",
-    "agent.db",
-    "agent.db-wal",
-    "uv.lock",
-    "package-lock.json",
-    "pnpm-lock.yaml",
-]
 DATA_DIR = Path("downloads")
+DEFAULT_CHECKPOINT_INTERVAL = 300
 AGENT_TASK = """
 You should assist the user on document-related tasks.
 
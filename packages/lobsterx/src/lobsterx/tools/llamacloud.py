@@ -10,7 +10,12 @@ from llama_cloud import AsyncLlamaCloud
 from llama_cloud.types.classifier.classifier_rule_param import ClassifierRuleParam
 from llama_cloud.types.extraction import ExtractConfigParam
 from workflows_acp.models import Tool
-from workflows_acp.tools.agentfs import _is_accessible_path, configure_agentfs
+from workflows_acp.tools.agentfs import (
+    _is_accessible_path,
+    configure_agentfs,
+    path_index,
+    read_cache,
+)
 from workflows_acp.tools.definitions import AGENTFS_TOOLS
 
 from .caching import get_cache
@@ -46,6 +51,8 @@ async def _download_file_to_agentfs(file_path: str, content: bytes) -> str:
         await agentfs.fs.write_file(file_path, content=content, encoding="utf-8")
     except Exception as e:
         return f"There was an error while writing the file: {e}"
+    path_index.add(file_path)
+    read_cache.invalidate(file_path)
     return "File written with success"
 
 
@@ -13,7 +13,13 @@ from random_name import generate_name
 from telegram import Document, File, User
 from telegram.ext import CallbackContext
 from workflows.events import Event
-from workflows_acp.constants import AGENTFS_FILE, AVAILABLE_MODELS, DEFAULT_MODEL
+from workflows_acp.constants import (
+    AGENTFS_FILE,
+    AVAILABLE_MODELS,
+    DEFAULT_MODEL,
+    DEFAULT_TO_AVOID,
+    DEFAULT_TO_AVOID_FILES,
+)
 from workflows_acp.events import (
     InputEvent,
     OutputEvent,
@@ -23,14 +29,13 @@ from workflows_acp.events import (
     ToolResultEvent,
 )
 from workflows_acp.llm_wrapper import LLMWrapper
-from workflows_acp.tools.agentfs import load_all_files
+from workflows_acp.tools.agentfs import load_all_files, sync_all_files
+from workflows_acp.tools.maintenance import run_maintenance
 from workflows_acp.workflow import AgentWorkflow
 
 from .constants import (
     AGENT_TASK,
     DATA_DIR,
-    DEFAULT_TO_AVOID,
-    DEFAULT_TO_AVOID_FILES,
     SPECIAL_CHARS,
 )
 from .tools import TOOLS
@@ -169,7 +174,35 @@ async def _remove_temporary_report_file(path: str) -> None:
         pass
 
 
-async def _setup_agentfs(with_print: bool = False) -> None:
+def _start_agentfs_maintenance(
+    checkpoint_interval: float, retention_days: float | None = None
+) -> asyncio.Task | None:
+    """
+    Start the periodic AgentFS maintenance (WAL checkpoints and, if a retention is set, removal of old downloads) in the background.
+
+    Args:
+        checkpoint_interval (float): Seconds between two maintenance runs. Maintenance is disabled if this is not positive.
+        retention_days (float | None): Downloaded files older than this are removed. None (or a non-positive value) keeps them forever.
+    Returns:
+        asyncio.Task | None: The maintenance task, or None if maintenance is disabled.
+    """
+    if checkpoint_interval <= 0:
+        return None
+    retention = (
+        retention_days * 24 * 60 * 60
+        if retention_days is not None and retention_days > 0
+        else None
+    )
+    return asyncio.create_task(
+        run_maintenance(
+            checkpoint_interval,
+            gc_directory=DATA_DIR if retention is not None else None,
+            retention=retention,
+        )
+    )
+
+
+async def _setup_agentfs(with_print: bool = False, sync: bool = False) -> None:
     if not AGENTFS_FILE.exists():
         if not with_print:
             logging.info(
@@ -180,7 +213,14 @@ async def _setup_agentfs(with_print: bool = False) -> None:
                 "Loading all files in the current working directory to AgentFS",
                 file=sys.stderr,
             )
-        await load_all_files(DEFAULT_TO_AVOID, DEFAULT_TO_AVOID_FILES, progress=True)
+        # the documents (e.g. PDFs) parsed and extracted by the tools are binary, and can be big
+        await load_all_files(
+            DEFAULT_TO_AVOID,
+            DEFAULT_TO_AVOID_FILES,
+            progress=True,
+            max_file_size=None,
+            skip_binary=False,
+        )
         if not with_print:
             logging.info(
                 "Finished loading all files in the current working directory to AgentFS"
@@ -190,6 +230,19 @@ async def _setup_agentfs(with_print: bool = False) -> None:
                 "Finished loading all files in the current working directory to AgentFS",
                 file=sys.stderr,
             )
+    elif sync:
+        report = await sync_all_files(
+            DEFAULT_TO_AVOID,
+            DEFAULT_TO_AVOID_FILES,
+            progress=with_print,
+            max_file_size=None,
+            skip_binary=False,
+        )
+        message = f"Synced AgentFS with the current working directory: {report['added']} added, {report['updated']} updated, {report['removed']} removed, {report['unchanged']} unchanged"
+        if not with_print:
+            logging.info(message)
+        else:
+            print(message, file=sys.stderr)
     else:
         if not with_print:
             logging.info(
@@ -3,7 +3,7 @@ from pathlib import Path
 from unittest.mock import Mock, patch
 
 import pytest
-from lobsterx.constants import DEFAULT_TO_AVOID, DEFAULT_TO_AVOID_FILES
+from workflows_acp.constants import DEFAULT_TO_AVOID, DEFAULT_TO_AVOID_FILES
 from lobsterx.tools.llamacloud import (
     _download_file_to_agentfs,
     _read_file_from_agentfs,
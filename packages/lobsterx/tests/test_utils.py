@@ -1,3 +1,4 @@
+import asyncio
 import os
 from pathlib import Path
 from typing import cast
@@ -8,21 +9,24 @@ from telegram import Document, User
 from telegram.ext import CallbackContext
 from workflows_acp.llm_wrapper import LLMWrapper
 from workflows_acp.llms.openai_llm import OpenAILLM
+from workflows_acp.constants import DEFAULT_TO_AVOID, DEFAULT_TO_AVOID_FILES
 from workflows_acp.tools.agentfs import load_all_files
 from workflows_acp.workflow import AgentWorkflow
 
 from lobsterx.constants import (
     DATA_DIR,
-    DEFAULT_TO_AVOID,
-    DEFAULT_TO_AVOID_FILES,
     SPECIAL_CHARS,
 )
-from lobsterx.tools.llamacloud import _read_file_from_agentfs
+from lobsterx.tools.llamacloud import (
+    _download_file_to_agentfs,
+    _read_file_from_agentfs,
+)
 from lobsterx.utils import (
     _escape_markdow_for_tg,
     _event_to_log,
     _remove_temporary_report_file,
     _setup_agentfs,
+    _start_agentfs_maintenance,
     _write_temporary_report_file,
     get_llm,
     get_workflow,
@@ -343,10 +347,45 @@ async def test_setup_agentfs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) ->
     (tmp_path / "test.txt").write_text("hello")
     (tmp_path / ".env.production").write_text("greetings")
     (tmp_path / ".pypirc").write_text("bye")
+    (tmp_path / "doc.pdf").write_bytes(b"%PDF-1.7\n\x00\xff\x00binary")
     await _setup_agentfs()
     content = await _read_file_from_agentfs("test.txt")
     assert content.decode("utf-8") == "hello"
+    # the documents read by the LlamaCloud tools are binary
+    content = await _read_file_from_agentfs("doc.pdf")
+    assert content == b"%PDF-1.7\n\x00\xff\x00binary"
     with pytest.raises(FileNotFoundError):
         await _read_file_from_agentfs(".env.production")
     with pytest.raises(FileNotFoundError):
         await _read_file_from_agentfs(".pypirc")
+
+
+@pytest.mark.asyncio
+async def test_setup_agentfs_sync(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "test.txt").write_text("hello")
+    await _setup_agentfs()
+    (tmp_path / "test.txt").write_text("hello world")
+    await _setup_agentfs()
+    content = await _read_file_from_agentfs("test.txt")
+    assert content.decode("utf-8") == "hello"
+    await _setup_agentfs(sync=True)
+    content = await _read_file_from_agentfs("test.txt")
+    assert content.decode("utf-8") == "hello world"
+
+
+@pytest.mark.asyncio
+async def test_start_agentfs_maintenance(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    assert _start_agentfs_maintenance(0) is None
+    await _download_file_to_agentfs(str(DATA_DIR / "old.pdf"), b"old")
+    task = _start_agentfs_maintenance(0.01, retention_days=1e-9)
+    assert task is not None
+    await asyncio.sleep(0.5)
+    task.cancel()
+    with pytest.raises(FileNotFoundError):
+        await _read_file_from_agentfs(str(DATA_DIR / "old.pdf"))
@@ -14,6 +14,7 @@ class Template:
     Attributes:
         content (str): original template string
         _to_render (list[str]): fields of the string that have to be rendered with the template
+        _segments (list[str]): the template compiled into alternating literal text (even indexes) and field names (odd indexes)
     """
 
     def __init__(self, content: str):
@@ -25,6 +26,7 @@ class Template:
         """
         self.content = content
         self._to_render = PATTERN.findall(content)
+        self._segments = PATTERN.split(content)
 
     def _validate(self, args: dict[str, str]) -> bool:
         return all(el in args for el in self._to_render) and all(
@@ -42,10 +44,10 @@ class Template:
             str: The rendered template string.
         """
         if self._validate(args):
-            content = self.content
-            for word in self._to_render:
-                content = content.replace("{{" + word + "}}", args[word])
-            return content
+            # single pass: fields are filled in and the string is built with one join
+            segments = self._segments.copy()
+            segments[1::2] = [args[field] for field in segments[1::2]]
+            return "".join(segments)
         else:
             if (ls := list(set(self._to_render) - set(list(args.keys())))) != []:
                 raise TemplateValidationError(
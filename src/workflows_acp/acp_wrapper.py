@@ -1,5 +1,5 @@
 import logging
-import yaml
+from functools import partial
 from typing import Any, cast, Literal
 from datetime import datetime
 from rich import print as rprint
@@ -12,9 +12,11 @@ from acp import (
     LoadSessionResponse,
     NewSessionResponse,
     PromptResponse,
+    RequestError,
     SetSessionModeResponse,
     update_agent_message_text,
     update_agent_thought_text,
+    update_user_message_text,
     update_tool_call,
     start_tool_call,
     run_agent,
@@ -35,6 +37,10 @@ from acp.schema import (
     McpServerStdio,
     ResourceContentBlock,
     ResumeSessionResponse,
+    SessionCapabilities,
+    SessionForkCapabilities,
+    SessionListCapabilities,
+    SessionResumeCapabilities,
     SetSessionModelResponse,
     SseMcpServer,
     TextContentBlock,
@@ -44,9 +50,12 @@ from acp.schema import (
 
 from .workflow import AgentWorkflow
 from .llm_wrapper import LLMWrapper
+from .llms import ChatHistory, ChatMessage, MessageLog
+from .llms.models import LogsMemory
+from .session_store import SessionStore, StoredSession
 from .models import Tool
 from .tools import TOOLS, DefaultToolType, filter_tools, AGENTFS_TOOLS
-from .tools.agentfs import load_all_files
+from .tools.agentfs import load_all_files, sync_all_files, overlay
 from .events import (
     InputEvent,
     OutputEvent,
@@ -58,6 +67,8 @@ from .events import (
     ToolResultEvent,
 )
 from .mcp_wrapper import McpWrapper, McpServersConfig
+from .agent_files import WatchedFile, load_yaml_config
+from .mcp_sessions import SharedMcpServers, attach_session_servers
 from .constants import (
     MODES,
     PERMISSION_OPTIONS,
@@ -65,9 +76,15 @@ from .constants import (
     VERSION,
     DEFAULT_MODE_ID,
     MCP_CONFIG_FILE,
+    MCP_IDLE_TIMEOUT,
     AGENTFS_FILE,
     AVAILABLE_MODELS,
+    DEFAULT_MAX_FILE_SIZE,
     DEFAULT_GOOGLE_MODEL,
+    SESSIONS_DB_FILE,
+    SESSION_TITLE_MAX_CHARS,
+    SESSIONS_MAX_MEMORY,
+    SESSIONS_MAX_RESIDENT,
 )
 
 
@@ -78,11 +95,13 @@ class AcpAgentWorkflow(Agent):
     Attributes:
         _conn (Client): ACP Client-side connection
         _next_session_id (int): ID for the incoming session request
-        _session_infos (dict[str, SessionInfo]): dictionary mapping session IDs with session metadata
-        _sessions (set[str]): set of all the sessions created during the agent's lifespan
+        _session_infos (dict[str, SessionInfo]): dictionary mapping session IDs with session metadata, for the sessions in memory (the others are read from the session store)
+        _sessions (set[str]): set of the sessions in memory
         _current_tool_call_id (int): ID tracking the number of tool calls.
         _llm (LLMWrapper): LLM to use with the LlamaIndex Workflow
         _mcp_client (McpWrapper | None): MCP client to use with the LlamaIndex Workflow. None if MCP use is not requested.
+        _shared_mcp_servers (SharedMcpServers): MCP servers declared by the client for its sessions, shared across the sessions declaring the same server.
+        _session_mcp_servers (dict[str, list[str]]): dictionary mapping session IDs with the keys of their shared MCP servers
     """
 
     _conn: Client
@@ -96,6 +115,11 @@ class AcpAgentWorkflow(Agent):
         mcp_wrapper: McpWrapper | None = None,
         mcp_tools: list[Tool] | None = None,
         use_agentfs: bool = False,
+        native_tool_calling: bool = False,
+        tool_selection_top_k: int | None = None,
+        compact_tools: bool = False,
+        session_store: SessionStore | None = None,
+        sessions_max_memory: int = SESSIONS_MAX_MEMORY,
     ) -> None:
         """
         Initialize the AcpAgentWorkflow instance.
@@ -107,8 +131,20 @@ class AcpAgentWorkflow(Agent):
             mode (str | None): Mode identifier.
             mcp_wrapper (McpWrapper | None): MCP client wrapper.
             mcp_tools (list[Tool] | None): Additional MCP tools.
+            use_agentfs (bool): Whether to use AgentFS instead of the real filesystem.
+            native_tool_calling (bool): Whether the LLM calls tools through the native function-calling API of its provider.
+            tool_selection_top_k (int | None): Number of MCP tools relevant to each request listed in the system prompt (the others can be searched by the LLM). None lists all the tools.
+            compact_tools (bool): Whether the tools are listed in the system prompt as compact, TypeScript-like signatures, with trimmed descriptions and without output schemas.
+            session_store (SessionStore | None): Store of the sessions and of their chat history. Defaults to an in-memory store.
+            sessions_max_memory (int): Approximate memory (in bytes) the chat histories of the sessions can use before the least recently used idle ones are evicted (they are loaded back from the session store when prompted again).
         """
-        self._next_session_id = 0
+        self._session_store = session_store or SessionStore()
+        # chat histories of the sessions that were prompted, loaded from the store on first use, from the least to the most recently used
+        self._histories: dict[str, ChatHistory] = {}
+        self.sessions_max_memory = sessions_max_memory
+        # sessions with a prompt in progress, which cannot be evicted
+        self._prompting: set[str] = set()
+        self._next_session_id = self._session_store.next_session_number()
         self._sessions: set[str] = set()
         self._session_infos: dict[str, SessionInfo] = {}
         self._mode: str = mode or DEFAULT_MODE_ID
@@ -130,8 +166,17 @@ class AcpAgentWorkflow(Agent):
             agent_task=agent_task,
             model=llm_model,
             llm_provider=AVAILABLE_MODELS[llm_model],
+            native_tool_calling=native_tool_calling,
+            tool_selection_top_k=tool_selection_top_k,
+            compact_tools=compact_tools,
         )
         self._mcp_client = mcp_wrapper
+        self._shared_mcp_servers = SharedMcpServers()
+        self._session_mcp_servers: dict[str, list[str]] = {}
+        # agent_config.yaml, when the agent was created from it, and the version of it that is applied
+        self._config_file: WatchedFile[dict[str, Any]] | None = None
+        self._config_version = 0
+        self._config: dict[str, Any] = {}
 
     @classmethod
     def ext_from_config_file(
@@ -139,6 +184,11 @@ class AcpAgentWorkflow(Agent):
         mcp_wrapper: McpWrapper | None = None,
         mcp_tools: list[Tool] | None = None,
         use_agentfs: bool = False,
+        native_tool_calling: bool = False,
+        tool_selection_top_k: int | None = None,
+        compact_tools: bool = False,
+        session_store: SessionStore | None = None,
+        sessions_max_memory: int = SESSIONS_MAX_MEMORY,
     ) -> "AcpAgentWorkflow":
         """
         Create an AcpAgentWorkflow instance from a config file.
@@ -146,14 +196,20 @@ class AcpAgentWorkflow(Agent):
         Args:
             mcp_wrapper (McpWrapper | None): MCP client wrapper.
             mcp_tools (list[Tool] | None): Additional MCP tools.
+            use_agentfs (bool): Whether to use AgentFS instead of the real filesystem.
+            native_tool_calling (bool): Whether the LLM calls tools through the native function-calling API of its provider.
+            tool_selection_top_k (int | None): Number of MCP tools relevant to each request listed in the system prompt (the others can be searched by the LLM). None lists all the tools.
+            compact_tools (bool): Whether the tools are listed in the system prompt as compact, TypeScript-like signatures, with trimmed descriptions and without output schemas.
+            session_store (SessionStore | None): Store of the sessions and of their chat history. Defaults to an in-memory store.
+            sessions_max_memory (int): Approximate memory (in bytes) the chat histories of the sessions can use before the least recently used idle ones are evicted (they are loaded back from the session store when prompted again).
         Returns:
             AcpAgentWorkflow: The initialized agent workflow.
         """
         assert AGENT_CONFIG_FILE.exists() and AGENT_CONFIG_FILE.is_file(), (
             f"No such file: {str(AGENT_CONFIG_FILE)}"
         )
-        with open(AGENT_CONFIG_FILE, "r") as f:
-            data = yaml.safe_load(f)
+        config_file = WatchedFile(AGENT_CONFIG_FILE, parse=load_yaml_config, default={})
+        data = config_file.get()
         config: dict[str, Any] = {
             "agent_task": None,
             "llm_model": None,
@@ -162,6 +218,11 @@ class AcpAgentWorkflow(Agent):
             "mcp_wrapper": mcp_wrapper,
             "mcp_tools": mcp_tools,
             "use_agentfs": use_agentfs,
+            "native_tool_calling": native_tool_calling,
+            "tool_selection_top_k": tool_selection_top_k,
+            "compact_tools": compact_tools,
+            "session_store": session_store,
+            "sessions_max_memory": sessions_max_memory,
         }
         if "agent_task" in data:
             config["agent_task"] = data["agent_task"]
@@ -176,7 +237,33 @@ class AcpAgentWorkflow(Agent):
             config["tools"] = cast(list[DefaultToolType], data["tools"])
         if "mode" in data:
             config["mode"] = data["mode"]
-        return cls(**config)
+        agent = cls(**config)
+        agent._config_file = config_file
+        agent._config_version = config_file.version
+        agent._config = data
+        return agent
+
+    def _reload_config(self) -> None:
+        """
+        Apply the changes to `agent_config.yaml` (if the agent was created from it) that can be applied without a restart: the task and the default mode, for the sessions created or loaded from then on.
+        """
+        if self._config_file is None:
+            return
+        data = self._config_file.get()
+        if self._config_file.version == self._config_version:
+            return
+        self._config_version = self._config_file.version
+        logging.info(f"Reloading {str(AGENT_CONFIG_FILE)}")
+        if data.get("agent_task") != self._config.get("agent_task"):
+            self._llm.set_task(data.get("agent_task"))
+        if data.get("mode") != self._config.get("mode"):
+            self._mode = data.get("mode") or DEFAULT_MODE_ID
+        for key in ("model", "tools"):
+            if data.get(key) != self._config.get(key):
+                logging.warning(
+                    f"The `{key}` field of {str(AGENT_CONFIG_FILE)} changed: restart the agent to apply it"
+                )
+        self._config = data
 
     def _get_tool_call_id(self, increment: bool = True) -> str:
         """
@@ -223,16 +310,202 @@ class AcpAgentWorkflow(Agent):
         return InitializeResponse(
             protocol_version=PROTOCOL_VERSION,
             agent_capabilities=AgentCapabilities(
+                load_session=True,
                 prompt_capabilities=PromptCapabilities(
                     image=False, audio=False, embedded_context=False
                 ),
-                mcp_capabilities=McpCapabilities(http=False, sse=False),
+                mcp_capabilities=McpCapabilities(http=True, sse=True),
+                session_capabilities=SessionCapabilities(
+                    fork=SessionForkCapabilities(),
+                    list=SessionListCapabilities(),
+                    resume=SessionResumeCapabilities(),
+                ),
             ),
             agent_info=Implementation(
                 name="workflows-acp", title="AgentWorkflow", version=VERSION
             ),
         )
 
+    async def _attach_mcp_servers(
+        self,
+        session_id: str,
+        mcp_servers: list[HttpMcpServer | SseMcpServer | McpServerStdio],
+    ) -> None:
+        """
+        Start (or share) the MCP servers declared by the client for a session, releasing the ones it declared before.
+
+        Args:
+            session_id (str): Session identifier.
+            mcp_servers (list): List of MCP servers.
+        """
+        keys = await attach_session_servers(
+            self._shared_mcp_servers, mcp_servers, static_client=self._mcp_client
+        )
+        for key in self._session_mcp_servers.pop(session_id, []):
+            await self._shared_mcp_servers.release(key)
+        if len(keys) > 0:
+            self._session_mcp_servers[session_id] = keys
+
+    def _register_session(self, session_id: str, cwd: str) -> None:
+        """
+        Record a session (created, loaded or resumed) in memory and in the store, keeping its title if it is already stored.
+
+        Args:
+            session_id (str): Session identifier.
+            cwd (str): Working directory of the session.
+        """
+        now = datetime.now().isoformat()
+        stored = self._session_store.get_session(session_id)
+        session = StoredSession(
+            session_id=session_id,
+            cwd=cwd,
+            title=stored["title"] if stored is not None else f"Session {session_id}",
+            created_at=stored["created_at"] if stored is not None else now,
+            updated_at=now,
+        )
+        self._session_store.save_session(session)
+        self._sessions.add(session_id)
+        self._session_infos.pop(session_id, None)
+        self._session_infos[session_id] = SessionInfo(
+            cwd=cwd,
+            title=session["title"],
+            session_id=session_id,
+            updated_at=now,
+        )
+        self._evict_sessions()
+
+    def _get_session_info(self, session_id: str) -> SessionInfo | None:
+        """
+        Get the metadata of a session, reading it from the store if the session was evicted from memory.
+
+        Args:
+            session_id (str): Session identifier.
+        Returns:
+            SessionInfo | None: Session metadata, or None if the session is unknown.
+        """
+        info = self._session_infos.get(session_id)
+        if info is None:
+            stored = self._session_store.get_session(session_id)
+            if stored is None:
+                return None
+            info = SessionInfo(
+                cwd=stored["cwd"],
+                title=stored["title"],
+                session_id=session_id,
+                updated_at=stored["updated_at"],
+            )
+            self._sessions.add(session_id)
+            self._session_infos[session_id] = info
+        return info
+
+    def session_memory(self, session_id: str) -> int:
+        """
+        Get the approximate memory used by the chat history of a session (without the messages it shares with the session it was forked from).
+
+        Args:
+            session_id (str): Session identifier.
+        Returns:
+            int: Memory in bytes (0 if the history of the session is not in memory).
+        """
+        history = self._histories.get(session_id)
+        return history.nbytes if history is not None else 0
+
+    def _evict_sessions(self) -> None:
+        """
+        Evict the least recently used idle sessions from memory, until their chat histories fit in `sessions_max_memory` and the metadata of at most `SESSIONS_MAX_RESIDENT` sessions is kept. Evicted sessions are in the store, from which they are loaded back when needed.
+
+        The MCP servers declared by the client for an evicted session are kept: the session is still open for the client, which does not declare them again.
+        """
+        # messages shared by forked sessions are counted once
+        memory = LogsMemory(history.messages for history in self._histories.values())
+        if memory.nbytes > self.sessions_max_memory:
+            # the queued messages of the evicted histories are written first
+            self._session_store.flush()
+            for session_id in list(self._histories):
+                if memory.nbytes <= self.sessions_max_memory:
+                    break
+                if session_id in self._prompting:
+                    continue
+                history = self._histories.pop(session_id)
+                # the messages still shared with a fork in memory are not freed
+                freed = memory.remove(history.messages)
+                self._session_infos.pop(session_id, None)
+                self._sessions.discard(session_id)
+                logging.info(
+                    f"Evicted idle session {session_id} from memory ({freed} bytes freed)"
+                )
+        excess = len(self._session_infos) - SESSIONS_MAX_RESIDENT
+        if excess > 0:
+            for session_id in [
+                session_id
+                for session_id in self._session_infos
+                if session_id not in self._histories
+                and session_id not in self._prompting
+            ][:excess]:
+                del self._session_infos[session_id]
+                self._sessions.discard(session_id)
+
+    def _get_history(self, session_id: str) -> ChatHistory:
+        """
+        Get the chat history of a session, loading it from the store the first time. Messages appended to it are written to the store.
+
+        Args:
+            session_id (str): Session identifier.
+        Returns:
+            ChatHistory: Chat history, starting with a system message.
+        """
+        history = self._histories.pop(session_id, None)
+        if history is not None:
+            # moved to the end, as the most recently used
+            self._histories[session_id] = history
+        else:
+            history = ChatHistory(
+                messages=MessageLog(
+                    [ChatMessage(role="system", content="")]
+                    + self._session_store.load_messages(session_id)
+                )
+            )
+            history.on_append = partial(self._session_store.append, session_id)
+            self._histories[session_id] = history
+        return history
+
+    def _touch_session(self, session_id: str, prompt: str) -> None:
+        """
+        Update the timestamp of a session after a prompt, titling it after its first prompt.
+        """
+        info = self._get_session_info(session_id)
+        if info is None:
+            return
+        stored = self._session_store.get_session(session_id)
+        title = info.title or f"Session {session_id}"
+        if title == f"Session {session_id}" and prompt.strip() != "":
+            title = prompt.strip().splitlines()[0][:SESSION_TITLE_MAX_CHARS]
+        now = datetime.now().isoformat()
+        self._session_store.save_session(
+            StoredSession(
+                session_id=session_id,
+                cwd=info.cwd,
+                title=title,
+                created_at=stored["created_at"] if stored is not None else now,
+                updated_at=now,
+            )
+        )
+        # moved to the end, as the most recently used
+        self._session_infos.pop(session_id, None)
+        self._session_infos[session_id] = SessionInfo(
+            cwd=info.cwd, title=title, session_id=session_id, updated_at=now
+        )
+
+    async def close(self) -> None:
+        """
+        Close the MCP servers, both the ones configured in `.mcp.json` and the ones declared by the client, and the session store.
+        """
+        self._session_store.close()
+        self._session_mcp_servers.clear()
+        await self._shared_mcp_servers.close()
+        if self._mcp_client is not None:
+            await self._mcp_client.close()
+
     async def authenticate(
         self, method_id: str, **kwargs: Any
     ) -> AuthenticateResponse | None:
@@ -263,15 +536,11 @@ class AcpAgentWorkflow(Agent):
             NewSessionResponse: The new session response.
         """
         logging.info("Received new session request")
+        self._reload_config()
         session_id = str(self._next_session_id)
         self._next_session_id += 1
-        self._sessions.add(session_id)
-        self._session_infos[session_id] = SessionInfo(
-            cwd=cwd,
-            title=f"Session {session_id}",
-            session_id=session_id,
-            updated_at=datetime.now().isoformat(),
-        )
+        await self._attach_mcp_servers(session_id, mcp_servers)
+        self._register_session(session_id, cwd)
         return NewSessionResponse(
             session_id=session_id,
             modes=SessionModeState(available_modes=MODES, current_mode_id=self._mode),
@@ -285,7 +554,7 @@ class AcpAgentWorkflow(Agent):
         **kwargs: Any,
     ) -> LoadSessionResponse | None:
         """
-        Handle the load session request from the client.
+        Handle the load session request from the client, replaying the stored conversation of the session to it before responding.
 
         Args:
             cwd (str): Current working directory.
@@ -295,13 +564,18 @@ class AcpAgentWorkflow(Agent):
             LoadSessionResponse | None: The load session response.
         """
         logging.info("Received load session request %s", session_id)
-        self._sessions.add(session_id)
-        self._session_infos[session_id] = SessionInfo(
-            cwd=cwd,
-            title=f"Session {session_id}",
-            session_id=session_id,
-            updated_at=datetime.now().isoformat(),
-        )
+        self._reload_config()
+        await self._attach_mcp_servers(session_id, mcp_servers)
+        # the chat history is loaded from the store when the session is first prompted
+        self._register_session(session_id, cwd)
+        for message in self._session_store.load_messages(session_id):
+            if message.role == "user":
+                update = update_user_message_text(message.content)
+            elif message.role == "assistant":
+                update = update_agent_message_text(message.content)
+            else:
+                continue
+            await self._conn.session_update(session_id=session_id, update=update)
         return LoadSessionResponse(
             modes=SessionModeState(available_modes=MODES, current_mode_id=self._mode)
         )
@@ -326,15 +600,29 @@ class AcpAgentWorkflow(Agent):
         self, cursor: str | None = None, cwd: str | None = None, **kwargs: Any
     ) -> ListSessionsResponse:
         """
-        List all sessions managed by the agent.
+        List the sessions stored by the agent, from the most recently updated one, one page at a time.
 
         Args:
-            cursor (str | None): Optional cursor for pagination.
-            cwd (str | None): Optional working directory.
+            cursor (str | None): Optional cursor for pagination, as returned with the previous page.
+            cwd (str | None): Optional working directory, to only list its sessions.
         Returns:
             ListSessionsResponse: The list of sessions response.
         """
-        return ListSessionsResponse(sessions=list(self._session_infos.values()))
+        sessions, next_cursor = self._session_store.list_sessions(
+            cursor=cursor, cwd=cwd
+        )
+        return ListSessionsResponse(
+            sessions=[
+                SessionInfo(
+                    cwd=session["cwd"],
+                    title=session["title"],
+                    session_id=session["session_id"],
+                    updated_at=session["updated_at"],
+                )
+                for session in sessions
+            ],
+            next_cursor=next_cursor,
+        )
 
     async def set_session_model(
         self, model_id: str, session_id: str, **kwargs: Any
@@ -361,18 +649,53 @@ class AcpAgentWorkflow(Agent):
         **kwargs: Any,
     ) -> ForkSessionResponse:
         """
-        Fork an existing session.
+        Fork an existing session: the new session starts with the chat history of the forked one, which is shared (not copied) until the two diverge, and with its MCP servers unless others are declared.
 
         Args:
             cwd (str): Current working directory.
-            session_id (str): Session identifier.
+            session_id (str): Identifier of the session to fork.
             mcp_servers (list | None): List of MCP servers.
         Returns:
-            ForkSessionResponse: The fork session response.
+            ForkSessionResponse: The fork session response, with the identifier of the new session.
+        Raises:
+            RequestError: If the session does not exist.
         """
         logging.info("Received fork session request for %s", session_id)
+        parent = self._session_store.get_session(session_id)
+        if parent is None:
+            raise RequestError.invalid_params({"session_id": session_id})
+        fork_id = str(self._next_session_id)
+        self._next_session_id += 1
+        now = datetime.now().isoformat()
+        self._session_store.fork_session(
+            session_id,
+            StoredSession(
+                session_id=fork_id,
+                cwd=cwd,
+                title=parent["title"],
+                created_at=now,
+                updated_at=now,
+            ),
+        )
+        self._register_session(fork_id, cwd)
+        # when the parent history is in memory, the fork shares it (otherwise it is loaded from the store on its first prompt)
+        history = self._histories.get(session_id)
+        if history is not None:
+            fork = history.fork()
+            fork.on_append = partial(self._session_store.append, fork_id)
+            self._histories[fork_id] = fork
+        if mcp_servers is not None:
+            await self._attach_mcp_servers(fork_id, mcp_servers)
+        else:
+            keys = [
+                key
+                for key in self._session_mcp_servers.get(session_id, [])
+                if self._shared_mcp_servers.retain(key)
+            ]
+            if len(keys) > 0:
+                self._session_mcp_servers[fork_id] = keys
         return ForkSessionResponse(
-            session_id=session_id,
+            session_id=fork_id,
             modes=SessionModeState(available_modes=MODES, current_mode_id=self._mode),
         )
 
@@ -394,6 +717,10 @@ class AcpAgentWorkflow(Agent):
             ResumeSessionResponse: The resume session response.
         """
         logging.info("Received resume session request for %s", session_id)
+        if mcp_servers is not None:
+            await self._attach_mcp_servers(session_id, mcp_servers)
+        # the chat history is loaded from the store when the session is first prompted
+        self._register_session(session_id, cwd)
         return ResumeSessionResponse(
             modes=SessionModeState(available_modes=MODES, current_mode_id=self._mode)
         )
@@ -411,7 +738,7 @@ class AcpAgentWorkflow(Agent):
         **kwargs: Any,
     ) -> PromptResponse:
         """
-        Handle a prompt request from the client, streaming events and updating session state.
+        Handle a prompt request from the client, streaming events and updating session state. Prompts of different sessions run concurrently, each with its own chat history, tools and instructions (see `LLMWrapper.for_session`).
 
         Args:
             prompt (list): List of content blocks for the prompt.
@@ -420,77 +747,117 @@ class AcpAgentWorkflow(Agent):
             PromptResponse: The prompt response.
         """
         logging.info("Received prompt request for session %s", session_id)
-        if session_id not in self._sessions:
-            self._sessions.add(session_id)
-        _impl_prompt = ""
-        for block in prompt:
-            if isinstance(block, TextContentBlock):
-                _impl_prompt += block.text + "\n"
-        wf = AgentWorkflow(llm=self._llm, mcp_client=self._mcp_client)
-        handler = wf.run(
-            start_event=InputEvent(
-                prompt=_impl_prompt, mode=cast(Literal["ask", "bypass"], self._mode)
+        self._prompting.add(session_id)
+        try:
+            if session_id not in self._sessions:
+                self._sessions.add(session_id)
+            _impl_prompt = ""
+            for block in prompt:
+                if isinstance(block, TextContentBlock):
+                    _impl_prompt += block.text + "\n"
+            session_mcp_clients, session_tools = self._shared_mcp_servers.resolve(
+                self._session_mcp_servers.get(session_id, [])
             )
-        )
-        async for event in handler.stream_events():
-            if isinstance(event, ThinkingEvent):
-                await self._conn.session_update(
-                    session_id=session_id,
-                    update=update_agent_thought_text(event.content),
-                )
-            elif isinstance(event, PromptEvent):
-                await self._conn.session_update(
-                    session_id=session_id,
-                    update=update_agent_message_text(event.prompt),
+            session_info = self._get_session_info(session_id)
+            llm = self._llm.for_session(
+                self._get_history(session_id),
+                session_tools=session_tools,
+                cwd=session_info.cwd if session_info is not None else None,
+            )
+            wf = AgentWorkflow(
+                llm=llm,
+                mcp_client=self._mcp_client,
+                session_id=session_id,
+                session_mcp_clients=session_mcp_clients,
+            )
+            handler = wf.run(
+                start_event=InputEvent(
+                    prompt=_impl_prompt,
+                    mode=cast(Literal["ask", "bypass"], self._mode),
                 )
-            elif isinstance(event, ToolCallEvent):
-                tool_title = f"Calling tool {event.tool_name}"
-                await self._conn.session_update(
-                    session_id=session_id,
-                    update=start_tool_call(
-                        tool_call_id=self._get_tool_call_id(),
+            )
+            # ID of the last tool call of this prompt (the counter is shared with the prompts of the other sessions)
+            tool_call_id = self._get_tool_call_id(increment=False)
+            async for event in handler.stream_events():
+                if isinstance(event, ThinkingEvent):
+                    await self._conn.session_update(
+                        session_id=session_id,
+                        update=update_agent_thought_text(event.content),
+                    )
+                elif isinstance(event, PromptEvent):
+                    await self._conn.session_update(
+                        session_id=session_id,
+                        update=update_agent_message_text(event.prompt),
+                    )
+                elif isinstance(event, ToolCallEvent):
+                    tool_title = f"Calling tool {event.tool_name}"
+                    tool_call_id = self._get_tool_call_id()
+                    await self._conn.session_update(
+                        session_id=session_id,
+                        update=start_tool_call(
+                            tool_call_id=tool_call_id,
+                            title=tool_title,
+                            status="pending",
+                            raw_input=event.tool_input,
+                        ),
+                    )
+                elif isinstance(event, ToolResultEvent):
+                    tool_title = f"Result for tool {event.tool_name}"
+                    await self._conn.session_update(
+                        session_id=session_id,
+                        update=update_tool_call(
+                            tool_call_id=tool_call_id,
+                            title=tool_title,
+                            status="completed",
+                            raw_output=event.result,
+                        ),
+                    )
+                elif isinstance(event, ToolPermissionEvent):
+                    tool_title = f"Calling tool {event.tool_name}"
+                    tc = update_tool_call(
+                        tool_call_id=tool_call_id,
                         title=tool_title,
-                        status="pending",
+                        status="in_progress",
                         raw_input=event.tool_input,
-                    ),
-                )
-            elif isinstance(event, ToolResultEvent):
-                tool_title = f"Result for tool {event.tool_name}"
-                await self._conn.session_update(
-                    session_id=session_id,
-                    update=update_tool_call(
-                        tool_call_id=self._get_tool_call_id(increment=False),
-                        title=tool_title,
-                        status="completed",
-                        raw_output=event.result,
-                    ),
-                )
-            elif isinstance(event, ToolPermissionEvent):
-                tool_title = f"Calling tool {event.tool_name}"
-                tc = update_tool_call(
-                    tool_call_id=self._get_tool_call_id(increment=False),
-                    title=tool_title,
-                    status="in_progress",
-                    raw_input=event.tool_input,
-                )
-                permres = await self._conn.request_permission(
-                    options=PERMISSION_OPTIONS, session_id=session_id, tool_call=tc
-                )
-                if permres.outcome.outcome == "selected":
-                    if permres.outcome.option_id == "allow":
-                        handler.ctx.send_event(
-                            PermissionResponseEvent(
-                                allow=True,
-                                reason=None,
-                                tool_name=event.tool_name,
-                                tool_input=event.tool_input,
+                    )
+                    permres = await self._conn.request_permission(
+                        options=PERMISSION_OPTIONS,
+                        session_id=session_id,
+                        tool_call=tc,
+                    )
+                    if permres.outcome.outcome == "selected":
+                        if permres.outcome.option_id == "allow":
+                            handler.ctx.send_event(
+                                PermissionResponseEvent(
+                                    allow=True,
+                                    reason=None,
+                                    tool_name=event.tool_name,
+                                    tool_input=event.tool_input,
+                                )
+                            )
+                        else:
+                            handler.ctx.send_event(
+                                PermissionResponseEvent(
+                                    allow=False,
+                                    reason="You should not use this tool now, please come up with another plan",
+                                    tool_name=event.tool_name,
+                                    tool_input=event.tool_input,
+                                )
+                            )
+                            await self._conn.session_update(
+                                session_id=session_id,
+                                update=update_tool_call(
+                                    tool_call_id=tool_call_id,
+                                    title=tool_title,
+                                    status="failed",
+                                    raw_input=event.tool_input,
+                                ),
                             )
-                        )
                     else:
                         handler.ctx.send_event(
                             PermissionResponseEvent(
                                 allow=False,
-                                reason="You should not use this tool now, please come up with another plan",
+                                reason="I want to cancel this tool call",
                                 tool_name=event.tool_name,
                                 tool_input=event.tool_input,
                             )
@@ -498,49 +865,47 @@ class AcpAgentWorkflow(Agent):
                         await self._conn.session_update(
                             session_id=session_id,
                             update=update_tool_call(
-                                tool_call_id=self._get_tool_call_id(increment=False),
+                                tool_call_id=tool_call_id,
                                 title=tool_title,
                                 status="failed",
                                 raw_input=event.tool_input,
                             ),
                         )
-                else:
-                    handler.ctx.send_event(
-                        PermissionResponseEvent(
-                            allow=False,
-                            reason="I want to cancel this tool call",
-                            tool_name=event.tool_name,
-                            tool_input=event.tool_input,
-                        )
-                    )
-                    await self._conn.session_update(
-                        session_id=session_id,
-                        update=update_tool_call(
-                            tool_call_id=self._get_tool_call_id(increment=False),
-                            title=tool_title,
-                            status="failed",
-                            raw_input=event.tool_input,
-                        ),
-                    )
-        result = await handler
-        assert isinstance(result, OutputEvent)
-        if result.error is None:
-            message = f"I think that my run is complete because of the following reason: {result.stop_reason}\nThis is the final result for my task: {result.final_output}"
-        else:
-            message = f"An error occurred: {result.error}"
-        await self._conn.session_update(
-            session_id=session_id, update=update_agent_message_text(message)
-        )
+            result = await handler
+            assert isinstance(result, OutputEvent)
+            if result.error is None:
+                message = f"I think that my run is complete because of the following reason: {result.stop_reason}\nThis is the final result for my task: {result.final_output}"
+            else:
+                message = f"An error occurred: {result.error}"
+            await self._conn.session_update(
+                session_id=session_id, update=update_agent_message_text(message)
+            )
+            self._session_store.flush()
+            self._touch_session(session_id, _impl_prompt)
+        finally:
+            self._evict_sessions()
+            self._prompting.discard(session_id)
         return PromptResponse(stop_reason="end_turn")
 
     async def cancel(self, session_id: str, **kwargs: Any) -> None:
         """
-        Handle a cancel notification for a session.
+        Handle a cancel notification for a session, cancelling its MCP tool calls in flight, both on the servers of `.mcp.json` and on the ones declared by the client for the session.
 
         Args:
             session_id (str): Session identifier.
         """
         logging.info("Received cancel notification for session %s", session_id)
+        session_mcp_clients, _ = self._shared_mcp_servers.resolve(
+            self._session_mcp_servers.get(session_id, [])
+        )
+        mcp_clients = list(session_mcp_clients.values())
+        if self._mcp_client is not None:
+            mcp_clients.append(self._mcp_client)
+        cancelled = sum(client.cancel_calls(session_id) for client in mcp_clients)
+        if cancelled > 0:
+            logging.info(
+                "Cancelled %d MCP tool calls for session %s", cancelled, session_id
+            )
 
     async def ext_method(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
         """
@@ -577,6 +942,17 @@ async def _create_agent(
     use_agentfs: bool = False,
     agentfs_skip_files: list[str] | None = None,
     agentfs_skip_dirs: list[str] | None = None,
+    agentfs_sync: bool = False,
+    agentfs_overlay: bool = False,
+    agentfs_max_file_size: int | None = DEFAULT_MAX_FILE_SIZE,
+    mcp_lazy: bool = False,
+    mcp_idle_timeout: float | None = MCP_IDLE_TIMEOUT,
+    mcp_cache_results: bool = False,
+    native_tool_calling: bool = False,
+    tool_selection_top_k: int | None = None,
+    compact_tools: bool = False,
+    persist_sessions: bool = True,
+    sessions_max_memory: int = SESSIONS_MAX_MEMORY,
 ) -> AcpAgentWorkflow:
     """
     Create and configure an AcpAgentWorkflow instance.
@@ -589,18 +965,53 @@ async def _create_agent(
         from_config_file (bool): Whether to load from config file.
         mcp_config (McpServersConfig | None): MCP configuration.
         use_mcp (bool): Whether to use MCP.
+        use_agentfs (bool): Whether to use AgentFS instead of the real filesystem.
+        agentfs_skip_files (list[str] | None): Files to exclude from AgentFS.
+        agentfs_skip_dirs (list[str] | None): Directories to exclude from AgentFS.
+        agentfs_sync (bool): Whether to incrementally sync an existing AgentFS database with the current directory.
+        agentfs_overlay (bool): Whether to lazily read files through from the current directory instead of uploading them upfront.
+        agentfs_max_file_size (int | None): Maximum size (in bytes) of the files loaded into AgentFS. None disables the limit.
+        mcp_lazy (bool): Whether to start stdio MCP servers with cached tools only when one of their tools is first called, and to shut them down when idle.
+        mcp_idle_timeout (float | None): Seconds after which an idle stdio MCP server is shut down, in lazy mode. None disables idle shutdowns.
+        mcp_cache_results (bool): Whether to cache, for a short time, the results of read-only MCP tools.
+        native_tool_calling (bool): Whether the LLM calls tools through the native function-calling API of its provider, instead of generating their input as a JSON string.
+        tool_selection_top_k (int | None): Number of MCP tools relevant to each request listed in the system prompt (the others can be searched by the LLM). None lists all the tools.
+        compact_tools (bool): Whether the tools are listed in the system prompt as compact, TypeScript-like signatures, with trimmed descriptions and without output schemas.
+        persist_sessions (bool): Whether to store the sessions and their chat history in `.agent_sessions.db`, so that they can be loaded and resumed after a restart.
+        sessions_max_memory (int): Approximate memory (in bytes) the chat histories of the sessions can use before the least recently used idle ones are evicted.
     Returns:
         AcpAgentWorkflow: The configured agent workflow instance.
     """
     if use_agentfs:
-        if not AGENTFS_FILE.exists():
+        if agentfs_overlay:
+            overlay.enable(agentfs_skip_dirs, agentfs_skip_files, agentfs_max_file_size)
+            logging.info(
+                "Using AgentFS in overlay mode, files will be loaded on first access"
+            )
+        elif not AGENTFS_FILE.exists():
             logging.info(
                 "Loading all files in the current working directory to AgentFS"
             )
-            await load_all_files(agentfs_skip_dirs, agentfs_skip_files)
+            await load_all_files(
+                agentfs_skip_dirs,
+                agentfs_skip_files,
+                max_file_size=agentfs_max_file_size,
+            )
             logging.info(
                 "Finished loading all files in the current working directory to AgentFS"
             )
+        elif agentfs_sync:
+            logging.info(
+                f"Detected {str(AGENTFS_FILE)} in current working directory, syncing changed files."
+            )
+            report = await sync_all_files(
+                agentfs_skip_dirs,
+                agentfs_skip_files,
+                max_file_size=agentfs_max_file_size,
+            )
+            logging.info(
+                f"Finished syncing AgentFS: {report['added']} added, {report['updated']} updated, {report['removed']} removed, {report['unchanged']} unchanged"
+            )
         else:
             logging.info(
                 f"Detected {str(AGENTFS_FILE)} in current working directory, will not load files."
@@ -609,9 +1020,18 @@ async def _create_agent(
     mcp_tools: list[Tool] | None = None
     if use_mcp:
         if mcp_config is not None:
-            mcp_wrapper = McpWrapper.from_config_dict(mcp_config)
+            mcp_wrapper = McpWrapper.from_config_dict(
+                mcp_config,
+                lazy=mcp_lazy,
+                idle_timeout=mcp_idle_timeout,
+                cache_results=mcp_cache_results,
+            )
         elif MCP_CONFIG_FILE.exists() and MCP_CONFIG_FILE.is_file():
-            mcp_wrapper = McpWrapper.from_file()
+            mcp_wrapper = McpWrapper.from_file(
+                lazy=mcp_lazy,
+                idle_timeout=mcp_idle_timeout,
+                cache_results=mcp_cache_results,
+            )
         else:
             rprint(
                 "[yellow bold]WARNING[/]\tCannot use MCP if neither an MCP configuration dictionary nor an MCP config file are provided"
@@ -620,21 +1040,38 @@ async def _create_agent(
         logging.info("Starting to load all MCP tools...")
         mcp_tools = await mcp_wrapper.all_tools()
         logging.info("MCP tools loaded successfully!")
+    session_store = SessionStore(SESSIONS_DB_FILE) if persist_sessions else None
     if from_config_file:
-        return AcpAgentWorkflow.ext_from_config_file(
+        agent = AcpAgentWorkflow.ext_from_config_file(
             mcp_wrapper=mcp_wrapper,
             mcp_tools=mcp_tools,
             use_agentfs=use_agentfs,
+            native_tool_calling=native_tool_calling,
+            tool_selection_top_k=tool_selection_top_k,
+            compact_tools=compact_tools,
+            session_store=session_store,
+            sessions_max_memory=sessions_max_memory,
         )
-    return AcpAgentWorkflow(
-        llm_model=llm_model,
-        agent_task=agent_task,
-        tools=tools,
-        mode=mode,
-        mcp_wrapper=mcp_wrapper,
-        mcp_tools=mcp_tools,
-        use_agentfs=use_agentfs,
-    )
+    else:
+        agent = AcpAgentWorkflow(
+            llm_model=llm_model,
+            agent_task=agent_task,
+            tools=tools,
+            mode=mode,
+            mcp_wrapper=mcp_wrapper,
+            mcp_tools=mcp_tools,
+            use_agentfs=use_agentfs,
+            native_tool_calling=native_tool_calling,
+            tool_selection_top_k=tool_selection_top_k,
+            compact_tools=compact_tools,
+            session_store=session_store,
+            sessions_max_memory=sessions_max_memory,
+        )
+    if mcp_wrapper is not None:
+        mcp_wrapper.add_tools_listener(agent._llm.set_mcp_tools)
+        mcp_wrapper.retry_failed_servers(on_recovered=agent._llm.add_tools)
+        mcp_wrapper.refresh_cached_servers()
+    return agent
 
 
 async def start_agent(
@@ -648,6 +1085,17 @@ async def start_agent(
     use_agentfs: bool = False,
     agentfs_skip_files: list[str] | None = None,
     agentfs_skip_dirs: list[str] | None = None,
+    agentfs_sync: bool = False,
+    agentfs_overlay: bool = False,
+    agentfs_max_file_size: int | None = DEFAULT_MAX_FILE_SIZE,
+    mcp_lazy: bool = False,
+    mcp_idle_timeout: float | None = MCP_IDLE_TIMEOUT,
+    mcp_cache_results: bool = False,
+    native_tool_calling: bool = False,
+    tool_selection_top_k: int | None = None,
+    compact_tools: bool = False,
+    persist_sessions: bool = True,
+    sessions_max_memory: int = SESSIONS_MAX_MEMORY,
 ):
     """
     Start the agent and run the ACP protocol server.
@@ -660,6 +1108,20 @@ async def start_agent(
         from_config_file (bool): Whether to load from config file.
         mcp_config (McpServersConfig | None): MCP configuration.
         use_mcp (bool): Whether to use MCP.
+        use_agentfs (bool): Whether to use AgentFS instead of the real filesystem.
+        agentfs_skip_files (list[str] | None): Files to exclude from AgentFS.
+        agentfs_skip_dirs (list[str] | None): Directories to exclude from AgentFS.
+        agentfs_sync (bool): Whether to incrementally sync an existing AgentFS database with the current directory.
+        agentfs_overlay (bool): Whether to lazily read files through from the current directory instead of uploading them upfront.
+        agentfs_max_file_size (int | None): Maximum size (in bytes) of the files loaded into AgentFS. None disables the limit.
+        mcp_lazy (bool): Whether to start stdio MCP servers with cached tools only when one of their tools is first called, and to shut them down when idle.
+        mcp_idle_timeout (float | None): Seconds after which an idle stdio MCP server is shut down, in lazy mode. None disables idle shutdowns.
+        mcp_cache_results (bool): Whether to cache, for a short time, the results of read-only MCP tools.
+        native_tool_calling (bool): Whether the LLM calls tools through the native function-calling API of its provider, instead of generating their input as a JSON string.
+        tool_selection_top_k (int | None): Number of MCP tools relevant to each request listed in the system prompt (the others can be searched by the LLM). None lists all the tools.
+        compact_tools (bool): Whether the tools are listed in the system prompt as compact, TypeScript-like signatures, with trimmed descriptions and without output schemas.
+        persist_sessions (bool): Whether to store the sessions and their chat history in `.agent_sessions.db`, so that they can be loaded and resumed after a restart.
+        sessions_max_memory (int): Approximate memory (in bytes) the chat histories of the sessions can use before the least recently used idle ones are evicted.
     """
     logging.basicConfig(
         filename="app.log",
@@ -677,5 +1139,19 @@ async def start_agent(
         use_agentfs=use_agentfs,
         agentfs_skip_files=agentfs_skip_files,
         agentfs_skip_dirs=agentfs_skip_dirs,
+        agentfs_sync=agentfs_sync,
+        agentfs_overlay=agentfs_overlay,
+        agentfs_max_file_size=agentfs_max_file_size,
+        mcp_lazy=mcp_lazy,
+        mcp_idle_timeout=mcp_idle_timeout,
+        mcp_cache_results=mcp_cache_results,
+        native_tool_calling=native_tool_calling,
+        tool_selection_top_k=tool_selection_top_k,
+        compact_tools=compact_tools,
+        persist_sessions=persist_sessions,
+        sessions_max_memory=sessions_max_memory,
     )
-    await run_agent(agent=agent)
+    try:
+        await run_agent(agent=agent)
+    finally:
+        await agent.close()
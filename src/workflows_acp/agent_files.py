@@ -0,0 +1,155 @@
+import logging
+import os
+import time
+import yaml
+
+from pathlib import Path
+from typing import Any, Callable, Generic, TypeVar
+from .constants import AGENTS_MD, AGENT_FILES_POLL_INTERVAL
+
+T = TypeVar("T")
+
+
+class WatchedFile(Generic[T]):
+    """
+    File whose parsed content is cached and reloaded when the file changes, detected by polling its modification time and size (at most once per poll interval).
+
+    Attributes:
+        path (Path): Path of the file.
+        version (int): Incremented every time the content is (re)loaded, so that users can tell when it changed.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        parse: Callable[[str], T],
+        default: T,
+        poll_interval: float = AGENT_FILES_POLL_INTERVAL,
+    ) -> None:
+        """
+        Initialize the watched file (it is read on the first access).
+
+        Args:
+            path (str | Path): Path of the file.
+            parse (Callable[[str], T]): Function parsing the content of the file.
+            default (T): Value used while the file does not exist.
+            poll_interval (float): Minimum number of seconds between two checks of the file.
+        """
+        self.path = Path(path)
+        self.version = 0
+        self._parse = parse
+        self._default = default
+        self._poll_interval = poll_interval
+        self._value: T = default
+        self._signature: tuple[int, int] | None = None
+        self._checked_at: float | None = None
+
+    def get(self) -> T:
+        """
+        Get the content of the file, reloading it if it changed since it was last read.
+
+        Returns:
+            T: Parsed content of the file, or the default value if the file does not exist. If the file cannot be parsed, the previous content is kept.
+        Raises:
+            Exception: If the file cannot be parsed the first time it is read.
+        """
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self._poll_interval
+        ):
+            return self._value
+        first_check = self._checked_at is None
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+            signature: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature == self._signature and not first_check:
+            return self._value
+        self._signature = signature
+        if signature is None:
+            self._value = self._default
+        else:
+            try:
+                self._value = self._parse(self.path.read_text())
+            except Exception as e:
+                if first_check:
+                    # there is no previous content to fall back on
+                    self._checked_at = None
+                    raise
+                logging.warning(
+                    f"Could not load {self.path}, keeping its previous content: {e}"
+                )
+                return self._value
+        self.version += 1
+        return self._value
+
+
+def load_yaml_config(text: str) -> dict[str, Any]:
+    """
+    Parse a YAML configuration file (such as `agent_config.yaml`).
+
+    Args:
+        text (str): Content of the file.
+    Returns:
+        dict[str, Any]: Configuration (empty if the file is empty).
+    Raises:
+        ValueError: If the file does not contain a mapping.
+    """
+    data = yaml.safe_load(text)
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError("The configuration should be a mapping")
+    return data
+
+
+def render_instructions(text: str) -> str:
+    """
+    Render the content of an AGENTS.md file as the additional instructions of the system prompt.
+
+    Args:
+        text (str): Content of the file.
+    Returns:
+        str: Additional instructions section.
+    """
+    return "## Additional Instructions\n\n```md\n" + text + "\n```\n"
+
+
+class AgentsMdCache:
+    """
+    Cache of the AGENTS.md files of the working directories of the sessions, each reloaded when it changes.
+    """
+
+    def __init__(self, poll_interval: float = AGENT_FILES_POLL_INTERVAL) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            poll_interval (float): Minimum number of seconds between two checks of each file.
+        """
+        self._poll_interval = poll_interval
+        self._files: dict[str, WatchedFile[str]] = {}
+
+    def instructions(self, cwd: str | Path | None = None) -> str:
+        """
+        Get the additional instructions from the AGENTS.md of a directory.
+
+        Args:
+            cwd (str | Path | None): Working directory. Defaults to the working directory of the process.
+        Returns:
+            str: Additional instructions section of the system prompt, or an empty string if the directory has no AGENTS.md.
+        """
+        directory = os.path.abspath(cwd if cwd is not None else os.getcwd())
+        watched = self._files.get(directory)
+        if watched is None:
+            watched = WatchedFile(
+                Path(directory) / AGENTS_MD,
+                parse=render_instructions,
+                default="",
+                poll_interval=self._poll_interval,
+            )
+            self._files[directory] = watched
+        return watched.get()
@@ -7,8 +7,16 @@ from typer import Typer, Option, Exit
 from typing import Annotated, Literal, Any
 from .models import AvailableModel
 from .tools import DefaultToolType
-from .tools.agentfs import load_all_files
-from .constants import AGENT_CONFIG_FILE, MCP_CONFIG_FILE
+from .tools.agentfs import load_all_files, sync_all_files
+from .tools.maintenance import agentfs_stats, vacuum_agentfs
+from .constants import (
+    AGENT_CONFIG_FILE,
+    AGENTFS_FILE,
+    DEFAULT_MAX_FILE_SIZE,
+    MCP_CONFIG_FILE,
+    MCP_IDLE_TIMEOUT,
+    SESSIONS_MAX_MEMORY,
+)
 from .mcp_wrapper import (
     HttpMcpServer,
     StdioMcpServer,
@@ -54,6 +62,90 @@ def main(
             help="Exclude one or more directories from being uploaded to AgentFS. Can be used multiple times. Only considered if `--agentfs` is passed.",
         ),
     ] = [],
+    agentfs_sync: Annotated[
+        bool,
+        Option(
+            "--agentfs-sync/--no-agentfs-sync",
+            help="Upload only added or changed files (and remove deleted ones) when an AgentFS database already exists. Only considered if `--agentfs` is passed.",
+            is_flag=True,
+        ),
+    ] = False,
+    agentfs_overlay: Annotated[
+        bool,
+        Option(
+            "--agentfs-overlay/--no-agentfs-overlay",
+            help="Do not upload files to AgentFS upfront: read them through from the current directory on first access, while writes only go to AgentFS. Only considered if `--agentfs` is passed.",
+            is_flag=True,
+        ),
+    ] = False,
+    agentfs_max_file_size: Annotated[
+        int,
+        Option(
+            "--agentfs-max-file-size",
+            help="Maximum size (in bytes) of the files loaded into AgentFS. Use 0 to disable the limit. Only considered if `--agentfs` is passed.",
+        ),
+    ] = DEFAULT_MAX_FILE_SIZE,
+    mcp_lazy: Annotated[
+        bool,
+        Option(
+            "--mcp-lazy/--no-mcp-lazy",
+            help="Start stdio MCP servers whose tools are cached only when one of their tools is first called, and shut them down when idle. Only considered if `--mcp` is passed.",
+            is_flag=True,
+        ),
+    ] = False,
+    mcp_idle_timeout: Annotated[
+        float,
+        Option(
+            "--mcp-idle-timeout",
+            help="Seconds after which an idle stdio MCP server is shut down. Use 0 to keep idle servers running. Only considered if `--mcp-lazy` is passed.",
+        ),
+    ] = MCP_IDLE_TIMEOUT,
+    mcp_cache_results: Annotated[
+        bool,
+        Option(
+            "--mcp-cache-results/--no-mcp-cache-results",
+            help="Cache, for a few minutes, the results of read-only MCP tools (annotated as such by their server or listed in the `readOnlyTools` of the server in `.mcp.json`). Only considered if `--mcp` is passed.",
+            is_flag=True,
+        ),
+    ] = False,
+    native_tools: Annotated[
+        bool,
+        Option(
+            "--native-tools/--no-native-tools",
+            help="Call tools through the native function-calling API of the LLM provider, instead of generating the tool input as a JSON string.",
+            is_flag=True,
+        ),
+    ] = False,
+    tool_selection_top_k: Annotated[
+        int,
+        Option(
+            "--tool-selection-top-k",
+            help="List in the system prompt only the built-in tools and this many MCP tools relevant to each request, letting the LLM search the others. Pass 0 to list all the tools.",
+        ),
+    ] = 0,
+    compact_tools: Annotated[
+        bool,
+        Option(
+            "--compact-tools/--no-compact-tools",
+            help="List the tools in the system prompt as compact, TypeScript-like signatures, with trimmed descriptions and without output schemas, to reduce the tokens sent with every request.",
+            is_flag=True,
+        ),
+    ] = False,
+    persist_sessions: Annotated[
+        bool,
+        Option(
+            "--persist-sessions/--no-persist-sessions",
+            help="Store the sessions and their chat history in `.agent_sessions.db`, so that they can be loaded and resumed after a restart.",
+            is_flag=True,
+        ),
+    ] = True,
+    sessions_max_memory: Annotated[
+        int,
+        Option(
+            "--sessions-max-memory",
+            help="Approximate memory (in bytes) the chat histories of the sessions can use before the least recently used idle ones are evicted from memory (they are loaded back from the session store when prompted again).",
+        ),
+    ] = SESSIONS_MAX_MEMORY,
 ) -> None:
     from .acp_wrapper import start_agent
 
@@ -66,6 +158,17 @@ def main(
             agentfs_skip_files=agentfs_skip_file
             if len(agentfs_skip_file) > 0
             else None,
+            agentfs_sync=agentfs_sync,
+            agentfs_overlay=agentfs_overlay,
+            agentfs_max_file_size=agentfs_max_file_size or None,
+            mcp_lazy=mcp_lazy,
+            mcp_idle_timeout=mcp_idle_timeout or None,
+            mcp_cache_results=mcp_cache_results,
+            native_tool_calling=native_tools,
+            tool_selection_top_k=tool_selection_top_k or None,
+            compact_tools=compact_tools,
+            persist_sessions=persist_sessions,
+            sessions_max_memory=sessions_max_memory,
         )
     )
 
@@ -89,14 +192,91 @@ def load_agentfs(
             help="Exclude one or more directories from being uploaded to AgentFS. Can be used multiple times.",
         ),
     ] = [],
+    max_file_size: Annotated[
+        int,
+        Option(
+            "--max-file-size",
+            help="Maximum size (in bytes) of the files uploaded to AgentFS. Use 0 to disable the limit.",
+        ),
+    ] = DEFAULT_MAX_FILE_SIZE,
 ) -> None:
     asyncio.run(
         load_all_files(
             to_avoid_dirs=skip_dir if len(skip_dir) > 0 else None,
             to_avoid_files=skip_file if len(skip_file) > 0 else None,
             progress=True,
+            max_file_size=max_file_size or None,
+        )
+    )
+
+
+@app.command(
+    name="sync-agentfs",
+    help="Incrementally sync AgentFS with the current directory, uploading only added or changed files and removing deleted ones.",
+)
+def sync_agentfs(
+    skip_file: Annotated[
+        list[str],
+        Option(
+            "--skip-file",
+            help="Exclude one or more files from being synced to AgentFS. Can be used multiple times.",
+        ),
+    ] = [],
+    skip_dir: Annotated[
+        list[str],
+        Option(
+            "--skip-dir",
+            help="Exclude one or more directories from being synced to AgentFS. Can be used multiple times.",
+        ),
+    ] = [],
+    max_file_size: Annotated[
+        int,
+        Option(
+            "--max-file-size",
+            help="Maximum size (in bytes) of the files synced to AgentFS. Use 0 to disable the limit.",
+        ),
+    ] = DEFAULT_MAX_FILE_SIZE,
+) -> None:
+    report = asyncio.run(
+        sync_all_files(
+            to_avoid_dirs=skip_dir if len(skip_dir) > 0 else None,
+            to_avoid_files=skip_file if len(skip_file) > 0 else None,
+            progress=True,
+            max_file_size=max_file_size or None,
         )
     )
+    rprint(
+        f"[bold green]Synced AgentFS[/]: {report['added']} added, {report['updated']} updated, {report['removed']} removed, {report['unchanged']} unchanged"
+    )
+
+
+@app.command(
+    name="stats-agentfs",
+    help="Show the size of the AgentFS database and of its write-ahead log, and how fragmented it is.",
+)
+def stats_agentfs() -> None:
+    if not AGENTFS_FILE.exists():
+        rprint(f"[bold red]ERROR:[/]\t{str(AGENTFS_FILE)} does not exist")
+        raise Exit(1)
+    stats = asyncio.run(agentfs_stats())
+    rprint(
+        f"[bold]Database[/]: {stats['db_size']} bytes ({stats['page_count']} pages of {stats['page_size']} bytes, {stats['free_pages']} free)\n"
+        f"[bold]Write-ahead log[/]: {stats['wal_size']} bytes\n"
+        f"[bold]Fragmentation[/]: {stats['fragmentation']:.1%}\n"
+        f"[bold]Files[/]: {stats['files']} ({stats['files_size']} bytes)"
+    )
+
+
+@app.command(
+    name="vacuum-agentfs",
+    help="Checkpoint and compact the AgentFS database. Do not run it while an agent is using the database.",
+)
+def vacuum_agentfs_command() -> None:
+    if not AGENTFS_FILE.exists():
+        rprint(f"[bold red]ERROR:[/]\t{str(AGENTFS_FILE)} does not exist")
+        raise Exit(1)
+    before, after = asyncio.run(vacuum_agentfs())
+    rprint(f"[bold green]Compacted AgentFS[/]: {before} bytes -> {after} bytes")
 
 
 @app.command(
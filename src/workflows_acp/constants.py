@@ -25,11 +25,27 @@ PERMISSION_OPTIONS = [
 VERSION = "0.1.0"
 DEFAULT_MODE_ID = "ask"
 AGENT_CONFIG_FILE = Path("agent_config.yaml")
+SESSIONS_DB_FILE = Path(".agent_sessions.db")
+# seconds after which queued session messages are written
+SESSION_FLUSH_INTERVAL = 1.0
+SESSION_FLUSH_MAX_PENDING = 64
+SESSIONS_PAGE_SIZE = 50
+SESSION_TITLE_MAX_CHARS = 80
+# approximate memory (in bytes) the chat histories of the sessions can use before the least recently used idle ones are evicted
+SESSIONS_MAX_MEMORY = 256 * 1024 * 1024
+# maximum number of sessions whose metadata is kept in memory
+SESSIONS_MAX_RESIDENT = 1024
 
 # LLM Wrapper
 DEFAULT_TASK = """
 Assist the user with their requests, leveraging the tools available to you (as per the `Tools` section) and following the think -> act -> observe pattern detailed in the `Methods` section.
 """
+# name of the tool through which the LLM stops, when tools are called natively
+STOP_TOOL_NAME = "stop"
+# name of the tool through which the LLM searches the tools not selected for the current request
+FIND_TOOLS_TOOL_NAME = "find_tools"
+# maximum length of tool (and parameter) descriptions with the compact tool rendering
+TOOL_DESCRIPTION_MAX_CHARS = 300
 DEFAULT_GOOGLE_MODEL = "gemini-3-flash-preview"
 DEFAULT_ANTHROPIC_MODEL = "claude-opus-4-5"
 DEFAULT_OPENAI_MODEL = "gpt-4.1"
@@ -56,6 +72,8 @@ AVAILABLE_MODELS: dict[str, Literal["google", "anthropic", "openai"]] = {
 }
 
 AGENTS_MD = Path("AGENTS.md")
+# seconds between two checks of AGENTS.md and agent_config.yaml for changes
+AGENT_FILES_POLL_INTERVAL = 1.0
 SYSTEM_PROMPT_STRING = """
 ## Main Task
 
@@ -84,11 +102,41 @@ In order to accomplish this task, you will be asked to:
 
 # MCP Wrapper
 MCP_CONFIG_FILE = Path(".mcp.json")
+MCP_TOOLS_CACHE_FILE = Path(".mcp_tools_cache.json")
+# seconds
+MCP_CONNECT_TIMEOUT = 30.0
+MCP_LIST_TOOLS_TIMEOUT = 10.0
+MCP_DISCOVERY_RETRY_DELAY = 5.0
+MCP_DISCOVERY_MAX_RETRY_DELAY = 300.0
+MCP_PING_INTERVAL = 30.0
+MCP_PING_TIMEOUT = 5.0
+MCP_RECONNECT_DELAY = 0.5
+MCP_RECONNECT_ATTEMPTS = 3
+MCP_MAX_IN_FLIGHT_CALLS = 8
+MCP_MAX_QUEUED_CALLS = 32
+MCP_CALL_TIMEOUT = 120.0
+MCP_IDLE_TIMEOUT = 600.0
+MCP_RESULT_CACHE_TTL = 300.0
+MCP_RESULT_CACHE_MAX_ENTRIES = 256
+MCP_RESULT_MAX_CHARS = 20000
 
 # Tools
 TODO_FILE = Path(".todo.json")
 MEMORY_FILE = Path(".agent_memory.jsonl")
 AGENTFS_FILE = Path("agent.db")
+AGENTFS_MANIFEST_KEY = "workflows_acp:manifest"
+AGENTFS_MAX_CONCURRENT_READS = 16
+AGENTFS_READ_CACHE_MAX_SIZE = 32 * 1024 * 1024
+# tables copied as they are when compacting the database (file contents are copied separately)
+AGENTFS_TABLES = [
+    "fs_config",
+    "fs_inode",
+    "fs_dentry",
+    "fs_symlink",
+    "kv_store",
+    "tool_calls",
+    "sqlite_sequence",
+]
 DEFAULT_TO_AVOID = [
     ".git",
     ".venv",
@@ -100,9 +148,20 @@ DEFAULT_TO_AVOID = [
 ]
 DEFAULT_TO_AVOID_FILES = [
     ".env",
+    ".env.local",
+    ".env.production",
+    ".env.staging",
+    ".npmrc",
+    ".netrc",
+    ".pypirc",
     "agent.db",
     "agent.db-wal",
+    ".agent_sessions.db",
+    ".agent_sessions.db-wal",
     "uv.lock",
     "package-lock.json",
     "pnpm-lock.yaml",
 ]
+IGNORE_FILES = [".gitignore", ".ignore"]
+DEFAULT_MAX_FILE_SIZE = 5 * 1024 * 1024
+BINARY_SNIFF_SIZE = 8192
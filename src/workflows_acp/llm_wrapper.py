@@ -1,17 +1,48 @@
+import copy
+import json
+import logging
 import os
 
 from typing import Type, Literal
-from .models import Tool, StructuredSchemaT
+from typing_extensions import TypedDict
+from .models import Tool, StructuredSchemaT, Action, ToolCall, Stop
 from ._templating import Template
-from .constants import SYSTEM_PROMPT_STRING, DEFAULT_MODEL, DEFAULT_TASK, AGENTS_MD
-from .llms import GoogleLLM, OpenAILLM, AnthropicLLM, ChatHistory, ChatMessage
+from .constants import (
+    SYSTEM_PROMPT_STRING,
+    DEFAULT_MODEL,
+    DEFAULT_TASK,
+    STOP_TOOL_NAME,
+    FIND_TOOLS_TOOL_NAME,
+)
+from .llms import (
+    GoogleLLM,
+    OpenAILLM,
+    AnthropicLLM,
+    ChatHistory,
+    ChatMessage,
+    MessageLog,
+)
+from .llms.models import ToolSchema
+from .tool_index import ToolIndex
+from .tool_registry import ToolRegistry
+from .agent_files import AgentsMdCache
 
 SYSTEM_PROMPT_TEMPLATE = Template(content=SYSTEM_PROMPT_STRING)
+STOP_TOOL = ToolSchema(
+    name=STOP_TOOL_NAME,
+    description="Stop, providing the reason for stopping and the final result of the task.",
+    parameters=Stop.model_json_schema(),
+)
+EMPTY_PARAMETERS = {"type": "object", "properties": {}}
 
 
-def _check_tools(tools: list[Tool]) -> bool:
-    names = [tool.name for tool in tools]
-    return len(names) == len(set(names))
+class SystemPromptSize(TypedDict):
+    """
+    Represents the size (in characters) of the system prompt with the full and the compact rendering of the tools.
+    """
+
+    full: int
+    compact: int
 
 
 class LLMWrapper:
@@ -26,6 +57,10 @@ class LLMWrapper:
         api_key: str | None = None,
         model: str | None = None,
         llm_provider: Literal["google", "anthropic", "openai"] = "google",
+        native_tool_calling: bool = False,
+        tool_selection_top_k: int | None = None,
+        pinned_tools: list[str] | None = None,
+        compact_tools: bool = False,
     ):
         """
         Initialize LLMWrapper.
@@ -35,6 +70,11 @@ class LLMWrapper:
             agent_task (str | None): Optional specific task that the agent has to accomplish on behalf of the user.
             api_key (str | None): Optional API key for Google GenAI. Inferred from environment if not provided.
             model (str | None): LLM model to use. Defaults to `gemini-3-flash`.
+            llm_provider (Literal["google", "anthropic", "openai"]): Provider of the LLM.
+            native_tool_calling (bool): Whether to choose actions through the native function-calling API of the provider, instead of generating the tool input as a JSON string.
+            tool_selection_top_k (int | None): If set, only the pinned tools and this many tools relevant to the user's request are listed in the system prompt, and a `find_tools` tool lets the LLM search the others. None lists all the tools.
+            pinned_tools (list[str] | None): Names of the tools that are always listed when tools are selected. Defaults to all the non-MCP tools.
+            compact_tools (bool): Whether to list the tools in the system prompt as compact, TypeScript-like signatures with trimmed descriptions and without output schemas.
         """
         api_key_variable = f"{llm_provider.upper()}_API_KEY"
         if api_key is None:
@@ -43,35 +83,295 @@ class LLMWrapper:
             raise ValueError(
                 f"{api_key_variable} not found within the current environment: please export it or provide it to the class constructor."
             )
-        if not _check_tools(tools=tools):
-            raise ValueError("All the tools provided should have different names")
-        if AGENTS_MD.exists():
-            additional_instructions = (
-                "## Additional Instructions\n\n```md\n"
-                + AGENTS_MD.read_text()
-                + "\n```\n"
+        if native_tool_calling and any(tool.name == STOP_TOOL_NAME for tool in tools):
+            raise ValueError(
+                f"No tool can be named `{STOP_TOOL_NAME}` when tools are called natively"
             )
-        else:
-            additional_instructions = ""
-        task = agent_task or DEFAULT_TASK
-        tools_str = "\n\n".join([tool.to_string() for tool in tools])
-        system_prompt = SYSTEM_PROMPT_TEMPLATE.render(
-            {
-                "task": task,
-                "tools": tools_str,
-                "additional_instructions": additional_instructions,
-            }
+        self.native_tool_calling = native_tool_calling
+        self.compact_tools = compact_tools
+        self._tool_schemas: list[ToolSchema] | None = None
+        self.tool_selection_top_k = tool_selection_top_k
+        self._tool_index: ToolIndex | None = None
+        # names of the tools selected for the current request, None if all the tools are listed
+        self._selected_tools: set[str] | None = None
+        # `find_tools`, bound to this wrapper (each session view has its own, see `for_session`)
+        self._find_tools: Tool | None = None
+        if tool_selection_top_k is not None:
+            if any(tool.name == FIND_TOOLS_TOOL_NAME for tool in tools):
+                raise ValueError(
+                    f"No tool can be named `{FIND_TOOLS_TOOL_NAME}` when tools are selected"
+                )
+            self._find_tools = self._find_tools_tool()
+            tools = tools + [self._find_tools]
+        self.pinned_tools: set[str] = (
+            set(pinned_tools)
+            if pinned_tools is not None
+            else {tool.name for tool in tools if tool.mcp_metadata is None}
         )
-        self.tools = tools
+        self.pinned_tools.add(FIND_TOOLS_TOOL_NAME)
+        self._agents_md = AgentsMdCache()
+        self._task = agent_task or DEFAULT_TASK
+        self._additional_instructions = self._agents_md.instructions()
+        # rendered `Tools` section of the system prompt, None when it has to be rendered again
+        self._tools_section: str | None = None
+        # system message shared by the chat histories of all the sessions
+        self._system_message: ChatMessage | None = None
+        self._registry = ToolRegistry(tools)
+        # tools of the MCP servers declared by the ACP client for the current session
+        self._session_registry = ToolRegistry()
         if llm_provider == "anthropic":
             self._client = AnthropicLLM(api_key=api_key, model=model)
         elif llm_provider == "openai":
             self._client = OpenAILLM(api_key=api_key, model=model)
         else:
             self._client = GoogleLLM(api_key=api_key, model=model)
-        self._chat_history: ChatHistory = ChatHistory(messages=[])
-        self._chat_history.append(ChatMessage(role="system", content=system_prompt))
+        self._chat_history: ChatHistory = ChatHistory(messages=MessageLog())
+        self._chat_history.append(self._get_system_message())
         self.model = model or DEFAULT_MODEL[llm_provider]
+        if compact_tools and not native_tool_calling:
+            size = self.system_prompt_size()
+            logging.info(
+                f"Compact tool rendering: the system prompt shrinks from {size['full']} to {size['compact']} characters"
+            )
+
+    @property
+    def tools(self) -> list[Tool]:
+        """
+        Tools available to the LLM in all the sessions.
+        """
+        return list(self._registry)
+
+    @property
+    def session_tools(self) -> list[Tool]:
+        """
+        Tools of the MCP servers declared by the ACP client for the current session.
+        """
+        return list(self._session_registry)
+
+    def _visible_tools(self) -> list[Tool]:
+        tools = self.tools + self.session_tools
+        if self._selected_tools is None:
+            return tools
+        return [
+            tool
+            for tool in tools
+            if tool.name in self.pinned_tools or tool.name in self._selected_tools
+        ]
+
+    def _render_tool(self, tool: Tool) -> str:
+        if self.compact_tools:
+            return tool.to_compact_string()
+        return tool.to_string()
+
+    def _render_system_prompt(self, compact: bool | None = None) -> str:
+        if compact is None:
+            if self._tools_section is None:
+                self._tools_section = self._render_tools_section()
+            tools_str = self._tools_section
+        else:
+            tools_str = self._render_tools_section(compact)
+        return SYSTEM_PROMPT_TEMPLATE.render(
+            {
+                "task": self._task,
+                "tools": tools_str,
+                "additional_instructions": self._additional_instructions,
+            }
+        )
+
+    def _render_tools_section(self, compact: bool | None = None) -> str:
+        tools = self._visible_tools()
+        if self.native_tool_calling:
+            # parameters are declared through the function-calling API
+            tools_str = "\n".join(
+                [f"- `{tool.name}`: {tool.description}" for tool in tools]
+            )
+        elif compact if compact is not None else self.compact_tools:
+            tools_str = "\n".join([tool.to_compact_string() for tool in tools])
+        else:
+            tools_str = "\n\n".join([tool.to_string() for tool in tools])
+        if self._selected_tools is not None:
+            tools_str += f"\n\nOnly the tools most relevant to the current request are listed: use `{FIND_TOOLS_TOOL_NAME}` to search for other tools."
+        return tools_str
+
+    def add_tools(self, tools: list[Tool]) -> None:
+        """
+        Make more tools available to the LLM (e.g. the ones of an MCP server that became reachable after startup), updating the system prompt. Tools whose name is already taken are skipped.
+
+        Args:
+            tools (list[Tool]): Tools to add.
+        """
+        if len(self._registry.add_all(tools)) == 0:
+            return
+        self._tools_changed()
+
+    def set_mcp_tools(self, server: str, tools: list[Tool]) -> None:
+        """
+        Replace the tools of an MCP server (e.g. after the server notified that they changed), updating the system prompt. Tools whose name is already taken by another tool are skipped.
+
+        Args:
+            server (str): Name of the MCP server.
+            tools (list[Tool]): New tools of the server.
+        """
+        self._registry.set_server_tools(server, tools)
+        self._tools_changed()
+
+    def set_session_tools(self, tools: list[Tool]) -> None:
+        """
+        Replace the tools of the MCP servers declared for the current session, updating the system prompt. Tools whose name is already taken by another tool are skipped.
+
+        Args:
+            tools (list[Tool]): Tools of the session.
+        """
+        session_registry = ToolRegistry()
+        for tool in tools:
+            if tool.name not in self._registry:
+                session_registry.add(tool)
+        if list(session_registry) == self.session_tools:
+            return
+        self._session_registry = session_registry
+        self._tools_changed()
+
+    def _tools_changed(self) -> None:
+        self._tool_index = None
+        self._update_system_prompt()
+
+    def _get_tool_index(self) -> ToolIndex:
+        if self._tool_index is None:
+            self._tool_index = ToolIndex(
+                [
+                    tool
+                    for tool in self.tools + self.session_tools
+                    if tool.name not in self.pinned_tools
+                ]
+            )
+        return self._tool_index
+
+    def _find_tools_tool(self) -> Tool:
+        def find_tools(query: str) -> str:
+            assert self.tool_selection_top_k is not None
+            found = self._get_tool_index().search(query, self.tool_selection_top_k)
+            if len(found) == 0:
+                return f"No tool matches '{query}'"
+            self._selected_tools = (self._selected_tools or set()) | {
+                tool.name for tool in found
+            }
+            self._update_system_prompt()
+            return "\n\n".join([self._render_tool(tool) for tool in found])
+
+        return Tool(
+            name=FIND_TOOLS_TOOL_NAME,
+            description="Search the tools that are not listed in this section with keywords describing what you need to do. The tools found are listed from then on.",
+            fn=find_tools,
+        )
+
+    def select_tools(self, query: str) -> None:
+        """
+        Select the tools relevant to a request (if tool selection is enabled), listing only them and the pinned tools in the system prompt.
+
+        Args:
+            query (str): Request of the user.
+        """
+        if self.tool_selection_top_k is None:
+            return
+        found = self._get_tool_index().search(query, self.tool_selection_top_k)
+        self._selected_tools = {tool.name for tool in found}
+        self._update_system_prompt()
+
+    def _update_system_prompt(self, tools_changed: bool = True) -> None:
+        if tools_changed:
+            self._tool_schemas = None
+            self._tools_section = None
+        for index, message in enumerate(self._chat_history.messages):
+            if message.role == "system":
+                # replaced rather than mutated, since forked histories share their messages
+                system_message = self._get_system_message()
+                if message is not system_message:
+                    self._chat_history.messages[index] = system_message
+                break
+
+    def _get_system_message(self) -> ChatMessage:
+        # the same message is used by all the histories, as long as the system prompt does not change
+        content = self._render_system_prompt()
+        if self._system_message is None or self._system_message.content != content:
+            self._system_message = ChatMessage(role="system", content=content)
+        return self._system_message
+
+    def set_task(self, agent_task: str | None) -> None:
+        """
+        Change the task of the agent (e.g. after `agent_config.yaml` changed), updating the system prompt.
+
+        Args:
+            agent_task (str | None): New task. None restores the default task.
+        """
+        task = agent_task or DEFAULT_TASK
+        if task == self._task:
+            return
+        self._task = task
+        self._update_system_prompt(tools_changed=False)
+
+    def load_instructions(self, cwd: str | None = None) -> None:
+        """
+        Use the AGENTS.md of a working directory as additional instructions, updating the system prompt if they changed. Files are cached, and only read again when they change.
+
+        Args:
+            cwd (str | None): Working directory (e.g. the one of the current session). Defaults to the working directory of the process.
+        """
+        instructions = self._agents_md.instructions(cwd)
+        if instructions == self._additional_instructions:
+            return
+        self._additional_instructions = instructions
+        self._update_system_prompt(tools_changed=False)
+
+    def system_prompt_size(self) -> SystemPromptSize:
+        """
+        Measure the system prompt with the full and the compact rendering of the tools, to assess how much the compact rendering saves on every request.
+
+        Returns:
+            SystemPromptSize: Size of the system prompt, in characters, with each rendering.
+        """
+        return SystemPromptSize(
+            full=len(self._render_system_prompt(compact=False)),
+            compact=len(self._render_system_prompt(compact=True)),
+        )
+
+    def use_history(self, chat_history: ChatHistory) -> None:
+        """
+        Continue the conversation from a chat history (e.g. the one of the current session), whose first message is the system prompt: it is rendered again, as tools and instructions might have changed.
+
+        Args:
+            chat_history (ChatHistory): Chat history, starting with a system message.
+        """
+        self._chat_history = chat_history
+        self._update_system_prompt(tools_changed=False)
+
+    def for_session(
+        self,
+        chat_history: ChatHistory,
+        session_tools: list[Tool] | None = None,
+        cwd: str | None = None,
+    ) -> "LLMWrapper":
+        """
+        Create a view of the wrapper for a session: it shares the LLM client, the tools and the task, but has its own chat history, session tools, AGENTS.md instructions and selected tools, so that prompts of different sessions can run concurrently.
+
+        Tools added to the wrapper afterwards (e.g. by MCP servers that became reachable) are listed in the system prompt of the views created from then on.
+
+        Args:
+            chat_history (ChatHistory): Chat history of the session, starting with a system message.
+            session_tools (list[Tool] | None): Tools of the MCP servers declared by the ACP client for the session.
+            cwd (str | None): Working directory of the session, whose AGENTS.md is used as additional instructions.
+        Returns:
+            LLMWrapper: View of the wrapper for the session.
+        """
+        view = copy.copy(self)
+        view._chat_history = chat_history
+        view._selected_tools = None
+        if self._find_tools is not None:
+            view._find_tools = view._find_tools_tool()
+        view.set_session_tools(session_tools or [])
+        view.load_instructions(cwd)
+        # rendered again, as tools and instructions might have changed since the last prompt
+        view._update_system_prompt(tools_changed=False)
+        return view
 
     def add_user_message(self, content: str) -> None:
         """
@@ -100,6 +400,59 @@ class LLMWrapper:
         )
         return response
 
+    def get_tool_schemas(self) -> list[ToolSchema]:
+        """
+        Get the schemas of the available tools (plus the stop tool), as declared to the native function-calling API of the provider.
+
+        Returns:
+            list[ToolSchema]: Tool schemas.
+        """
+        if self._tool_schemas is None:
+            self._tool_schemas = [
+                ToolSchema(
+                    name=tool.name,
+                    description=tool.description,
+                    parameters=tool.input_schema() or EMPTY_PARAMETERS,
+                )
+                for tool in self._visible_tools()
+            ] + [STOP_TOOL]
+        return self._tool_schemas
+
+    async def generate_action(self) -> Action | None:
+        """
+        Generate the next action, based on previous chat history, either as a structured response or (if native tool calling is enabled) through the function-calling API of the provider.
+
+        Returns:
+            Action | None: the action if the generation was successful, None otherwise.
+        Raises:
+            ValueError: If the arguments of the tool call are not valid JSON, or are not valid arguments for the stop tool.
+        """
+        if not self.native_tool_calling:
+            return await self.generate(schema=Action)
+        tool_call = await self._client.generate_tool_call(
+            tools=self.get_tool_schemas(), chat_history=self._chat_history
+        )
+        if tool_call is None:
+            return None
+        if "raw_arguments" in tool_call:
+            raise ValueError(
+                f"the arguments of {tool_call['name']} are not valid JSON: {tool_call['raw_arguments']}"
+            )
+        if tool_call["name"] == STOP_TOOL_NAME:
+            return Action(
+                action_type="stop",
+                tool_call=None,
+                stop=Stop.model_validate(tool_call["arguments"]),
+            )
+        return Action(
+            action_type="tool_call",
+            tool_call=ToolCall(
+                tool_name=tool_call["name"],
+                tool_input=json.dumps(tool_call["arguments"]),
+            ),
+            stop=None,
+        )
+
     def get_tool(self, tool_name: str) -> Tool:
         """
         Get a tool definition by its name.
@@ -108,8 +461,13 @@ class LLMWrapper:
             tool_name (str): Name of the tool.
 
         Returns:
-            Tool: tool definition (if the tool is available).
+            Tool: tool definition.
+        Raises:
+            ValueError: If no tool has that name.
         """
-        tools = [tool for tool in self.tools if tool.name == tool_name]
-        assert len(tools) == 1
-        return tools[0]
+        if tool_name == FIND_TOOLS_TOOL_NAME and self._find_tools is not None:
+            return self._find_tools
+        tool = self._registry.get(tool_name) or self._session_registry.get(tool_name)
+        if tool is None:
+            raise ValueError(f"Tool {tool_name} is not available")
+        return tool
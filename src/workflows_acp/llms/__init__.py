@@ -1,7 +1,7 @@
 from .anthropic_llm import AnthropicLLM
 from .google_llm import GoogleLLM
 from .openai_llm import OpenAILLM
-from .models import ChatHistory, ChatMessage
+from .models import ChatHistory, ChatMessage, MessageLog
 
 __all__ = [
     "AnthropicLLM",
@@ -9,4 +9,5 @@ __all__ = [
     "OpenAILLM",
     "ChatHistory",
     "ChatMessage",
+    "MessageLog",
 ]
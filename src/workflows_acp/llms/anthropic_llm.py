@@ -1,8 +1,10 @@
 from anthropic import AsyncAnthropic
 from anthropic.types.beta.beta_message_param import BetaMessageParam
-from typing import Type
+from anthropic.types.beta.beta_tool_param import BetaToolParam
+from anthropic.types.beta.beta_tool_choice_any_param import BetaToolChoiceAnyParam
+from typing import Any, Type, cast
 
-from .models import ChatHistory, ChatMessage, BaseLLM
+from .models import ChatHistory, ChatMessage, BaseLLM, NativeToolCall, ToolSchema
 from .retry import retry
 from ..models import StructuredSchemaT
 from ..constants import DEFAULT_ANTHROPIC_MODEL
@@ -13,10 +15,9 @@ class AnthropicLLM(BaseLLM):
         super().__init__(api_key, model or DEFAULT_ANTHROPIC_MODEL)
         self._client = AsyncAnthropic(api_key=self.api_key)
 
-    @retry()
-    async def generate_content(
-        self, schema: Type[StructuredSchemaT], chat_history: ChatHistory
-    ) -> StructuredSchemaT | None:
+    def _to_messages(
+        self, chat_history: ChatHistory
+    ) -> tuple[str, list[BetaMessageParam]]:
         system, messages = chat_history.to_anthropic_message_history()
         if messages[-1]["role"] == "assistant":
             # only happens when the LLM is prompted to take an action after thinking
@@ -26,6 +27,13 @@ class AnthropicLLM(BaseLLM):
                     role="user",
                 )
             )
+        return system, messages
+
+    @retry()
+    async def generate_content(
+        self, schema: Type[StructuredSchemaT], chat_history: ChatHistory
+    ) -> StructuredSchemaT | None:
+        system, messages = self._to_messages(chat_history)
         response = await self._client.beta.messages.parse(
             max_tokens=8192,
             output_format=schema,
@@ -42,3 +50,34 @@ class AnthropicLLM(BaseLLM):
             )
         )
         return response.parsed_output
+
+    @retry()
+    async def generate_tool_call(
+        self, tools: list[ToolSchema], chat_history: ChatHistory
+    ) -> NativeToolCall | None:
+        system, messages = self._to_messages(chat_history)
+        response = await self._client.beta.messages.create(
+            max_tokens=8192,
+            model=self.model,
+            system=system,
+            messages=messages,
+            tools=[
+                BetaToolParam(
+                    name=tool["name"],
+                    description=tool["description"],
+                    input_schema=tool["parameters"],
+                )
+                for tool in tools
+            ],
+            tool_choice=BetaToolChoiceAnyParam(
+                type="any", disable_parallel_tool_use=True
+            ),
+        )
+        for block in response.content:
+            if block.type == "tool_use":
+                tool_call = NativeToolCall(
+                    name=block.name, arguments=cast(dict[str, Any], block.input)
+                )
+                chat_history.append(ChatMessage.from_tool_call(tool_call))
+                return tool_call
+        return None
@@ -1,9 +1,17 @@
 from typing import Type
 from google.genai import Client as GenAIClient
-from google.genai.types import GenerateContentConfig
+from google.genai.types import (
+    AutomaticFunctionCallingConfig,
+    FunctionCallingConfig,
+    FunctionCallingConfigMode,
+    FunctionDeclaration,
+    GenerateContentConfig,
+    Tool as GoogleTool,
+    ToolConfig,
+)
 
 from .retry import retry
-from .models import ChatHistory, ChatMessage, BaseLLM
+from .models import ChatHistory, ChatMessage, BaseLLM, NativeToolCall, ToolSchema
 from ..models import StructuredSchemaT
 from ..constants import DEFAULT_GOOGLE_MODEL
 
@@ -35,3 +43,43 @@ class GoogleLLM(BaseLLM):
             if response.text is not None:
                 return schema.model_validate_json(response.text)
         return None
+
+    @retry()
+    async def generate_tool_call(
+        self, tools: list[ToolSchema], chat_history: ChatHistory
+    ) -> NativeToolCall | None:
+        system_prompt, messages = chat_history.to_google_message_history()
+        response = await self._client.aio.models.generate_content(
+            model=self.model,
+            contents=messages,
+            config=GenerateContentConfig(
+                system_instruction=system_prompt,
+                tools=[
+                    GoogleTool(
+                        function_declarations=[
+                            FunctionDeclaration(
+                                name=tool["name"],
+                                description=tool["description"],
+                                parameters_json_schema=tool["parameters"],
+                            )
+                            for tool in tools
+                        ]
+                    )
+                ],
+                tool_config=ToolConfig(
+                    function_calling_config=FunctionCallingConfig(
+                        mode=FunctionCallingConfigMode.ANY
+                    )
+                ),
+                automatic_function_calling=AutomaticFunctionCallingConfig(disable=True),
+            ),
+        )
+        function_calls = response.function_calls
+        if not function_calls or function_calls[0].name is None:
+            return None
+        # the workflow executes one tool call per action
+        tool_call = NativeToolCall(
+            name=function_calls[0].name, arguments=function_calls[0].args or {}
+        )
+        chat_history.append(ChatMessage.from_tool_call(tool_call))
+        return tool_call
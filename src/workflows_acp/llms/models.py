@@ -1,22 +1,76 @@
-from dataclasses import dataclass
+import json
+import sys
+
+from dataclasses import dataclass, field
 from abc import abstractmethod, ABC
-from typing import Literal, TypedDict, Any, Type, cast
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Type,
+    TypedDict,
+    cast,
+    overload,
+)
+from typing_extensions import NotRequired
 from google.genai.types import Content, Part
 from openai.types.responses.easy_input_message_param import EasyInputMessageParam
 from anthropic.types.beta.beta_message_param import BetaMessageParam
 from ..models import StructuredSchemaT
 
 
+class ToolSchema(TypedDict):
+    """Represents a tool as declared to the native function-calling API of a provider"""
+
+    name: str
+    description: str
+    parameters: dict[str, Any]
+
+
+class NativeToolCall(TypedDict):
+    """Represents a tool call produced through the native function-calling API of a provider"""
+
+    name: str
+    arguments: dict[str, Any]
+    # arguments as generated, when they could not be parsed (`arguments` is then empty)
+    raw_arguments: NotRequired[str]
+
+
 class OpenAIMessage(TypedDict):
     role: Literal["user", "assistant", "system"]
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     role: Literal["user", "assistant", "system"]
     content: str
 
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the message, in bytes (the role strings are shared by all messages)"""
+        return sys.getsizeof(self) + sys.getsizeof(self.content)
+
+    @classmethod
+    def from_tool_call(cls, tool_call: NativeToolCall) -> "ChatMessage":
+        return cls(
+            role="assistant",
+            content=json.dumps(
+                {
+                    "tool_call": {
+                        "tool_name": tool_call["name"],
+                        "tool_input": tool_call.get(
+                            "raw_arguments", tool_call["arguments"]
+                        ),
+                    }
+                },
+                separators=(",", ":"),
+                default=str,
+            ),
+        )
+
     def to_google_message(self) -> Content | Part:
         if self.role != "system":
             role = self.role if self.role == "user" else "model"
@@ -35,12 +89,241 @@ class ChatMessage:
         return self.content
 
 
+def _message_nbytes(message: ChatMessage) -> int:
+    return 0 if message.role == "system" else message.nbytes
+
+
+class MessageLog:
+    """
+    Persistent list of chat messages, forked in constant time: a fork shares the messages of its parent up to the fork point (structural sharing) and stores only the ones appended or replaced afterwards, so the parent and the fork diverge from there without copying anything.
+
+    Positions visible to a fork are never written in place: replacing one (e.g. the system message) is recorded as an override of the node doing the replacement.
+
+    The memory used by the messages is tracked as they are added, so that it can be read in constant time (see `nbytes`).
+    """
+
+    __slots__ = (
+        "_parent",
+        "_parent_len",
+        "_own",
+        "_overrides",
+        "_frozen_len",
+        "_nbytes",
+    )
+
+    def __init__(self, messages: Iterable[ChatMessage] = ()) -> None:
+        """
+        Initialize the log.
+
+        Args:
+            messages (Iterable[ChatMessage]): Initial messages.
+        """
+        self._parent: MessageLog | None = None
+        # number of messages of the parent that are shared
+        self._parent_len = 0
+        self._own: list[ChatMessage] = list(messages)
+        self._overrides: dict[int, ChatMessage] = {}
+        # number of messages shared with forks, which cannot be written in place
+        self._frozen_len = 0
+        self._nbytes = sum(_message_nbytes(message) for message in self._own)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the messages this log owns, in bytes: the ones shared with the log it was forked from are not counted (see `total_nbytes`), and neither are system messages, since the same one is shared by all the sessions.
+        """
+        return self._nbytes
+
+    def chain(self) -> Iterator["MessageLog"]:
+        """
+        Iterate over this log and the logs it was forked from, up to the first one.
+
+        Returns:
+            Iterator[MessageLog]: Logs whose messages are (partly) shared by this one.
+        """
+        node: MessageLog | None = self
+        while node is not None:
+            yield node
+            node = node._parent
+
+    def __len__(self) -> int:
+        return self._parent_len + len(self._own)
+
+    def _base(self, index: int) -> ChatMessage:
+        # message at a position, without the overrides of this node
+        node = self
+        while index < node._parent_len:
+            node = cast(MessageLog, node._parent)
+        return node._own[index - node._parent_len]
+
+    def _normalize(self, index: int) -> int:
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("message index out of range")
+        return index
+
+    @overload
+    def __getitem__(self, index: int) -> ChatMessage: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[ChatMessage]: ...
+
+    def __getitem__(self, index: int | slice) -> ChatMessage | list[ChatMessage]:
+        if isinstance(index, slice):
+            return list(self)[index]
+        index = self._normalize(index)
+        override = self._overrides.get(index)
+        return override if override is not None else self._base(index)
+
+    def __setitem__(self, index: int, message: ChatMessage) -> None:
+        index = self._normalize(index)
+        self._nbytes += _message_nbytes(message)
+        if index >= self._parent_len:
+            # the replaced message was owned by this log (shared ones are still used by the parent)
+            self._nbytes -= _message_nbytes(self[index])
+        if index < max(self._parent_len, self._frozen_len):
+            self._overrides[index] = message
+        else:
+            self._own[index - self._parent_len] = message
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        # the chain of nodes, from the root, with the number of messages each contributes
+        chain: list[tuple[MessageLog, int]] = []
+        node, end = self, len(self)
+        while True:
+            chain.append((node, end - node._parent_len))
+            if node._parent is None:
+                break
+            node, end = node._parent, node._parent_len
+        index = 0
+        for node, count in reversed(chain):
+            for message in node._own[:count] if count < len(node._own) else node._own:
+                override = self._overrides.get(index)
+                yield override if override is not None else message
+                index += 1
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (MessageLog, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r})"
+
+    def append(self, message: ChatMessage) -> None:
+        self._own.append(message)
+        self._nbytes += _message_nbytes(message)
+
+    def fork(self) -> "MessageLog":
+        """
+        Fork the log, in constant time (apart from copying the few overrides).
+
+        Returns:
+            MessageLog: New log sharing all the current messages.
+        """
+        self._frozen_len = len(self)
+        fork = MessageLog()
+        fork._parent = self
+        fork._parent_len = len(self)
+        fork._overrides = dict(self._overrides)
+        return fork
+
+
+def total_nbytes(logs: Iterable[MessageLog]) -> int:
+    """
+    Approximate memory used by a set of logs, counting the messages they share (through forks) once.
+
+    Args:
+        logs (Iterable[MessageLog]): Message logs.
+    Returns:
+        int: Memory in bytes.
+    """
+    seen: set[int] = set()
+    total = 0
+    for log in logs:
+        for node in log.chain():
+            if id(node) in seen:
+                # and so are the logs it was forked from
+                break
+            seen.add(id(node))
+            total += node.nbytes
+    return total
+
+
+class LogsMemory:
+    """
+    Memory used by a set of logs, counting the messages they share once (see `total_nbytes`), kept up to date as logs are removed from the set: removing a log only walks its own chain of forks.
+    """
+
+    def __init__(self, logs: Iterable[MessageLog]) -> None:
+        """
+        Measure a set of logs.
+
+        Args:
+            logs (Iterable[MessageLog]): Message logs.
+        """
+        # number of logs of the set whose chain goes through each node
+        self._users: dict[int, int] = {}
+        self.nbytes = 0
+        for log in logs:
+            for node in log.chain():
+                users = self._users.get(id(node), 0)
+                if users == 0:
+                    self.nbytes += node.nbytes
+                self._users[id(node)] = users + 1
+
+    def remove(self, log: MessageLog) -> int:
+        """
+        Remove a log of the set.
+
+        Args:
+            log (MessageLog): Log to remove, which must be in the set.
+        Returns:
+            int: Memory freed, in bytes: the one of the nodes of its chain that no other log of the set goes through.
+        """
+        freed = 0
+        for node in log.chain():
+            self._users[id(node)] -= 1
+            if self._users[id(node)] == 0:
+                del self._users[id(node)]
+                freed += node.nbytes
+        self.nbytes -= freed
+        return freed
+
+
 @dataclass
 class ChatHistory:
-    messages: list[ChatMessage]
+    # lists are converted to a `MessageLog`, so that the history can be forked
+    messages: MessageLog
+    # called with every appended message (e.g. to persist it)
+    on_append: Callable[[ChatMessage], None] | None = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.messages, MessageLog):
+            self.messages = MessageLog(self.messages)
 
     def append(self, message: ChatMessage) -> None:
         self.messages.append(message)
+        if self.on_append is not None:
+            self.on_append(message)
+
+    def fork(self) -> "ChatHistory":
+        """
+        Fork the history, sharing its messages (see `MessageLog.fork`). Since the shared prefix is unchanged, requests of the fork keep hitting the prompt cache of the provider.
+
+        Returns:
+            ChatHistory: New history, without the `on_append` callback.
+        """
+        return ChatHistory(messages=self.messages.fork())
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the messages of the history, in bytes (see `MessageLog.nbytes`)"""
+        return self.messages.nbytes
 
     def to_google_message_history(self) -> tuple[list[Part], list[Content]]:
         system_prompt: list[Part] = [
@@ -84,3 +367,10 @@ class BaseLLM(ABC):
         schema: Type[StructuredSchemaT],
         chat_history: ChatHistory,
     ) -> StructuredSchemaT | None: ...
+
+    @abstractmethod
+    async def generate_tool_call(
+        self,
+        tools: list[ToolSchema],
+        chat_history: ChatHistory,
+    ) -> NativeToolCall | None: ...
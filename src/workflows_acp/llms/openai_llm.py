@@ -1,7 +1,10 @@
+import json
+
 from openai import AsyncOpenAI
+from openai.types.responses import FunctionToolParam
 from typing import Type
 
-from .models import ChatHistory, ChatMessage, BaseLLM
+from .models import ChatHistory, ChatMessage, BaseLLM, NativeToolCall, ToolSchema
 from .retry import retry
 from ..models import StructuredSchemaT
 from ..constants import DEFAULT_OPENAI_MODEL
@@ -23,3 +26,38 @@ class OpenAILLM(BaseLLM):
         )
         chat_history.append(ChatMessage(role="assistant", content=response.output_text))
         return response.output_parsed
+
+    @retry()
+    async def generate_tool_call(
+        self, tools: list[ToolSchema], chat_history: ChatHistory
+    ) -> NativeToolCall | None:
+        response = await self._client.responses.create(
+            model=self.model,
+            input=chat_history.to_openai_message_history(),
+            tools=[
+                FunctionToolParam(
+                    type="function",
+                    name=tool["name"],
+                    description=tool["description"],
+                    parameters=tool["parameters"],
+                    strict=False,
+                )
+                for tool in tools
+            ],
+            tool_choice="required",
+            parallel_tool_calls=False,
+        )
+        for item in response.output:
+            if item.type == "function_call":
+                try:
+                    tool_call = NativeToolCall(
+                        name=item.name, arguments=json.loads(item.arguments or "{}")
+                    )
+                except json.JSONDecodeError:
+                    # e.g. truncated arguments: reported to the model, which can fix them
+                    tool_call = NativeToolCall(
+                        name=item.name, arguments={}, raw_arguments=item.arguments
+                    )
+                chat_history.append(ChatMessage.from_tool_call(tool_call))
+                return tool_call
+        return None
@@ -1,10 +1,9 @@
 import asyncio
 import logging
 from functools import wraps
-from typing import TypeVar, Callable, Awaitable, Literal, cast
-from pydantic import BaseModel
+from typing import Any, TypeVar, Callable, Awaitable, Literal, cast
 
-F = TypeVar("F", bound=Callable[..., Awaitable[BaseModel | None]])
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
 
 
 def retry(
@@ -15,7 +14,7 @@ def retry(
 ) -> Callable[[F], F]:
     def decorator(f: F) -> F:
         @wraps(f)
-        async def wrapper(*args, **kwargs) -> BaseModel | None:
+        async def wrapper(*args, **kwargs) -> Any:
             retries = 0
             exception = None
             while retries < max_retries:
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+from typing_extensions import TypedDict
+from mcp_use.client.session import Tool as McpTool
+from .constants import (
+    MCP_TOOLS_CACHE_FILE,
+    MCP_RESULT_CACHE_TTL,
+    MCP_RESULT_CACHE_MAX_ENTRIES,
+)
+
+
+class ResultCacheStats(TypedDict):
+    """
+    Represents the hit/miss metrics of the MCP result cache.
+    """
+
+    hits: int
+    misses: int
+    expirations: int
+    evictions: int
+    entries: int
+    hit_rate: float
+
+
+class ToolsCacheEntry(TypedDict):
+    """
+    Represents the cached tool catalogue of an MCP server.
+    """
+
+    tools: list[dict[str, Any]]
+    updated_at: float
+
+
+def config_hash(server_config: Any) -> str:
+    """
+    Hash the configuration of an MCP server, so that a cached catalogue is discarded as soon as the server definition changes.
+
+    Args:
+        server_config (Any): Configuration of the server, as found in `.mcp.json`.
+    Returns:
+        str: Hex digest of the configuration.
+    """
+    serialized = json.dumps(server_config, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class McpToolsCache:
+    """
+    On-disk cache of the tool catalogues of MCP servers, keyed by the hash of each server's configuration.
+    """
+
+    def __init__(self, path: str | Path = MCP_TOOLS_CACHE_FILE) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            path (str | Path): JSON file where the catalogues are stored.
+        """
+        self.path = Path(path)
+        self._entries: dict[str, ToolsCacheEntry] | None = None
+
+    def _load(self) -> dict[str, ToolsCacheEntry]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                self._entries = data if isinstance(data, dict) else {}
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._load(), f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not save the MCP tools cache to {self.path}: {e}")
+
+    def get(self, server_config: Any) -> list[McpTool] | None:
+        """
+        Get the cached tool catalogue of a server.
+
+        Args:
+            server_config (Any): Configuration of the server.
+        Returns:
+            list[McpTool] | None: Cached tools, or None if the server has no (valid) cached catalogue.
+        """
+        entry = self._load().get(config_hash(server_config))
+        if entry is None:
+            return None
+        try:
+            return [McpTool.model_validate(tool) for tool in entry["tools"]]
+        except (KeyError, ValueError):
+            return None
+
+    def put(self, server_config: Any, tools: list[McpTool]) -> bool:
+        """
+        Store the tool catalogue of a server.
+
+        Args:
+            server_config (Any): Configuration of the server.
+            tools (list[McpTool]): Tools listed by the server.
+        Returns:
+            bool: True if the catalogue changed.
+        """
+        key = config_hash(server_config)
+        dumped = [tool.model_dump(mode="json", exclude_none=True) for tool in tools]
+        entries = self._load()
+        changed = key not in entries or entries[key]["tools"] != dumped
+        entries[key] = ToolsCacheEntry(tools=dumped, updated_at=time.time())
+        self._save()
+        return changed
+
+    def invalidate(self, server_config: Any) -> None:
+        """
+        Remove the cached tool catalogue of a server.
+
+        Args:
+            server_config (Any): Configuration of the server.
+        """
+        if self._load().pop(config_hash(server_config), None) is not None:
+            self._save()
+
+
+class McpResultCache:
+    """
+    In-memory cache of the results of read-only MCP tool calls, keyed by server, tool and canonicalized arguments, with a TTL and LRU eviction.
+    """
+
+    def __init__(
+        self,
+        ttl: float = MCP_RESULT_CACHE_TTL,
+        max_entries: int = MCP_RESULT_CACHE_MAX_ENTRIES,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (float): Seconds after which a cached result expires.
+            max_entries (int): Maximum number of cached results, after which the least recently used ones are evicted.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _key(server: str, tool_name: str, arguments: dict[str, Any]) -> str:
+        canonical = json.dumps(
+            arguments, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return f"{server}\x00{tool_name}\x00{canonical}"
+
+    def get(
+        self, server: str, tool_name: str, arguments: dict[str, Any]
+    ) -> tuple[bool, Any]:
+        """
+        Get the cached result of a tool call.
+
+        Args:
+            server (str): Name of the server.
+            tool_name (str): Name of the tool (as known by the server).
+            arguments (dict[str, Any]): Arguments of the call.
+        Returns:
+            tuple[bool, Any]: Whether the result was cached (and not expired), and the result.
+        """
+        key = self._key(server, tool_name, arguments)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            self._expirations += 1
+            entry = None
+        if entry is None:
+            self._misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return True, entry[1]
+
+    def put(
+        self, server: str, tool_name: str, arguments: dict[str, Any], result: Any
+    ) -> None:
+        """
+        Cache the result of a tool call.
+
+        Args:
+            server (str): Name of the server.
+            tool_name (str): Name of the tool (as known by the server).
+            arguments (dict[str, Any]): Arguments of the call.
+            result (Any): Result of the call.
+        """
+        key = self._key(server, tool_name, arguments)
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        """
+        Remove all the cached results.
+        """
+        self._entries.clear()
+
+    def stats(self) -> ResultCacheStats:
+        """
+        Report the hit/miss metrics of the cache.
+
+        Returns:
+            ResultCacheStats: Cache metrics.
+        """
+        lookups = self._hits + self._misses
+        return ResultCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            expirations=self._expirations,
+            evictions=self._evictions,
+            entries=len(self._entries),
+            hit_rate=self._hits / lookups if lookups > 0 else 0.0,
+        )
@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import time
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable
+from mcp.types import ServerNotification, ToolListChangedNotification
+from mcp_use.client import MCPClient
+from mcp_use.client.session import MCPSession
+from .constants import (
+    MCP_CONNECT_TIMEOUT,
+    MCP_MAX_IN_FLIGHT_CALLS,
+    MCP_MAX_QUEUED_CALLS,
+    MCP_PING_INTERVAL,
+    MCP_PING_TIMEOUT,
+    MCP_RECONNECT_ATTEMPTS,
+    MCP_RECONNECT_DELAY,
+)
+
+
+async def _ping(session: MCPSession, timeout: float) -> bool:
+    """
+    Check whether an MCP session is alive, sending it a ping.
+
+    Args:
+        session (MCPSession): Session to check.
+        timeout (float): Seconds to wait for the server to answer.
+    Returns:
+        bool: True if the server answered.
+    """
+    if not session.is_connected:
+        return False
+    client_session = session.connector.client_session
+    if client_session is None:
+        return False
+    try:
+        await asyncio.wait_for(client_session.send_ping(), timeout=timeout)
+    except Exception:
+        return False
+    return True
+
+
+class McpQueueFullError(Exception):
+    """
+    Raised when a call to an MCP server is rejected because too many calls are already waiting for that server.
+    """
+
+
+class McpSessionPool:
+    """
+    Keeps one warm session per MCP server, shared by all the calls to that server (MCP multiplexes concurrent requests over a single connection).
+
+    Dead sessions are detected with periodic pings and reconnected with exponential backoff, and the number of in-flight calls per server is limited, as is the number of calls waiting for a free slot. Servers with an idle timeout are disconnected (and, for stdio servers, their process is stopped) when no call used them for that long, and only restarted on their next call.
+    """
+
+    def __init__(
+        self,
+        client: MCPClient,
+        connect_timeout: float = MCP_CONNECT_TIMEOUT,
+        max_in_flight: int = MCP_MAX_IN_FLIGHT_CALLS,
+        max_queued: int = MCP_MAX_QUEUED_CALLS,
+        ping_interval: float = MCP_PING_INTERVAL,
+        ping_timeout: float = MCP_PING_TIMEOUT,
+        reconnect_attempts: int = MCP_RECONNECT_ATTEMPTS,
+        reconnect_delay: float = MCP_RECONNECT_DELAY,
+        on_tools_changed: Callable[[str], Awaitable[None]] | None = None,
+    ) -> None:
+        """
+        Initialize the pool.
+
+        Args:
+            client (MCPClient): Client used to create the sessions.
+            connect_timeout (float): Seconds allowed to start and initialize a session.
+            max_in_flight (int): Maximum number of concurrent calls per server.
+            max_queued (int): Maximum number of calls per server waiting for a free slot, after which new calls are rejected.
+            ping_interval (float): Seconds between two health checks.
+            ping_timeout (float): Seconds to wait for a server to answer a ping.
+            reconnect_attempts (int): Number of connection attempts before giving up.
+            reconnect_delay (float): Seconds before the first reconnection attempt (doubled after each failure).
+            on_tools_changed (Callable[[str], Awaitable[None]] | None): Called with the name of a server when it notifies that its tools changed.
+        """
+        self._client = client
+        self.connect_timeout = connect_timeout
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        # per-server overrides of max_in_flight and max_queued
+        self.server_max_in_flight: dict[str, int] = {}
+        self.server_max_queued: dict[str, int] = {}
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+        self._sessions: dict[str, MCPSession] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._health_task: asyncio.Task | None = None
+        self._idle_task: asyncio.Task | None = None
+        self.idle_timeouts: dict[str, float] = {}
+        self._last_used: dict[str, float] = {}
+        self._in_flight: dict[str, int] = {}
+        self._queued: dict[str, int] = {}
+        self.on_tools_changed = on_tools_changed
+        self._notification_tasks: set[asyncio.Task] = set()
+
+    def __contains__(self, server: str) -> bool:
+        return server in self._sessions
+
+    def _lock(self, server: str) -> asyncio.Lock:
+        if server not in self._locks:
+            self._locks[server] = asyncio.Lock()
+        return self._locks[server]
+
+    def _semaphore(self, server: str) -> asyncio.Semaphore:
+        if server not in self._semaphores:
+            self._semaphores[server] = asyncio.Semaphore(
+                self.server_max_in_flight.get(server, self.max_in_flight)
+            )
+        return self._semaphores[server]
+
+    async def _disconnect(self, server: str) -> None:
+        session = self._sessions.pop(server, None)
+        if session is None:
+            return
+        try:
+            await session.disconnect()
+        except Exception as e:
+            logging.warning(f"Error while disconnecting from MCP server {server}: {e}")
+
+    def _message_handler(self, server: str) -> Callable[[Any], Awaitable[None]]:
+        async def _handle(message: Any) -> None:
+            if (
+                self.on_tools_changed is not None
+                and isinstance(message, ServerNotification)
+                and isinstance(message.root, ToolListChangedNotification)
+            ):
+                # handled in a separate task: the session cannot receive the answers to new requests until this handler returns
+                task = asyncio.create_task(self.on_tools_changed(server))
+                self._notification_tasks.add(task)
+                task.add_done_callback(self._notification_tasks.discard)
+
+        return _handle
+
+    async def _connect(self, server: str, connect_timeout: float) -> MCPSession:
+        session: MCPSession = await asyncio.wait_for(
+            self._client.create_session(server_name=server), timeout=connect_timeout
+        )
+        session.connector.message_handler = self._message_handler(server)
+        if not session.is_connected:
+            await asyncio.wait_for(session.connect(), timeout=connect_timeout)
+        return session
+
+    async def acquire(
+        self,
+        server: str,
+        connect_timeout: float | None = None,
+        attempts: int | None = None,
+    ) -> MCPSession:
+        """
+        Get the warm session of a server, (re)connecting to it if it is missing or dead.
+
+        Args:
+            server (str): Name of the server.
+            connect_timeout (float | None): Seconds allowed to each connection attempt (defaults to the pool's).
+            attempts (int | None): Number of connection attempts, with exponential backoff (defaults to the pool's).
+        Returns:
+            MCPSession: A connected session.
+        Raises:
+            Exception: The error of the last connection attempt, if all of them failed.
+        """
+        self._ensure_background_tasks()
+        self._last_used[server] = time.monotonic()
+        async with self._lock(server):
+            session = self._sessions.get(server)
+            if session is not None and session.is_connected:
+                return session
+            await self._disconnect(server)
+            attempts = attempts or self.reconnect_attempts
+            delay = self.reconnect_delay
+            for attempt in range(attempts):
+                try:
+                    session = await self._connect(
+                        server, connect_timeout or self.connect_timeout
+                    )
+                except Exception as e:
+                    if attempt == attempts - 1:
+                        raise
+                    logging.warning(
+                        f"Connection to MCP server {server} failed ({e}), retrying in {delay}s"
+                    )
+                    await asyncio.sleep(delay)
+                    delay *= 2
+                else:
+                    self._sessions[server] = session
+                    return session
+        raise RuntimeError(f"Could not connect to MCP server {server}")
+
+    @asynccontextmanager
+    async def session(self, server: str) -> AsyncIterator[MCPSession]:
+        """
+        Borrow the session of a server for a call, waiting if the server already has the maximum number of calls in flight.
+
+        Args:
+            server (str): Name of the server.
+        Returns:
+            AsyncIterator[MCPSession]: Context manager yielding a connected session.
+        Raises:
+            McpQueueFullError: If the server already has the maximum number of calls waiting.
+        """
+        semaphore = self._semaphore(server)
+        if semaphore.locked():
+            max_queued = self.server_max_queued.get(server, self.max_queued)
+            if self._queued.get(server, 0) >= max_queued:
+                raise McpQueueFullError(
+                    f"MCP server {server} already has {max_queued} calls waiting"
+                )
+        self._queued[server] = self._queued.get(server, 0) + 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued[server] -= 1
+        self._in_flight[server] = self._in_flight.get(server, 0) + 1
+        try:
+            yield await self.acquire(server)
+        finally:
+            self._in_flight[server] -= 1
+            self._last_used[server] = time.monotonic()
+            semaphore.release()
+
+    async def invalidate(self, server: str) -> None:
+        """
+        Drop the session of a server, so that the next call reconnects.
+
+        Args:
+            server (str): Name of the server.
+        """
+        async with self._lock(server):
+            await self._disconnect(server)
+
+    async def check_health(self) -> list[str]:
+        """
+        Ping all the warm sessions, reconnecting the ones that do not answer. Servers with a call in flight are skipped: a slow call can delay the ping past its timeout.
+
+        Returns:
+            list[str]: Names of the servers whose session was dead.
+        """
+        dead: list[str] = []
+        for server, session in list(self._sessions.items()):
+            if self._lock(server).locked() or self._in_flight.get(server, 0) > 0:
+                continue
+            if not await _ping(session, self.ping_timeout):
+                dead.append(server)
+        for server in dead:
+            logging.warning(f"MCP server {server} is not responding, reconnecting")
+            await self.invalidate(server)
+            if server in self.idle_timeouts:
+                # lazily started servers are only restarted on their next call
+                continue
+            try:
+                await self.acquire(server)
+            except Exception as e:
+                logging.error(f"Could not reconnect to MCP server {server}: {e}")
+        return dead
+
+    async def close_idle(self) -> list[str]:
+        """
+        Disconnect from the servers with an idle timeout that have no call in flight and were not used within their timeout.
+
+        Returns:
+            list[str]: Names of the servers that were disconnected.
+        """
+        now = time.monotonic()
+        idle: list[str] = []
+        for server, timeout in self.idle_timeouts.items():
+            if (
+                server in self._sessions
+                and self._in_flight.get(server, 0) == 0
+                and now - self._last_used.get(server, now) >= timeout
+            ):
+                logging.info(f"Shutting down idle MCP server {server}")
+                await self.invalidate(server)
+                idle.append(server)
+        return idle
+
+    def _ensure_background_tasks(self) -> None:
+        if self._health_task is None and self.ping_interval > 0:
+
+            async def _health_loop() -> None:
+                while True:
+                    await asyncio.sleep(self.ping_interval)
+                    try:
+                        await self.check_health()
+                    except Exception as e:
+                        logging.error(f"MCP health check failed: {e}")
+
+            self._health_task = asyncio.create_task(_health_loop())
+        if self._idle_task is None and len(self.idle_timeouts) > 0:
+
+            async def _idle_loop() -> None:
+                while True:
+                    await asyncio.sleep(min(self.idle_timeouts.values()) / 2)
+                    try:
+                        await self.close_idle()
+                    except Exception as e:
+                        logging.error(f"Shutdown of idle MCP servers failed: {e}")
+
+            self._idle_task = asyncio.create_task(_idle_loop())
+
+    async def close(self) -> None:
+        """
+        Stop the health checks, the idle shutdowns and the handling of notifications, and disconnect from all the servers.
+        """
+        for task in (self._health_task, self._idle_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._health_task = None
+        self._idle_task = None
+        for task in list(self._notification_tasks):
+            task.cancel()
+        for server in list(self._sessions):
+            await self.invalidate(server)
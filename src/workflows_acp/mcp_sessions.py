@@ -0,0 +1,216 @@
+import asyncio
+import logging
+
+from typing import cast
+from typing_extensions import TypedDict
+from acp.schema import HttpMcpServer as AcpHttpMcpServer, McpServerStdio, SseMcpServer
+from .models import Tool
+from .mcp_cache import config_hash
+from .constants import MCP_DISCOVERY_RETRY_DELAY
+from .mcp_wrapper import (
+    McpWrapper,
+    McpServer,
+    McpServersConfig,
+    StdioMcpServer,
+    HttpMcpServer,
+)
+
+
+class SharedMcpServer(TypedDict):
+    """
+    Represents an MCP server shared by all the ACP sessions that declared it with the same name and definition.
+    """
+
+    name: str
+    wrapper: McpWrapper
+    tools: list[Tool]
+    refs: int
+
+
+def acp_server_to_config(
+    server: AcpHttpMcpServer | SseMcpServer | McpServerStdio,
+) -> McpServer:
+    """
+    Convert an MCP server declared by an ACP client into the format of `.mcp.json`.
+
+    Args:
+        server (AcpHttpMcpServer | SseMcpServer | McpServerStdio): Server declared by the client.
+    Returns:
+        McpServer: Server configuration (HTTP and SSE servers are both served by the HTTP connector, which falls back to SSE).
+    """
+    if isinstance(server, McpServerStdio):
+        return StdioMcpServer(
+            command=server.command,
+            args=server.args,
+            env={variable.name: variable.value for variable in server.env},
+        )
+    return HttpMcpServer(
+        url=server.url,
+        headers={header.name: header.value for header in server.headers},
+    )
+
+
+class SharedMcpServers:
+    """
+    MCP servers declared by ACP clients for their sessions. Sessions declaring the same server (same name and definition) share one wrapper (and thus one session pool and, for stdio servers, one process), which is closed when no session uses it anymore.
+    """
+
+    def __init__(self, retry_delay: float = MCP_DISCOVERY_RETRY_DELAY) -> None:
+        """
+        Initialize the shared servers.
+
+        Args:
+            retry_delay (float): Seconds before the first retry of a server that could not be reached.
+        """
+        self.retry_delay = retry_delay
+        self._servers: dict[str, SharedMcpServer] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._servers
+
+    def __getitem__(self, key: str) -> SharedMcpServer:
+        return self._servers[key]
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    async def acquire(self, name: str, server_config: McpServer) -> str:
+        """
+        Get a reference to the shared wrapper of a server, starting it and listing its tools if no session uses it yet. If the server cannot be reached, it is shared without tools and retried in the background.
+
+        The name is part of the sharing key, since the names of the tools (and the routing of their calls) depend on it: the same definition declared under another name is started separately.
+
+        Args:
+            name (str): Name of the server, as declared by the client.
+            server_config (McpServer): Configuration of the server.
+        Returns:
+            str: Key of the shared server, to pass to `release`.
+        """
+        key = config_hash({name: server_config})
+        async with self._lock(key):
+            shared = self._servers.get(key)
+            if shared is None:
+                wrapper = McpWrapper.from_config_dict(
+                    cast(McpServersConfig, {"mcpServers": {name: server_config}})
+                )
+                shared = SharedMcpServer(
+                    name=name, wrapper=wrapper, tools=await wrapper.all_tools(), refs=0
+                )
+
+                def _on_tools_changed(server: str, tools: list[Tool]) -> None:
+                    shared["tools"] = tools
+
+                def _on_recovered(tools: list[Tool]) -> None:
+                    shared["tools"] = tools
+
+                wrapper.add_tools_listener(_on_tools_changed)
+                # a server that could not be reached is retried in the background (until it is closed)
+                wrapper.retry_failed_servers(
+                    on_recovered=_on_recovered, delay=self.retry_delay
+                )
+                self._servers[key] = shared
+            shared["refs"] += 1
+        return key
+
+    def retain(self, key: str) -> bool:
+        """
+        Add a reference to a server that is already shared (e.g. when a session inherits the servers of the session it was forked from).
+
+        Args:
+            key (str): Key returned by `acquire`.
+        Returns:
+            bool: False if the server is not running anymore.
+        """
+        shared = self._servers.get(key)
+        if shared is None:
+            return False
+        shared["refs"] += 1
+        return True
+
+    async def release(self, key: str) -> None:
+        """
+        Drop a reference to a shared server, closing it if no session uses it anymore.
+
+        Args:
+            key (str): Key returned by `acquire`.
+        """
+        async with self._lock(key):
+            shared = self._servers.get(key)
+            if shared is None:
+                return
+            shared["refs"] -= 1
+            if shared["refs"] <= 0:
+                del self._servers[key]
+                logging.info(f"Closing MCP server {shared['name']}: no session uses it")
+                await shared["wrapper"].close()
+
+    async def close(self) -> None:
+        """
+        Close all the shared servers.
+        """
+        for key in list(self._servers):
+            shared = self._servers.pop(key)
+            await shared["wrapper"].close()
+
+    def resolve(self, keys: list[str]) -> tuple[dict[str, McpWrapper], list[Tool]]:
+        """
+        Get the wrappers and tools of a set of shared servers.
+
+        Args:
+            keys (list[str]): Keys of the shared servers.
+        Returns:
+            tuple[dict[str, McpWrapper], list[Tool]]: Wrappers by server name, and tools of the servers.
+        """
+        clients: dict[str, McpWrapper] = {}
+        tools: list[Tool] = []
+        for key in keys:
+            shared = self._servers.get(key)
+            if shared is None:
+                continue
+            clients[shared["name"]] = shared["wrapper"]
+            tools.extend(shared["tools"])
+        return clients, tools
+
+
+def _server_names(mcp_wrapper: McpWrapper | None) -> set[str]:
+    if mcp_wrapper is None:
+        return set()
+    return set(mcp_wrapper.mcp_servers["mcpServers"])
+
+
+async def attach_session_servers(
+    shared_servers: SharedMcpServers,
+    mcp_servers: list[AcpHttpMcpServer | SseMcpServer | McpServerStdio],
+    static_client: McpWrapper | None = None,
+) -> list[str]:
+    """
+    Acquire the servers declared by an ACP client for a session.
+
+    Args:
+        shared_servers (SharedMcpServers): Shared servers.
+        mcp_servers (list[AcpHttpMcpServer | SseMcpServer | McpServerStdio]): Servers declared by the client.
+        static_client (McpWrapper | None): Wrapper of the servers configured in `.mcp.json`, whose names cannot be reused.
+    Returns:
+        list[str]: Keys of the acquired servers.
+    """
+    taken = _server_names(static_client)
+    keys: list[str] = []
+    for server in mcp_servers:
+        if server.name in taken:
+            logging.warning(
+                f"Skipping MCP server {server.name} declared by the client: another server with the same name is already available"
+            )
+            continue
+        try:
+            key = await shared_servers.acquire(
+                server.name, acp_server_to_config(server)
+            )
+        except Exception as e:
+            logging.error(f"Could not start MCP server {server.name}: {e}")
+            continue
+        taken.add(server.name)
+        keys.append(key)
+    return keys
@@ -1,16 +1,36 @@
+import asyncio
 import json
-import re
-
-from typing import Any, Union, cast
-from typing_extensions import TypedDict
-from rich import print as rprint
+import logging
+
+from typing import Any, Callable, Union, cast
+from typing_extensions import TypedDict, NotRequired
+from mcp.types import (
+    AudioContent,
+    BlobResourceContents,
+    CallToolResult,
+    EmbeddedResource,
+    ImageContent,
+    ResourceLink,
+    TextContent,
+)
 from mcp_use.client.session import (
     MCPSession,
     Tool as McpTool,
 )
 from mcp_use.client import MCPClient
-from .models import Tool
-from .constants import MCP_CONFIG_FILE
+from .models import Tool, mcp_tool_name
+from .mcp_pool import McpSessionPool
+from .mcp_cache import McpToolsCache, McpResultCache
+from .constants import (
+    MCP_CONFIG_FILE,
+    MCP_CONNECT_TIMEOUT,
+    MCP_LIST_TOOLS_TIMEOUT,
+    MCP_DISCOVERY_RETRY_DELAY,
+    MCP_DISCOVERY_MAX_RETRY_DELAY,
+    MCP_IDLE_TIMEOUT,
+    MCP_RESULT_MAX_CHARS,
+    MCP_CALL_TIMEOUT,
+)
 
 
 class StdioMcpServer(TypedDict):
@@ -21,11 +41,19 @@ class StdioMcpServer(TypedDict):
         command (str): The command to run the MCP server.
         args (list[str]| None): A list of arguments for the command.
         env (dict[str, Any] | None): A dictionary of environment variables for the command.
+        readOnlyTools (list[str] | None): Optional names of tools whose results can be cached, besides the ones annotated as read-only by the server.
+        callTimeout (float | None): Optional seconds after which a call to the server is abandoned.
+        maxConcurrentCalls (int | None): Optional maximum number of concurrent calls to the server.
+        maxQueuedCalls (int | None): Optional maximum number of calls waiting for a free slot, after which new calls are rejected.
     """
 
     command: str
     args: list[str] | None
     env: dict[str, Any] | None
+    readOnlyTools: NotRequired[list[str] | None]
+    callTimeout: NotRequired[float | None]
+    maxConcurrentCalls: NotRequired[int | None]
+    maxQueuedCalls: NotRequired[int | None]
 
 
 class HttpMcpServer(TypedDict):
@@ -35,10 +63,18 @@ class HttpMcpServer(TypedDict):
     Args:
         url (str): The URL of the MCP server.
         headers (dict[str, Any] | None): A dictionary of headers for the HTTP request.
+        readOnlyTools (list[str] | None): Optional names of tools whose results can be cached, besides the ones annotated as read-only by the server.
+        callTimeout (float | None): Optional seconds after which a call to the server is abandoned.
+        maxConcurrentCalls (int | None): Optional maximum number of concurrent calls to the server.
+        maxQueuedCalls (int | None): Optional maximum number of calls waiting for a free slot, after which new calls are rejected.
     """
 
     url: str
     headers: dict[str, Any] | None
+    readOnlyTools: NotRequired[list[str] | None]
+    callTimeout: NotRequired[float | None]
+    maxConcurrentCalls: NotRequired[int | None]
+    maxQueuedCalls: NotRequired[int | None]
 
 
 McpServer = Union[StdioMcpServer, HttpMcpServer]
@@ -61,6 +97,14 @@ class McpValidationError(Exception):
     """
 
 
+_OPTIONAL_SERVER_KEYS = (
+    "readOnlyTools",
+    "callTimeout",
+    "maxConcurrentCalls",
+    "maxQueuedCalls",
+)
+
+
 def _validate_mcp_server(mcp_server: dict[str, Any]) -> StdioMcpServer | HttpMcpServer:
     """
     Validates and returns the MCP server configuration as either StdioMcpServer or HttpMcpServer.
@@ -72,18 +116,103 @@ def _validate_mcp_server(mcp_server: dict[str, Any]) -> StdioMcpServer | HttpMcp
     Raises:
         McpValidationError: If neither 'command' nor 'url' is found in the configuration.
     """
+    server: StdioMcpServer | HttpMcpServer
     if "command" in mcp_server:
-        return StdioMcpServer(
+        server = StdioMcpServer(
             command=mcp_server["command"],
             args=mcp_server.get("args"),
             env=mcp_server.get("env"),
         )
     elif "url" in mcp_server:
-        return HttpMcpServer(url=mcp_server["url"], headers=mcp_server.get("headers"))
+        server = HttpMcpServer(url=mcp_server["url"], headers=mcp_server.get("headers"))
     else:
         raise McpValidationError(
             "Couldn't find neither 'command' nor 'url' in the current MCP server definition"
         )
+    for key in _OPTIONAL_SERVER_KEYS:
+        if key in mcp_server:
+            server[key] = mcp_server[key]
+    return server
+
+
+def _minify_json(content: Any) -> str:
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _format_size(data: str) -> str:
+    # base64-encoded payloads are 4/3 of the size of the decoded data
+    size = len(data) * 3 // 4
+    if size < 1024:
+        return f"{size}B"
+    return f"{size / 1024:.1f}KB"
+
+
+def _normalize_content(content: Any, structured: Any) -> str | None:
+    """
+    Render a content block of a tool result as compact text.
+
+    Args:
+        content (Any): Content block.
+        structured (Any): Structured content of the result, if any.
+    Returns:
+        str | None: Rendered content, or None if it only repeats the structured content.
+    """
+    if isinstance(content, TextContent):
+        try:
+            parsed = json.loads(content.text)
+        except ValueError:
+            return content.text
+        if structured is not None and parsed == structured:
+            return None
+        if isinstance(parsed, (dict, list)):
+            return _minify_json(parsed)
+        return content.text
+    if isinstance(content, ImageContent):
+        return f"[image: {content.mimeType}, {_format_size(content.data)}]"
+    if isinstance(content, AudioContent):
+        return f"[audio: {content.mimeType}, {_format_size(content.data)}]"
+    if isinstance(content, ResourceLink):
+        details = ", ".join(
+            detail for detail in (content.name, content.mimeType) if detail
+        )
+        return f"[resource: {content.uri} ({details})]"
+    if isinstance(content, EmbeddedResource):
+        resource = content.resource
+        if isinstance(resource, BlobResourceContents):
+            size = _format_size(resource.blob)
+        else:
+            size = f"{len(resource.text)} characters"
+        mime_type = f"{resource.mimeType}, " if resource.mimeType else ""
+        return f"[resource: {resource.uri} ({mime_type}{size})]"
+    return str(content)
+
+
+def normalize_tool_result(result: Any, max_chars: int = MCP_RESULT_MAX_CHARS) -> str:
+    """
+    Render the result of an MCP tool call as compact text for the chat history: text parts are joined, JSON (and structured content) is minified, images, audio and resources are replaced with references, errors are flagged, and the text is capped in size.
+
+    Args:
+        result (Any): Result of the tool call (a `CallToolResult`, or any other object, which is rendered with `str`).
+        max_chars (int): Maximum number of characters of the rendered result.
+    Returns:
+        str: Rendered result.
+    """
+    if isinstance(result, CallToolResult):
+        parts: list[str] = []
+        if result.structuredContent is not None:
+            parts.append(_minify_json(result.structuredContent))
+        for content in result.content:
+            part = _normalize_content(content, result.structuredContent)
+            if part is not None:
+                parts.append(part)
+        text = "\n".join(parts)
+        if result.isError:
+            text = "[error] " + text
+    else:
+        text = str(result)
+    if len(text) > max_chars:
+        text = text[:max_chars] + f"... [truncated {len(text) - max_chars} characters]"
+    return text
 
 
 class McpWrapper:
@@ -92,7 +221,13 @@ class McpWrapper:
     """
 
     def __init__(
-        self, mcp_servers: dict[str, Any], from_config_dict: bool = False
+        self,
+        mcp_servers: dict[str, Any],
+        from_config_dict: bool = False,
+        lazy: bool = False,
+        idle_timeout: float | None = MCP_IDLE_TIMEOUT,
+        cache_results: bool = False,
+        call_timeout: float | None = MCP_CALL_TIMEOUT,
     ) -> None:
         """
         Initialize the McpWrapper instance.
@@ -100,6 +235,10 @@ class McpWrapper:
         Args:
             mcp_servers (dict[str, Any]): MCP servers configuration.
             from_config_dict (bool): Whether the config is already validated.
+            lazy (bool): Whether to start stdio servers only when one of their tools is first called (if their tools are cached) and to shut them down when idle.
+            idle_timeout (float | None): Seconds after which an idle stdio server is shut down, in lazy mode. None disables idle shutdowns.
+            cache_results (bool): Whether to cache the results of read-only tools (annotated with `readOnlyHint` by the server, or listed in the `readOnlyTools` of the server configuration).
+            call_timeout (float | None): Seconds after which a tool call is abandoned, unless the server configuration sets its own `callTimeout`. None disables the timeout.
         Raises:
             ValueError: If no valid MCP servers are provided.
         """
@@ -111,8 +250,9 @@ class McpWrapper:
                         mcp_servers["mcpServers"][server]
                     )
                 except McpValidationError:
-                    rprint(
-                        f"[yellow bold]WARNING[/]\tSkipping {server} because we cannot validate it as either a stdio or a HTTP/SSE server"
+                    # stdout is the channel of the ACP protocol, so warnings are logged
+                    logging.warning(
+                        f"Skipping {server} because we cannot validate it as either a stdio or a HTTP/SSE server"
                     )
         else:
             self.mcp_servers = cast(McpServersConfig, mcp_servers)
@@ -121,12 +261,50 @@ class McpWrapper:
         self._client = MCPClient.from_dict(
             config=cast(dict[str, Any], self.mcp_servers)
         )
+        self._pool = McpSessionPool(
+            self._client, on_tools_changed=self._refresh_server_tools
+        )
+        self._cache = McpToolsCache()
+        self._failed_servers: list[str] = []
+        self._cached_servers: list[str] = []
+        self._retry_task: asyncio.Task | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._tools_listeners: list[Callable[[str, list[Tool]], None]] = []
+        self.lazy = lazy
+        self.result_cache = McpResultCache() if cache_results else None
+        self._read_only_tools: set[tuple[str, str]] = set()
+        # names of the tools as known by their server, by namespaced name
+        self._tool_names: dict[str, str] = {}
+        self._call_timeouts: dict[str, float | None] = {}
+        # calls in flight, by ACP session, so that they can be cancelled
+        self._session_calls: dict[str, set[asyncio.Task]] = {}
+        for server, config in self.mcp_servers["mcpServers"].items():
+            for tool_name in config.get("readOnlyTools") or []:
+                self._read_only_tools.add((server, tool_name))
+            self._call_timeouts[server] = config.get("callTimeout", call_timeout)
+            if config.get("maxConcurrentCalls") is not None:
+                self._pool.server_max_in_flight[server] = config["maxConcurrentCalls"]
+            if config.get("maxQueuedCalls") is not None:
+                self._pool.server_max_queued[server] = config["maxQueuedCalls"]
+        if lazy and idle_timeout is not None:
+            for server in self.mcp_servers["mcpServers"]:
+                if self._is_stdio(server):
+                    self._pool.idle_timeouts[server] = idle_timeout
 
     @classmethod
-    def from_file(cls) -> "McpWrapper":
+    def from_file(
+        cls,
+        lazy: bool = False,
+        idle_timeout: float | None = MCP_IDLE_TIMEOUT,
+        cache_results: bool = False,
+    ) -> "McpWrapper":
         """
         Create a McpWrapper instance from a configuration file.
 
+        Args:
+            lazy (bool): Whether to start stdio servers lazily and shut them down when idle.
+            idle_timeout (float | None): Seconds after which an idle stdio server is shut down, in lazy mode.
+            cache_results (bool): Whether to cache the results of read-only tools.
         Returns:
             McpWrapper: The initialized wrapper.
         Raises:
@@ -146,63 +324,380 @@ class McpWrapper:
         assert len(data["mcpServers"]) > 0, (
             f"MCP servers configuration in {str(MCP_CONFIG_FILE)} is empty"
         )
-        return cls(mcp_servers=data)
+        return cls(
+            mcp_servers=data,
+            lazy=lazy,
+            idle_timeout=idle_timeout,
+            cache_results=cache_results,
+        )
 
     @classmethod
-    def from_config_dict(cls, servers_config: McpServersConfig) -> "McpWrapper":
+    def from_config_dict(
+        cls,
+        servers_config: McpServersConfig,
+        lazy: bool = False,
+        idle_timeout: float | None = MCP_IDLE_TIMEOUT,
+        cache_results: bool = False,
+    ) -> "McpWrapper":
         """
         Create a McpWrapper instance from a configuration dictionary.
 
         Args:
             servers_config (McpServersConfig): The MCP servers configuration.
+            lazy (bool): Whether to start stdio servers lazily and shut them down when idle.
+            idle_timeout (float | None): Seconds after which an idle stdio server is shut down, in lazy mode.
+            cache_results (bool): Whether to cache the results of read-only tools.
         Returns:
             McpWrapper: The initialized wrapper.
         """
         return cls(
-            mcp_servers=cast(dict[str, Any], servers_config), from_config_dict=True
+            mcp_servers=cast(dict[str, Any], servers_config),
+            from_config_dict=True,
+            lazy=lazy,
+            idle_timeout=idle_timeout,
+            cache_results=cache_results,
+        )
+
+    def _is_stdio(self, server: str) -> bool:
+        return "command" in self.mcp_servers["mcpServers"][server]
+
+    def _to_tools(self, server: str, tools: list[McpTool]) -> list[Tool]:
+        """
+        Convert the tools listed by a server, keeping track of the ones annotated as read-only.
+        """
+        for tool in tools:
+            if tool.annotations is not None and tool.annotations.readOnlyHint:
+                self._read_only_tools.add((server, tool.name))
+            self._tool_names[mcp_tool_name(server, tool.name)] = tool.name
+        return [Tool.from_mcp_tool(tool, server) for tool in tools]
+
+    async def _discover_server(
+        self, server: str, connect_timeout: float, list_timeout: float
+    ) -> list[Tool]:
+        """
+        Connect to a single MCP server and list its tools, within the given timeouts, storing them in the on-disk cache.
+
+        Args:
+            server (str): Name of the server.
+            connect_timeout (float): Seconds allowed to start and initialize the session.
+            list_timeout (float): Seconds allowed to list the tools.
+        Returns:
+            list[Tool]: Tools exposed by the server.
+        """
+        session: MCPSession = await self._pool.acquire(
+            server, connect_timeout=connect_timeout, attempts=1
+        )
+        tools: list[McpTool] = await asyncio.wait_for(
+            session.list_tools(), timeout=list_timeout
         )
+        self._cache.put(self.mcp_servers["mcpServers"][server], tools)
+        return self._to_tools(server, tools)
+
+    async def _discover(
+        self, servers: list[str], connect_timeout: float, list_timeout: float
+    ) -> tuple[dict[str, list[Tool]], list[str]]:
+        """
+        Discover the tools of several MCP servers concurrently.
 
-    async def all_tools(self) -> list[Tool]:
+        Returns:
+            tuple[dict[str, list[Tool]], list[str]]: Tools of each healthy server and names of the failed ones.
+        """
+        results = await asyncio.gather(
+            *[
+                self._discover_server(server, connect_timeout, list_timeout)
+                for server in servers
+            ],
+            return_exceptions=True,
+        )
+        discovered: dict[str, list[Tool]] = {}
+        failed: list[str] = []
+        for server, result in zip(servers, results, strict=True):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                reason = (
+                    "timed out"
+                    if isinstance(result, asyncio.TimeoutError)
+                    else f"failed: {result}"
+                )
+                logging.warning(f"Discovery of MCP server {server} {reason}")
+                failed.append(server)
+            else:
+                discovered[server] = result
+        return discovered, failed
+
+    def _cached_tools(self, server: str) -> list[Tool] | None:
+        tools = self._cache.get(self.mcp_servers["mcpServers"][server])
+        if tools is None:
+            return None
+        return self._to_tools(server, tools)
+
+    async def all_tools(
+        self,
+        connect_timeout: float = MCP_CONNECT_TIMEOUT,
+        list_timeout: float = MCP_LIST_TOOLS_TIMEOUT,
+        use_cache: bool = True,
+    ) -> list[Tool]:
         """
         Retrieve all available tools from all configured MCP servers.
 
+        Servers whose tool catalogue is cached on disk (for their current configuration) are not contacted: their cached tools are returned right away and can be refreshed in the background with `refresh_cached_servers`. The other servers are contacted concurrently, so startup takes as long as the slowest healthy server. Servers that fail or time out are skipped with a warning, and can be retried in the background with `retry_failed_servers`.
+
+        Args:
+            connect_timeout (float): Seconds allowed to each server to start and initialize its session.
+            list_timeout (float): Seconds allowed to each server to list its tools.
+            use_cache (bool): Whether to use the cached tool catalogues.
         Returns:
-            list[Tool]: List of available tools from all servers.
-        """
-        available_tools: list[Tool] = []
-        for server in self.mcp_servers["mcpServers"]:
-            session: MCPSession = await self._client.create_session(server_name=server)
-            if not session.is_connected:
-                await session.connect()
-            tools: list[McpTool] = await session.list_tools()
-            for tool in tools:
-                available_tools.append(Tool.from_mcp_tool(tool, server))
-        return available_tools
+            list[Tool]: List of available tools from all the healthy servers.
+        """
+        servers = list(self.mcp_servers["mcpServers"])
+        server_tools: dict[str, list[Tool]] = {}
+        if use_cache:
+            for server in servers:
+                cached = self._cached_tools(server)
+                if cached is not None:
+                    server_tools[server] = cached
+        self._cached_servers = list(server_tools)
+        discovered, failed = await self._discover(
+            [server for server in servers if server not in server_tools],
+            connect_timeout,
+            list_timeout,
+        )
+        server_tools.update(discovered)
+        for server in failed:
+            logging.warning(
+                f"Skipping MCP server {server} because it could not be reached, it will be retried in the background"
+            )
+        self._failed_servers = failed
+        return [
+            tool
+            for server in servers
+            if server in server_tools
+            for tool in server_tools[server]
+        ]
+
+    def add_tools_listener(self, listener: Callable[[str, list[Tool]], None]) -> None:
+        """
+        Register a callback to be notified when the tool catalogue of a server changes, either after a background refresh or because the server sent a `tools/list_changed` notification.
 
-    async def call_tool(
-        self, tool_name: str, tool_input: dict[str, Any], server: str
+        Args:
+            listener (Callable[[str, list[Tool]], None]): Called with the name of the server and its new tools.
+        """
+        self._tools_listeners.append(listener)
+
+    def _notify_tools_changed(self, server: str, tools: list[Tool]) -> None:
+        for listener in self._tools_listeners:
+            listener(server, tools)
+
+    async def _refresh_server_tools(self, server: str) -> None:
+        """
+        Re-list the tools of a server whose catalogue changed, updating the cache and notifying the listeners.
+
+        Args:
+            server (str): Name of the server.
+        """
+        logging.info(f"Tools of MCP server {server} changed, refreshing them")
+        self._cache.invalidate(self.mcp_servers["mcpServers"][server])
+        try:
+            tools = await self._discover_server(
+                server, MCP_CONNECT_TIMEOUT, MCP_LIST_TOOLS_TIMEOUT
+            )
+        except Exception as e:
+            logging.error(f"Could not refresh the tools of MCP server {server}: {e}")
+            return
+        self._notify_tools_changed(server, tools)
+
+    def refresh_cached_servers(
+        self,
+        connect_timeout: float = MCP_CONNECT_TIMEOUT,
+        list_timeout: float = MCP_LIST_TOOLS_TIMEOUT,
+    ) -> asyncio.Task | None:
+        """
+        Refresh, in the background, the tools of the servers that were served from the on-disk cache by `all_tools`, notifying the listeners about the servers whose tools changed. In lazy mode, stdio servers are not refreshed, so that they are not started before they are needed.
+
+        Args:
+            connect_timeout (float): Seconds allowed to each server to start and initialize its session.
+            list_timeout (float): Seconds allowed to each server to list its tools.
+        Returns:
+            asyncio.Task | None: The background task, or None if no server was served from the cache.
+        """
+        servers = [
+            server
+            for server in self._cached_servers
+            if not (self.lazy and self._is_stdio(server))
+        ]
+        if len(servers) == 0:
+            return None
+
+        async def _refresh() -> None:
+            cached = {server: self._cached_tools(server) for server in servers}
+            discovered, failed = await self._discover(
+                servers, connect_timeout, list_timeout
+            )
+            for server in failed:
+                logging.warning(
+                    f"Could not refresh the tools of MCP server {server}, keeping the cached ones"
+                )
+            for server, tools in discovered.items():
+                if tools != cached[server]:
+                    self._notify_tools_changed(server, tools)
+
+        self._refresh_task = asyncio.create_task(_refresh())
+        return self._refresh_task
+
+    def retry_failed_servers(
+        self,
+        on_recovered: Callable[[list[Tool]], None],
+        delay: float = MCP_DISCOVERY_RETRY_DELAY,
+        max_delay: float = MCP_DISCOVERY_MAX_RETRY_DELAY,
+        connect_timeout: float = MCP_CONNECT_TIMEOUT,
+        list_timeout: float = MCP_LIST_TOOLS_TIMEOUT,
+    ) -> asyncio.Task | None:
+        """
+        Keep retrying, in the background and with exponential backoff, the discovery of the servers that failed in `all_tools`, until all of them recover or `close` is called.
+
+        Args:
+            on_recovered (Callable[[list[Tool]], None]): Called with the tools of the servers that recover.
+            delay (float): Seconds before the first retry (doubled after each failed attempt).
+            max_delay (float): Maximum number of seconds between two retries.
+            connect_timeout (float): Seconds allowed to each server to start and initialize its session.
+            list_timeout (float): Seconds allowed to each server to list its tools.
+        Returns:
+            asyncio.Task | None: The background task, or None if no server failed.
+        """
+        if len(self._failed_servers) == 0:
+            return None
+
+        async def _retry() -> None:
+            current_delay = delay
+            while len(self._failed_servers) > 0:
+                await asyncio.sleep(current_delay)
+                discovered, failed = await self._discover(
+                    self._failed_servers, connect_timeout, list_timeout
+                )
+                for server in discovered:
+                    logging.info(f"MCP server {server} recovered")
+                self._failed_servers = failed
+                tools = [tool for server in discovered for tool in discovered[server]]
+                if len(tools) > 0:
+                    on_recovered(tools)
+                current_delay = min(current_delay * 2, max_delay)
+
+        self._retry_task = asyncio.create_task(_retry())
+        return self._retry_task
+
+    async def close(self) -> None:
+        """
+        Stop the background discovery tasks and close all the sessions.
+        """
+        for task in (self._retry_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._retry_task = None
+        self._refresh_task = None
+        await self._pool.close()
+
+    async def _call(
+        self, server: str, tool_name: str, tool_input: dict[str, Any]
     ) -> Any:
+        """
+        Call a tool through the warm session of a server, reconnecting and retrying once if the server died mid-session.
+        """
+        async with self._pool.session(server) as session:
+            try:
+                return await session.call_tool(name=tool_name, arguments=tool_input)
+            except Exception:
+                if session.is_connected:
+                    raise
+                await self._pool.invalidate(server)
+                session = await self._pool.acquire(server)
+                return await session.call_tool(name=tool_name, arguments=tool_input)
+
+    def cancel_calls(self, session_id: str) -> int:
+        """
+        Cancel the tool calls in flight for an ACP session.
+
+        Args:
+            session_id (str): Session identifier.
+        Returns:
+            int: Number of cancelled calls.
+        """
+        calls = self._session_calls.pop(session_id, set())
+        for task in calls:
+            task.cancel()
+        return len(calls)
+
+    async def call_tool(
+        self,
+        tool_name: str,
+        tool_input: dict[str, Any],
+        server: str,
+        session_id: str | None = None,
+    ) -> str:
         """
         Call a tool on a specified MCP server.
 
+        The call is abandoned after the timeout of the server (including the time spent waiting for a free slot), and can be cancelled with `cancel_calls`. The result is rendered as compact text with `normalize_tool_result`. If result caching is enabled and the tool is read-only, results are served from the cache while they are fresh.
+
         Args:
-            tool_name (str): Name of the tool (must start with 'mcp_').
+            tool_name (str): Namespaced name of the tool (`mcp_<server>__<tool>`, see `mcp_tool_name`).
             tool_input (dict[str, Any]): Arguments for the tool.
             server (str): Server name to call the tool on.
+            session_id (str | None): ACP session the call belongs to, if any.
         Returns:
-            Any: The result of the tool call, or an error message.
+            str: The result of the tool call, or an error message.
         Raises:
             AssertionError: If tool_name does not start with 'mcp_'.
         """
         assert tool_name.startswith("mcp_"), (
             f"Cannot call a non-MCP tool with an MCP client. If {tool_name} this is meant to be an MCP tool, please rename it so that it starts with `mcp_`"
         )
-        _impl_tool_name = re.sub(r"^mcp_", "", tool_name, 1)
-        session: MCPSession = await self._client.create_session(server_name=server)
-        if not session.is_connected:
-            await session.connect()
+        _impl_tool_name = self._tool_names.get(
+            tool_name, tool_name.removeprefix(mcp_tool_name(server, ""))
+        )
+        cache = (
+            self.result_cache
+            if (server, _impl_tool_name) in self._read_only_tools
+            else None
+        )
+        if cache is not None:
+            hit, result = cache.get(server, _impl_tool_name, tool_input)
+            if hit:
+                return result
+        timeout = self._call_timeouts.get(server)
+        call = asyncio.create_task(
+            asyncio.wait_for(
+                self._call(server, _impl_tool_name, tool_input), timeout=timeout
+            )
+        )
+        if session_id is not None:
+            self._session_calls.setdefault(session_id, set()).add(call)
         try:
-            result = await session.call_tool(name=_impl_tool_name, arguments=tool_input)
+            raw_result = await call
+        except asyncio.TimeoutError:
+            return f"MCP tool {tool_name} from server {server} did not answer within {timeout} seconds"
+        except asyncio.CancelledError:
+            current_task = asyncio.current_task()
+            if current_task is not None and current_task.cancelling() > 0:
+                call.cancel()
+                raise
+            return (
+                f"The call to MCP tool {tool_name} from server {server} was cancelled"
+            )
         except Exception as e:
-            result = f"An error occurred while calling MCP tool {tool_name} from server {server} with arguments {tool_input}: {e}"
+            return f"An error occurred while calling MCP tool {tool_name} from server {server} with arguments {tool_input}: {e}"
+        finally:
+            if session_id is not None:
+                calls = self._session_calls.get(session_id)
+                if calls is not None:
+                    calls.discard(call)
+                    if len(calls) == 0:
+                        del self._session_calls[session_id]
+        result = normalize_tool_result(raw_result)
+        if cache is not None and not getattr(raw_result, "isError", False):
+            cache.put(server, _impl_tool_name, tool_input, result)
         return result
@@ -1,11 +1,21 @@
 import inspect
 import json
-
-from pydantic import BaseModel, Field, model_validator
-from typing import Literal, Any, Callable, TypeVar
+import re
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    TypeAdapter,
+    ValidationError,
+    model_validator,
+)
+from typing import Annotated, Literal, Any, Callable, TypeVar, get_args, get_origin
 from typing_extensions import TypedDict
 from typing_extensions import NotRequired, Self
 from mcp_use.client.session import Tool as McpTool
+from .constants import TOOL_DESCRIPTION_MAX_CHARS
 from .events import (
     ThinkingEvent,
     ToolCallEvent,
@@ -108,6 +118,169 @@ class ParameterMetadata(TypedDict):
     default: NotRequired[Any]
 
 
+def _build_arguments_validator(fn: Callable) -> TypeAdapter | None:
+    """
+    Build a validator for the arguments of a function from its signature: annotated parameters are validated (and coerced, e.g. "1" to 1) against their type, string metadata of `Annotated` types is used as description, and unknown arguments are rejected unless the function accepts `**kwargs`.
+
+    Args:
+        fn (Callable): Function to validate the arguments of.
+    Returns:
+        TypeAdapter | None: Validator returning the validated arguments as a dictionary, or None if the signature cannot be expressed as a schema.
+    """
+    fields: dict[str, Any] = {}
+    extra: Literal["allow", "forbid"] = "forbid"
+    try:
+        sign = inspect.signature(fn)
+        for param in sign.parameters.values():
+            if param.kind == param.VAR_KEYWORD:
+                extra = "allow"
+                continue
+            if param.kind in (param.VAR_POSITIONAL, param.POSITIONAL_ONLY):
+                continue
+            annotation = (
+                Any if param.annotation is inspect.Parameter.empty else param.annotation
+            )
+            if get_origin(annotation) is Annotated:
+                descriptions = [
+                    meta for meta in get_args(annotation)[1:] if isinstance(meta, str)
+                ]
+                if len(descriptions) > 0:
+                    annotation = Annotated[
+                        annotation, Field(description=", ".join(descriptions))
+                    ]
+            if param.default is not inspect.Parameter.empty:
+                annotation = NotRequired[annotation]
+            fields[param.name] = annotation
+        arguments = TypedDict(f"{fn.__name__}_arguments", fields)  # type: ignore[operator]
+        arguments.__pydantic_config__ = ConfigDict(  # type: ignore[attr-defined]
+            extra=extra, arbitrary_types_allowed=True
+        )
+        return TypeAdapter(arguments)
+    except Exception:
+        return None
+
+
+def _format_validation_error(tool_name: str, error: ValidationError) -> str:
+    lines = [f"Invalid arguments for tool {tool_name}:"]
+    for err in error.errors():
+        loc = ".".join(str(part) for part in err["loc"]) or "arguments"
+        line = f"- `{loc}`: {err['msg']}"
+        if err["type"] != "missing":
+            line += f" (got {err['input']!r})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+_JSON_SCHEMA_TYPES = {
+    "string": "string",
+    "integer": "number",
+    "number": "number",
+    "boolean": "boolean",
+    "null": "null",
+    "object": "object",
+}
+# nested objects deeper than this are rendered as `object`
+_MAX_SCHEMA_DEPTH = 3
+
+
+def _trim_description(description: str, max_chars: int | None) -> str:
+    text = " ".join(description.split())
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0].rstrip(".,;:") + "..."
+
+
+def _schema_to_type(schema: Any, depth: int = 0) -> str:
+    """
+    Render a JSON schema as a TypeScript-like type (e.g. `{path: string, limit?: number}[]`).
+
+    Args:
+        schema (Any): JSON schema.
+        depth (int): Nesting depth of the schema.
+    Returns:
+        str: Type of the schema.
+    """
+    if not isinstance(schema, dict):
+        return "any"
+    if "const" in schema:
+        return json.dumps(schema["const"], default=str)
+    if isinstance(schema.get("enum"), list):
+        return " | ".join(json.dumps(value, default=str) for value in schema["enum"])
+    if "$ref" in schema:
+        return str(schema["$ref"]).rsplit("/", 1)[-1]
+    for key in ("anyOf", "oneOf"):
+        if isinstance(schema.get(key), list):
+            return " | ".join(
+                dict.fromkeys(_schema_to_type(option, depth) for option in schema[key])
+            )
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        return " | ".join(
+            _schema_to_type({**schema, "type": option}, depth) for option in schema_type
+        )
+    if schema_type == "array":
+        items = _schema_to_type(schema.get("items"), depth)
+        return f"({items})[]" if " | " in items else f"{items}[]"
+    if schema_type == "object" or "properties" in schema:
+        if (
+            not isinstance(schema.get("properties"), dict)
+            or len(schema["properties"]) == 0
+            or depth >= _MAX_SCHEMA_DEPTH
+        ):
+            return "object"
+        return "{" + _schema_to_params(schema, depth + 1) + "}"
+    if isinstance(schema_type, str):
+        return _JSON_SCHEMA_TYPES.get(schema_type, "any")
+    return "any"
+
+
+def _schema_to_params(
+    schema: dict[str, Any], depth: int = 0, max_description_chars: int | None = None
+) -> str:
+    """
+    Render the properties of an object JSON schema as TypeScript-like parameters (e.g. `path: string, limit?: number = 10`).
+
+    Args:
+        schema (dict[str, Any]): JSON schema of an object.
+        depth (int): Nesting depth of the schema.
+        max_description_chars (int | None): If not None, parameter descriptions are added as comments, trimmed to this length.
+    Returns:
+        str: Parameters.
+    """
+    properties = schema.get("properties")
+    if not isinstance(properties, dict):
+        return ""
+    required = set(schema.get("required") or [])
+    params: list[str] = []
+    for name, prop in properties.items():
+        param = (
+            f"{name}{'' if name in required else '?'}: {_schema_to_type(prop, depth)}"
+        )
+        if isinstance(prop, dict):
+            if "default" in prop:
+                param += f" = {json.dumps(prop['default'], default=str)}"
+            if max_description_chars is not None and prop.get("description"):
+                param += f" /* {_trim_description(str(prop['description']), max_description_chars)} */"
+        params.append(param)
+    return ", ".join(params)
+
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+def mcp_tool_name(server: str, tool_name: str) -> str:
+    """
+    Get the name under which the LLM sees a tool of an MCP server, namespaced by server (`mcp_<server>__<tool>`) so that servers exposing tools with the same name do not clash.
+
+    Args:
+        server (str): Name of the server.
+        tool_name (str): Name of the tool, as known by the server.
+    Returns:
+        str: Namespaced name, with the characters that function-calling APIs do not accept replaced by underscores.
+    """
+    return _INVALID_NAME_CHARS.sub("_", f"mcp_{server}__{tool_name}")
+
+
 class McpMetadata(TypedDict):
     """Represents the metadata for an MCP tool"""
 
@@ -130,6 +303,10 @@ class Tool(BaseModel):
     description: str
     fn: Callable | None
     mcp_metadata: McpMetadata | None = None
+    # caches of the description and of the arguments validator, keyed by what they are computed from
+    _description: tuple[tuple, str] | None = PrivateAttr(default=None)
+    _compact_description: tuple[tuple, str] | None = PrivateAttr(default=None)
+    _validator: tuple[Callable, TypeAdapter | None] | None = PrivateAttr(default=None)
 
     @classmethod
     def from_mcp_tool(cls, mcp_tool: McpTool, server_name: str) -> "Tool":
@@ -144,7 +321,7 @@ class Tool(BaseModel):
             Tool: Tool definition.
         """
         return cls(
-            name="mcp_" + mcp_tool.name,
+            name=mcp_tool_name(server_name, mcp_tool.name),
             description=mcp_tool.description or "",
             fn=None,
             mcp_metadata=McpMetadata(
@@ -170,8 +347,14 @@ class Tool(BaseModel):
 
     def to_string(self) -> str:
         """
-        Transform the tool metadata into an LLM-friendly tool description
+        Transform the tool metadata into an LLM-friendly tool description (computed once, and again only if the tool changes)
         """
+        key = (self.name, self.description, self.fn, id(self.mcp_metadata))
+        if self._description is None or self._description[0] != key:
+            self._description = (key, self._render_description())
+        return self._description[1]
+
+    def _render_description(self) -> str:
         base = f"Tool Name: {self.name}\nTool Description: {self.description}"
         if self.mcp_metadata is None:
             base += "\nTool Parameters:"
@@ -208,14 +391,115 @@ class Tool(BaseModel):
                 base += f"\nTool Output Schema:\n\n```json\n{outpt_schema}\n```\n\n"
         return base
 
+    def to_compact_string(
+        self, max_description_chars: int | None = TOOL_DESCRIPTION_MAX_CHARS
+    ) -> str:
+        """
+        Transform the tool metadata into a compact, TypeScript-like signature (e.g. ``- `read_file(file_path: string)`: Read a file``), with trimmed descriptions and without output schemas (computed once, and again only if the tool changes)
+
+        Args:
+            max_description_chars (int | None): Maximum length of the tool and parameter descriptions. None keeps them whole.
+        Returns:
+            str: Compact tool description.
+        """
+        key = (
+            self.name,
+            self.description,
+            self.fn,
+            id(self.mcp_metadata),
+            max_description_chars,
+        )
+        if self._compact_description is None or self._compact_description[0] != key:
+            self._compact_description = (
+                key,
+                self._render_compact_description(max_description_chars),
+            )
+        return self._compact_description[1]
+
+    def _render_compact_description(self, max_description_chars: int | None) -> str:
+        schema = self.input_schema()
+        if self.mcp_metadata is None and schema is not None:
+            # defaults are not part of the schema of the arguments validator
+            properties = {
+                name: dict(prop) for name, prop in schema.get("properties", {}).items()
+            }
+            for name, metadata in self._get_fn_metadata().items():
+                if "default" in metadata and name in properties:
+                    properties[name].setdefault("default", metadata["default"])
+            schema = {**schema, "properties": properties}
+        if schema is None:
+            params = "..."
+        elif "properties" in schema or len(schema) == 0:
+            params = _schema_to_params(
+                schema, max_description_chars=max_description_chars
+            )
+        else:
+            # not an object schema: keep it as it is, minified
+            try:
+                params = "args: " + json.dumps(
+                    schema, separators=(",", ":"), default=str
+                )
+            except Exception:
+                params = "args: " + str(schema)
+        description = _trim_description(self.description, max_description_chars)
+        return f"- `{self.name}({params})`: {description}"
+
+    def _get_validator(self) -> TypeAdapter | None:
+        assert self.fn is not None, "Function should be not-null to validate arguments"
+        if self._validator is None or self._validator[0] is not self.fn:
+            self._validator = (self.fn, _build_arguments_validator(self.fn))
+        return self._validator[1]
+
+    def input_schema(self) -> dict[str, Any] | None:
+        """
+        Get the JSON schema of the arguments of the tool.
+
+        Returns:
+            dict[str, Any] | None: JSON schema of the arguments, or None if it is not available.
+        """
+        if self.mcp_metadata is not None:
+            return self.mcp_metadata["input_schema"]
+        if self.fn is None:
+            return None
+        validator = self._get_validator()
+        if validator is None:
+            return None
+        try:
+            return validator.json_schema()
+        except Exception:
+            return None
+
+    def validate_args(self, args: dict[str, Any]) -> dict[str, Any]:
+        """
+        Validate and coerce the arguments of a tool call against the signature of the tool function.
+
+        Args:
+            args (dict[str, Any]): Arguments for the tool call
+        Returns:
+            dict[str, Any]: Validated arguments.
+        Raises:
+            ValueError: If the arguments are not valid, with a description of each error.
+        """
+        validator = self._get_validator()
+        if validator is None:
+            return args
+        try:
+            return validator.validate_python(args)
+        except ValidationError as e:
+            raise ValueError(_format_validation_error(self.name, e)) from None
+
     async def execute(self, args: dict[str, Any]) -> Any:
         """
-        Execute the tool given a dictionary of arguments.
+        Execute the tool given a dictionary of arguments, validating them first.
 
         Args:
             args (dict[str, Any]): Arguments for the tool call
         """
         assert self.fn is not None, "Function should be non-null for tool execution"
+        try:
+            args = self.validate_args(args)
+        except ValueError as e:
+            return str(e)
         if inspect.iscoroutinefunction(self.fn):
             try:
                 result = await self.fn(**args)
@@ -0,0 +1,326 @@
+import asyncio
+import base64
+import json
+import logging
+import sqlite3
+
+from pathlib import Path
+from typing import Literal, cast
+from typing_extensions import TypedDict
+from .llms.models import ChatMessage
+from .constants import (
+    SESSION_FLUSH_INTERVAL,
+    SESSION_FLUSH_MAX_PENDING,
+    SESSIONS_PAGE_SIZE,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    cwd TEXT NOT NULL,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    parent_id TEXT,
+    fork_len INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at DESC, session_id DESC);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+"""
+
+
+class StoredSession(TypedDict):
+    """
+    Represents the metadata of a persisted session.
+    """
+
+    session_id: str
+    cwd: str
+    title: str
+    created_at: str
+    updated_at: str
+
+
+def _encode_cursor(session: StoredSession) -> str:
+    payload = json.dumps([session["updated_at"], session["session_id"]])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        updated_at, session_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return str(updated_at), str(session_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+
+
+class SessionStore:
+    """
+    SQLite-backed store of the sessions and of their chat history. Messages are queued as they are produced and written in batches (write-behind): when enough of them are pending, after a short delay, or when `flush` is called.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = ":memory:",
+        flush_interval: float = SESSION_FLUSH_INTERVAL,
+        max_pending: int = SESSION_FLUSH_MAX_PENDING,
+    ) -> None:
+        """
+        Open (and create, if needed) the store.
+
+        Args:
+            path (str | Path): SQLite database file. Defaults to an in-memory database, which does not outlive the process.
+            flush_interval (float): Seconds after which queued messages are written.
+            max_pending (int): Number of queued messages after which they are written right away.
+        """
+        self.path = str(path)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.commit()
+        self._pending: list[tuple[str, str, str]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    def _migrate(self) -> None:
+        # databases created before sessions could be forked lack the lineage columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "parent_id" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN parent_id TEXT")
+        if "fork_len" not in columns:
+            self._conn.execute(
+                "ALTER TABLE sessions ADD COLUMN fork_len INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def next_session_number(self) -> int:
+        """
+        Get the smallest number greater than all the numeric session IDs in the store, so that new sessions do not reuse the ID of a persisted one.
+
+        Returns:
+            int: Next session number.
+        """
+        row = self._conn.execute(
+            "SELECT MAX(CAST(session_id AS INTEGER)) FROM sessions WHERE session_id NOT GLOB '*[^0-9]*'"
+        ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def save_session(self, session: StoredSession) -> None:
+        """
+        Create or update the metadata of a session.
+
+        Args:
+            session (StoredSession): Session metadata.
+        """
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, cwd, title, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET cwd = excluded.cwd, title = excluded.title, updated_at = excluded.updated_at",
+            (
+                session["session_id"],
+                session["cwd"],
+                session["title"],
+                session["created_at"],
+                session["updated_at"],
+            ),
+        )
+        self._conn.commit()
+
+    def fork_session(self, parent_id: str, session: StoredSession) -> None:
+        """
+        Store a fork of a session. Its history is not copied: the fork references the messages the parent has at the time of the fork, and only stores the ones appended afterwards.
+
+        Args:
+            parent_id (str): Identifier of the forked session.
+            session (StoredSession): Metadata of the fork.
+        Raises:
+            ValueError: If the parent session is not stored.
+        """
+        if self.get_session(parent_id) is None:
+            raise ValueError(f"Session {parent_id} does not exist")
+        # the messages of the parent that are still queued belong to the shared prefix
+        self.flush()
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, cwd, title, created_at, updated_at, parent_id, fork_len) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                session["session_id"],
+                session["cwd"],
+                session["title"],
+                session["created_at"],
+                session["updated_at"],
+                parent_id,
+                self.count_messages(parent_id),
+            ),
+        )
+        self._conn.commit()
+
+    def count_messages(self, session_id: str) -> int:
+        """
+        Count the messages of a session, including the ones shared with the session it was forked from.
+
+        Args:
+            session_id (str): Session identifier.
+        Returns:
+            int: Number of messages.
+        """
+        self.flush()
+        row = self._conn.execute(
+            "SELECT fork_len, (SELECT COUNT(*) FROM messages WHERE session_id = ?) FROM sessions WHERE session_id = ?",
+            (session_id, session_id),
+        ).fetchone()
+        if row is None:
+            return 0
+        return row[0] + row[1]
+
+    def get_session(self, session_id: str) -> StoredSession | None:
+        """
+        Get the metadata of a session.
+
+        Args:
+            session_id (str): Session identifier.
+        Returns:
+            StoredSession | None: Session metadata, or None if the session is not stored.
+        """
+        row = self._conn.execute(
+            "SELECT session_id, cwd, title, created_at, updated_at FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return StoredSession(
+            session_id=row[0],
+            cwd=row[1],
+            title=row[2],
+            created_at=row[3],
+            updated_at=row[4],
+        )
+
+    def list_sessions(
+        self,
+        cursor: str | None = None,
+        cwd: str | None = None,
+        limit: int = SESSIONS_PAGE_SIZE,
+    ) -> tuple[list[StoredSession], str | None]:
+        """
+        List the sessions, from the most recently updated one, one page at a time.
+
+        Args:
+            cursor (str | None): Cursor returned with the previous page, None for the first page.
+            cwd (str | None): Only list the sessions with this working directory.
+            limit (int): Maximum number of sessions per page.
+        Returns:
+            tuple[list[StoredSession], str | None]: Sessions, and the cursor of the next page (None if this is the last page).
+        Raises:
+            ValueError: If the cursor is not valid.
+        """
+        query = "SELECT session_id, cwd, title, created_at, updated_at FROM sessions WHERE 1 = 1"
+        params: list[str | int] = []
+        if cwd is not None:
+            query += " AND cwd = ?"
+            params.append(cwd)
+        if cursor is not None:
+            updated_at, session_id = _decode_cursor(cursor)
+            query += " AND (updated_at < ? OR (updated_at = ? AND session_id < ?))"
+            params.extend([updated_at, updated_at, session_id])
+        query += " ORDER BY updated_at DESC, session_id DESC LIMIT ?"
+        # one more row tells whether there is a next page
+        params.append(limit + 1)
+        sessions = [
+            StoredSession(
+                session_id=row[0],
+                cwd=row[1],
+                title=row[2],
+                created_at=row[3],
+                updated_at=row[4],
+            )
+            for row in self._conn.execute(query, params)
+        ]
+        if len(sessions) > limit:
+            sessions = sessions[:limit]
+            return sessions, _encode_cursor(sessions[-1])
+        return sessions, None
+
+    def append(self, session_id: str, message: ChatMessage) -> None:
+        """
+        Queue a message of a session for writing.
+
+        Args:
+            session_id (str): Session identifier.
+            message (ChatMessage): Message to store.
+        """
+        self._pending.append((session_id, message.role, message.content))
+        if len(self._pending) >= self.max_pending:
+            self.flush()
+        elif self._flush_handle is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+                return
+            self._flush_handle = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self) -> None:
+        """
+        Write the queued messages, in a single transaction.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if len(self._pending) == 0:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
+                    pending,
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Could not store {len(pending)} session messages: {e}")
+
+    def load_messages(self, session_id: str) -> list[ChatMessage]:
+        """
+        Load the chat history of a session, starting with the messages shared with the session it was forked from (if any).
+
+        Args:
+            session_id (str): Session identifier.
+        Returns:
+            list[ChatMessage]: Messages of the session, in the order they were produced.
+        """
+        self.flush()
+        return self._load_messages(session_id, None)
+
+    def _load_messages(self, session_id: str, limit: int | None) -> list[ChatMessage]:
+        row = self._conn.execute(
+            "SELECT parent_id, fork_len FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        messages: list[ChatMessage] = []
+        if row is not None and row[0] is not None:
+            fork_len = row[1] if limit is None else min(row[1], limit)
+            messages = self._load_messages(row[0], fork_len)
+        if limit is not None and len(messages) >= limit:
+            return messages
+        messages.extend(
+            ChatMessage(
+                role=cast(Literal["user", "assistant", "system"], role), content=content
+            )
+            for role, content in self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id LIMIT ?",
+                (session_id, -1 if limit is None else limit - len(messages)),
+            )
+        )
+        return messages
+
+    def close(self) -> None:
+        """
+        Write the queued messages and close the database.
+        """
+        self.flush()
+        self._conn.close()
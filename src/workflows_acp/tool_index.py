@@ -0,0 +1,98 @@
+import math
+import re
+
+from collections import Counter
+from .models import Tool, mcp_tool_name
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_CAMEL_CASE_PATTERN = re.compile(r"([a-z0-9])([A-Z])")
+
+
+def _tokenize(text: str) -> list[str]:
+    """
+    Split a text into lowercase alphanumeric tokens, also splitting identifiers such as `read_file` or `getLibraryDocs`.
+
+    Args:
+        text (str): Text to tokenize.
+    Returns:
+        list[str]: Tokens.
+    """
+    return _TOKEN_PATTERN.findall(_CAMEL_CASE_PATTERN.sub(r"\1 \2", text).lower())
+
+
+def _tool_document(tool: Tool) -> list[str]:
+    name = tool.name
+    if tool.mcp_metadata is not None:
+        name = name.removeprefix(mcp_tool_name(tool.mcp_metadata["server"], ""))
+    # names are the most specific signal, so they count twice
+    tokens = _tokenize(name) * 2
+    tokens += _tokenize(tool.description)
+    if tool.mcp_metadata is not None:
+        tokens += _tokenize(tool.mcp_metadata["server"])
+        schema = tool.mcp_metadata["input_schema"] or {}
+        properties = schema.get("properties")
+        if isinstance(properties, dict):
+            tokens += _tokenize(" ".join(properties))
+    return tokens
+
+
+class ToolIndex:
+    """
+    BM25 index over the names and descriptions of tools (and, for MCP tools, the server and parameter names), used to select the tools relevant to a request.
+
+    Term frequencies are stored as sparse postings lists: a query only touches the tools that share a term with it.
+    """
+
+    def __init__(self, tools: list[Tool], k1: float = 1.5, b: float = 0.75) -> None:
+        """
+        Build the index.
+
+        Args:
+            tools (list[Tool]): Tools to index.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalization.
+        """
+        self.tools = tools
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        for i, tool in enumerate(tools):
+            tokens = _tool_document(tool)
+            self._lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                self._postings.setdefault(term, []).append((i, frequency))
+        self._average_length = (
+            sum(self._lengths) / len(self._lengths) if len(self._lengths) > 0 else 0.0
+        )
+        n_tools = len(tools)
+        self._idf = {
+            term: math.log(1 + (n_tools - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, top_k: int) -> list[Tool]:
+        """
+        Find the tools most relevant to a query.
+
+        Args:
+            query (str): Query (e.g. the request of the user).
+            top_k (int): Maximum number of tools to return.
+        Returns:
+            list[Tool]: Matching tools, from the most to the least relevant.
+        """
+        scores: dict[int, float] = {}
+        for term in set(_tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            idf = self._idf[term]
+            for i, frequency in postings:
+                norm = self.k1 * (
+                    1 - self.b + self.b * self._lengths[i] / self._average_length
+                )
+                scores[i] = scores.get(i, 0.0) + idf * frequency * (self.k1 + 1) / (
+                    frequency + norm
+                )
+        ranked = sorted(scores, key=lambda i: (-scores[i], i))
+        return [self.tools[i] for i in ranked[:top_k]]
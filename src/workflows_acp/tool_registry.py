@@ -0,0 +1,125 @@
+from typing import Iterator
+from .models import Tool
+
+
+class ToolRegistry:
+    """
+    Tools available to the LLM, mapped by name for constant-time lookups. The tools of each MCP server are tracked as well, so that they can be replaced or removed at runtime (e.g. when a server is hot-plugged or notifies that its tools changed) without rebuilding the registry.
+    """
+
+    def __init__(self, tools: list[Tool] | None = None) -> None:
+        """
+        Initialize the registry.
+
+        Args:
+            tools (list[Tool] | None): Initial tools.
+        Raises:
+            ValueError: If two tools have the same name.
+        """
+        self._tools: dict[str, Tool] = {}
+        # names of the tools of each MCP server (dicts are used as ordered sets)
+        self._servers: dict[str, dict[str, None]] = {}
+        for tool in tools or []:
+            if not self.add(tool):
+                raise ValueError("All the tools provided should have different names")
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __iter__(self) -> Iterator[Tool]:
+        return iter(self._tools.values())
+
+    def get(self, name: str) -> Tool | None:
+        """
+        Get a tool by name.
+
+        Args:
+            name (str): Name of the tool.
+        Returns:
+            Tool | None: The tool, or None if no tool has that name.
+        """
+        return self._tools.get(name)
+
+    def add(self, tool: Tool) -> bool:
+        """
+        Register a tool, unless its name is already taken.
+
+        Args:
+            tool (Tool): Tool to register.
+        Returns:
+            bool: True if the tool was registered.
+        """
+        if tool.name in self._tools:
+            return False
+        self._tools[tool.name] = tool
+        if tool.mcp_metadata is not None:
+            self._servers.setdefault(tool.mcp_metadata["server"], {})[tool.name] = None
+        return True
+
+    def add_all(self, tools: list[Tool]) -> list[Tool]:
+        """
+        Register several tools, skipping the ones whose name is already taken.
+
+        Args:
+            tools (list[Tool]): Tools to register.
+        Returns:
+            list[Tool]: Tools that were registered.
+        """
+        return [tool for tool in tools if self.add(tool)]
+
+    def remove(self, name: str) -> Tool | None:
+        """
+        Unregister a tool.
+
+        Args:
+            name (str): Name of the tool.
+        Returns:
+            Tool | None: The removed tool, or None if no tool has that name.
+        """
+        tool = self._tools.pop(name, None)
+        if tool is not None and tool.mcp_metadata is not None:
+            names = self._servers.get(tool.mcp_metadata["server"])
+            if names is not None:
+                names.pop(name, None)
+                if len(names) == 0:
+                    del self._servers[tool.mcp_metadata["server"]]
+        return tool
+
+    def server_tools(self, server: str) -> list[Tool]:
+        """
+        Get the registered tools of an MCP server.
+
+        Args:
+            server (str): Name of the server.
+        Returns:
+            list[Tool]: Tools of the server.
+        """
+        return [self._tools[name] for name in self._servers.get(server, {})]
+
+    def remove_server(self, server: str) -> list[Tool]:
+        """
+        Unregister all the tools of an MCP server.
+
+        Args:
+            server (str): Name of the server.
+        Returns:
+            list[Tool]: Removed tools.
+        """
+        names = self._servers.pop(server, {})
+        return [self._tools.pop(name) for name in names]
+
+    def set_server_tools(self, server: str, tools: list[Tool]) -> list[Tool]:
+        """
+        Replace the tools of an MCP server, skipping the new tools whose name is taken by a tool of another server.
+
+        Args:
+            server (str): Name of the server.
+            tools (list[Tool]): New tools of the server.
+        Returns:
+            list[Tool]: Tools that were registered.
+        """
+        self.remove_server(server)
+        return self.add_all(tools)
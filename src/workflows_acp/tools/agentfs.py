@@ -1,13 +1,31 @@
+import asyncio
+import bisect
+import hashlib
 import os
 import re
 
 from agentfs_sdk import AgentFS, AgentFSOptions
 from agentfs_sdk.errors import ErrnoException
+from agentfs_sdk.filesystem import S_IFDIR, S_IFMT, S_IFREG
 from rich.progress import track
+from collections import OrderedDict
 from pathlib import Path
 from typing import cast, Literal
+from typing_extensions import NotRequired, TypedDict
+from .filesystem import DirEntry, _render_dir_content
 from .todo import _find_git_root
-from ..constants import AGENTFS_FILE, DEFAULT_TO_AVOID, DEFAULT_TO_AVOID_FILES
+from .walker import WorkspaceWalker, looks_binary
+from ..constants import (
+    AGENTFS_FILE,
+    AGENTFS_MANIFEST_KEY,
+    AGENTFS_MAX_CONCURRENT_READS,
+    AGENTFS_READ_CACHE_MAX_SIZE,
+    BINARY_SNIFF_SIZE,
+    DEFAULT_MAX_FILE_SIZE,
+)
+
+
+_ROOT_INO = 1
 
 
 def _add_to_gitignore(git_root: Path) -> None:
@@ -29,46 +47,645 @@ async def configure_agentfs() -> AgentFS:
     return await AgentFS.open(AgentFSOptions(path=str(AGENTFS_FILE)))
 
 
-async def _load_noprogress(
-    agentfs: AgentFS, dirs_to_avoid: list[str], files_to_avoid: list[str]
-) -> None:
-    for root, dirs, files in os.walk(Path.cwd()):
-        dirs[:] = [d for d in dirs if d not in dirs_to_avoid]
-        files[:] = [f for f in files if f not in files_to_avoid]
-        for file in files:
-            path = os.path.join(root, file)
-            with open(path, "rb") as f:
-                content = f.read()
-                await agentfs.fs.write_file(path, content=content)
+class ManifestEntry(TypedDict):
+    """
+    Represents the state of a local file at the time it was uploaded to AgentFS (or skipped, for binary files).
+    """
 
+    size: int
+    mtime_ns: int
+    sha256: str
+    # set for the binary files that were skipped, so that they are not read again until they change
+    binary: NotRequired[bool]
 
-async def _load_progress(
-    agentfs: AgentFS, dirs_to_avoid: list[str], files_to_avoid: list[str]
-) -> None:
-    for root, dirs, files in track(
-        os.walk(Path.cwd()), description="Uploading files to AgentFS"
+
+class SyncReport(TypedDict):
+    """
+    Represents the outcome of an incremental synchronization with AgentFS.
+    """
+
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+
+
+def _read_local_file(path: str) -> tuple[bytes, ManifestEntry]:
+    with open(path, "rb") as f:
+        content = f.read()
+        stat = os.fstat(f.fileno())
+    entry = ManifestEntry(
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        sha256=hashlib.sha256(content).hexdigest(),
+    )
+    return content, entry
+
+
+def _sniff_local_file(path: str) -> ManifestEntry | None:
+    # reads only the beginning of the file: returns the entry recording it as skipped if it looks binary
+    with open(path, "rb") as f:
+        head = f.read(BINARY_SNIFF_SIZE)
+        stat = os.fstat(f.fileno())
+    if not looks_binary(head):
+        return None
+    return ManifestEntry(
+        size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256="", binary=True
+    )
+
+
+async def _unlink(agentfs: AgentFS, path: str) -> None:
+    try:
+        await agentfs.fs.unlink(path)
+    except ErrnoException:
+        pass
+
+
+async def _read_manifest(agentfs: AgentFS) -> dict[str, ManifestEntry]:
+    manifest = await agentfs.kv.get(AGENTFS_MANIFEST_KEY)
+    return cast(dict[str, ManifestEntry], manifest or {})
+
+
+async def _write_manifest(agentfs: AgentFS, manifest: dict[str, ManifestEntry]) -> None:
+    await agentfs.kv.set(AGENTFS_MANIFEST_KEY, manifest)
+
+
+async def _load_files(
+    agentfs: AgentFS, walker: WorkspaceWalker, progress: bool, skip_binary: bool
+) -> dict[str, ManifestEntry]:
+    manifest: dict[str, ManifestEntry] = {}
+    paths = list(walker.walk())
+    for path in (
+        track(paths, description="Uploading files to AgentFS") if progress else paths
     ):
-        dirs[:] = [d for d in dirs if d not in dirs_to_avoid]
-        files[:] = [f for f in files if f not in files_to_avoid]
-        for file in files:
-            path = os.path.join(root, file)
-            with open(path, "rb") as f:
-                content = f.read()
-                await agentfs.fs.write_file(path, content=content)
+        skipped = _sniff_local_file(path) if skip_binary else None
+        if skipped is not None:
+            manifest[path] = skipped
+            continue
+        content, entry = _read_local_file(path)
+        await agentfs.fs.write_file(path, content=content)
+        manifest[path] = entry
+    return manifest
 
 
 async def load_all_files(
     to_avoid_dirs: list[str] | None = None,
     to_avoid_files: list[str] | None = None,
     progress: bool = False,
+    max_file_size: int | None = DEFAULT_MAX_FILE_SIZE,
+    skip_binary: bool = True,
 ) -> None:
+    """
+    Upload the files in the current directory to AgentFS.
+
+    Files and directories excluded by name, by `.gitignore`/`.ignore` files or because they are too big are skipped, and so are binary files unless `skip_binary` is False.
+
+    Args:
+        to_avoid_dirs (list[str] | None): Directories to exclude from the upload.
+        to_avoid_files (list[str] | None): Files to exclude from the upload.
+        progress (bool): Whether to display a progress bar.
+        max_file_size (int | None): Maximum size (in bytes) of the uploaded files. None disables the limit.
+        skip_binary (bool): Whether to skip binary files (detected from their first bytes). Pass False when tools read binary documents, such as PDFs, from AgentFS.
+    """
     agentfs = await configure_agentfs()
-    dirs_to_avoid = to_avoid_dirs or DEFAULT_TO_AVOID
-    files_to_avoid = to_avoid_files or DEFAULT_TO_AVOID_FILES
-    if progress:
-        await _load_progress(agentfs, dirs_to_avoid, files_to_avoid)
-    else:
-        await _load_noprogress(agentfs, dirs_to_avoid, files_to_avoid)
+    walker = WorkspaceWalker(Path.cwd(), to_avoid_dirs, to_avoid_files, max_file_size)
+    manifest = await _load_files(agentfs, walker, progress, skip_binary)
+    await _write_manifest(agentfs, manifest)
+    path_index.invalidate()
+    read_cache.clear()
+
+
+async def sync_all_files(
+    to_avoid_dirs: list[str] | None = None,
+    to_avoid_files: list[str] | None = None,
+    progress: bool = False,
+    max_file_size: int | None = DEFAULT_MAX_FILE_SIZE,
+    skip_binary: bool = True,
+) -> SyncReport:
+    """
+    Incrementally synchronize the files in the current directory with AgentFS.
+
+    Only files whose size, modification time and content hash differ from the manifest stored in AgentFS are uploaded, and files that were previously uploaded but are no longer on disk are removed.
+
+    Args:
+        to_avoid_dirs (list[str] | None): Directories to exclude from the synchronization.
+        to_avoid_files (list[str] | None): Files to exclude from the synchronization.
+        progress (bool): Whether to display a progress bar.
+        max_file_size (int | None): Maximum size (in bytes) of the uploaded files. None disables the limit.
+        skip_binary (bool): Whether to skip binary files (detected from their first bytes). Skipped files are recorded, and only sniffed again when they change.
+    Returns:
+        SyncReport: Number of added, updated, removed and unchanged files (skipped binary files are not counted).
+    """
+    agentfs = await configure_agentfs()
+    walker = WorkspaceWalker(Path.cwd(), to_avoid_dirs, to_avoid_files, max_file_size)
+    manifest = await _read_manifest(agentfs)
+    report = SyncReport(added=0, updated=0, removed=0, unchanged=0)
+    paths = list(walker.walk())
+    seen: set[str] = set()
+    for path in (
+        track(paths, description="Syncing files to AgentFS") if progress else paths
+    ):
+        previous = manifest.get(path)
+        was_binary = previous is not None and previous.get("binary", False)
+        if previous is not None and (skip_binary or not was_binary):
+            stat = os.stat(path)
+            if (
+                previous["size"] == stat.st_size
+                and previous["mtime_ns"] == stat.st_mtime_ns
+            ):
+                seen.add(path)
+                if not was_binary:
+                    report["unchanged"] += 1
+                continue
+        skipped = _sniff_local_file(path) if skip_binary else None
+        if skipped is not None:
+            seen.add(path)
+            manifest[path] = skipped
+            if previous is not None and not was_binary:
+                # it was uploaded while it was a text file
+                await _unlink(agentfs, path)
+                report["removed"] += 1
+            continue
+        content, entry = _read_local_file(path)
+        seen.add(path)
+        manifest[path] = entry
+        if was_binary:
+            previous = None
+        if previous is not None and previous["sha256"] == entry["sha256"]:
+            # only the metadata changed (e.g. the file was touched)
+            report["unchanged"] += 1
+            continue
+        await agentfs.fs.write_file(path, content=content)
+        if previous is None:
+            report["added"] += 1
+        else:
+            report["updated"] += 1
+    for path in [p for p in manifest if p not in seen]:
+        if not manifest.pop(path).get("binary", False):
+            await _unlink(agentfs, path)
+            report["removed"] += 1
+    await _write_manifest(agentfs, manifest)
+    path_index.invalidate()
+    read_cache.clear()
+    return report
+
+
+class AgentFSOverlay:
+    """
+    Tracks whether the AgentFS tools lazily read through to the real filesystem instead of relying on an eager upload.
+
+    When enabled, files under the overlay root are copied into AgentFS the first time they are accessed, writes only ever go to AgentFS and directory listings merge both layers.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the overlay in disabled mode.
+        """
+        self.enabled: bool = False
+        self.walker: WorkspaceWalker = WorkspaceWalker()
+        self.skip_binary: bool = True
+
+    def enable(
+        self,
+        to_avoid_dirs: list[str] | None = None,
+        to_avoid_files: list[str] | None = None,
+        max_file_size: int | None = DEFAULT_MAX_FILE_SIZE,
+        skip_binary: bool = True,
+    ) -> None:
+        """
+        Enable the overlay, rooting it at the current working directory.
+
+        Args:
+            to_avoid_dirs (list[str] | None): Directories that should never be read through.
+            to_avoid_files (list[str] | None): Files that should never be read through.
+            max_file_size (int | None): Files bigger than this (in bytes) are never read through. None disables the limit.
+            skip_binary (bool): Whether binary files are never read through.
+        """
+        self.enabled = True
+        self.skip_binary = skip_binary
+        self.walker = WorkspaceWalker(
+            Path.cwd(), to_avoid_dirs, to_avoid_files, max_file_size
+        )
+
+    def disable(self) -> None:
+        """
+        Disable the overlay.
+        """
+        self.enabled = False
+
+    def is_visible(self, path: str) -> bool:
+        """
+        Check whether a path of the real filesystem can be exposed through the overlay.
+
+        Args:
+            path (str): Absolute path on the real filesystem.
+        Returns:
+            bool: True if the overlay is enabled and the path is under its root and not excluded.
+        """
+        return self.enabled and not self.walker.is_ignored(path)
+
+
+overlay = AgentFSOverlay()
+
+
+async def _exists(agentfs: AgentFS, path: str) -> bool:
+    try:
+        await agentfs.fs.stat(path)
+        return True
+    except ErrnoException:
+        return False
+
+
+async def _read_through(agentfs: AgentFS, path: str) -> None:
+    """
+    Copy a file from the real filesystem into AgentFS on first access, if the overlay is enabled.
+
+    Args:
+        agentfs (AgentFS): AgentFS instance.
+        path (str): Absolute path of the file.
+    """
+    if not overlay.is_visible(path) or not os.path.isfile(path):
+        return
+    if await _exists(agentfs, path):
+        return
+    if overlay.skip_binary and _sniff_local_file(path) is not None:
+        return
+    with open(path, "rb") as f:
+        content = f.read()
+    await agentfs.fs.write_file(path, content=content)
+    path_index.add(path)
+
+
+async def _is_directory(agentfs: AgentFS, directory: str) -> bool:
+    if overlay.is_visible(directory) and os.path.isdir(directory):
+        return True
+    return await _is_accessible_path(agentfs, directory, "dir")
+
+
+async def _readdir_stats(
+    agentfs: AgentFS, directory: str
+) -> list[tuple[str, bool, int]]:
+    """
+    List the children of an AgentFS directory together with their type and size, using a single query instead of one `stat` per child.
+
+    Args:
+        agentfs (AgentFS): AgentFS instance.
+        directory (str): Absolute path of the directory.
+    Returns:
+        list[tuple[str, bool, int]]: Name, whether the child is a file, and size of each child, sorted by name. Empty if the directory does not exist.
+    """
+    try:
+        stats = await agentfs.fs.stat(directory)
+    except ErrnoException:
+        return []
+    if not stats.is_directory():
+        return []
+    cursor = await agentfs.get_database().execute(
+        """
+        SELECT d.name, i.mode, i.size
+        FROM fs_dentry d JOIN fs_inode i ON i.ino = d.ino
+        WHERE d.parent_ino = ?
+        ORDER BY d.name ASC
+        """,
+        (stats.ino,),
+    )
+    rows = await cursor.fetchall()
+    return [(row[0], (row[1] & S_IFMT) == S_IFREG, row[2]) for row in rows]
+
+
+async def _list_children(
+    agentfs: AgentFS, directory: str
+) -> dict[str, tuple[bool, int]]:
+    """
+    List the children of a directory, merging the real filesystem (if the overlay is enabled) and AgentFS.
+
+    Args:
+        agentfs (AgentFS): AgentFS instance.
+        directory (str): Absolute path of the directory.
+    Returns:
+        dict[str, tuple[bool, int]]: Mapping between child names, whether they are files and their size. AgentFS entries take precedence.
+    """
+    children: dict[str, tuple[bool, int]] = {}
+    if overlay.is_visible(directory) and os.path.isdir(directory):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if overlay.is_visible(entry.path):
+                    is_file = entry.is_file()
+                    children[entry.name] = (
+                        is_file,
+                        entry.stat().st_size if is_file else 0,
+                    )
+    for name, is_file, size in await _readdir_stats(agentfs, directory):
+        children[name] = (is_file, size)
+    return children
+
+
+async def _scan_dir_agentfs(
+    agentfs: AgentFS, directory: str, depth: int, max_depth: int
+) -> list[DirEntry]:
+    entries: list[DirEntry] = []
+    children = await _list_children(agentfs, directory)
+    for name in sorted(children):
+        fullpath = os.path.join(directory, name)
+        is_file, size = children[name]
+        entries.append(DirEntry(path=fullpath, is_file=is_file, size=size, depth=depth))
+        if not is_file and depth < max_depth:
+            entries.extend(
+                await _scan_dir_agentfs(agentfs, fullpath, depth + 1, max_depth)
+            )
+    return entries
+
+
+class AgentFSPathIndex:
+    """
+    In-memory index of the file paths stored in AgentFS, used by recursive glob and grep to avoid walking the virtual filesystem one directory at a time.
+
+    The index is built with a single query the first time it is needed, and kept up to date by the AgentFS tools when files are written.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty, not yet built, index.
+        """
+        self._files: set[str] = set()
+        self._sorted: list[str] | None = None
+        # database the index was built from: the index is rebuilt if the working directory (and thus the database) changes
+        self._db_path: Path | None = None
+
+    @property
+    def is_built(self) -> bool:
+        return self._db_path is not None
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._files
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    async def build(self, agentfs: AgentFS) -> None:
+        """
+        (Re)build the index from the AgentFS database.
+
+        Args:
+            agentfs (AgentFS): AgentFS instance.
+        """
+        cursor = await agentfs.get_database().execute(
+            """
+            SELECT d.parent_ino, d.name, d.ino, i.mode
+            FROM fs_dentry d JOIN fs_inode i ON i.ino = d.ino
+            """
+        )
+        rows = await cursor.fetchall()
+        children: dict[int, list[tuple[str, int, int]]] = {}
+        for parent_ino, name, ino, mode in rows:
+            children.setdefault(parent_ino, []).append((name, ino, mode))
+        files: set[str] = set()
+        stack: list[tuple[int, str]] = [(_ROOT_INO, "")]
+        while stack:
+            ino, prefix = stack.pop()
+            for name, child_ino, mode in children.get(ino, []):
+                path = prefix + "/" + name
+                if (mode & S_IFMT) == S_IFDIR:
+                    stack.append((child_ino, path))
+                elif (mode & S_IFMT) == S_IFREG:
+                    files.add(path)
+        self._files = files
+        self._sorted = None
+        self._db_path = AGENTFS_FILE.resolve()
+
+    async def ensure_built(self, agentfs: AgentFS) -> None:
+        """
+        Build the index if it has not been built yet, or if it was built from a different database.
+
+        Args:
+            agentfs (AgentFS): AgentFS instance.
+        """
+        if self._db_path != AGENTFS_FILE.resolve():
+            await self.build(agentfs)
+
+    def add(self, path: str) -> None:
+        """
+        Register a file written to AgentFS.
+
+        Args:
+            path (str): Absolute path of the file.
+        """
+        if self.is_built and path not in self._files:
+            self._files.add(path)
+            self._sorted = None
+
+    def remove(self, path: str) -> None:
+        """
+        Unregister a file removed from AgentFS.
+
+        Args:
+            path (str): Absolute path of the file.
+        """
+        if path in self._files:
+            self._files.discard(path)
+            self._sorted = None
+
+    def invalidate(self) -> None:
+        """
+        Drop the index, so that it is rebuilt the next time it is needed.
+        """
+        self._files = set()
+        self._sorted = None
+        self._db_path = None
+
+    def files_under(self, directory: str) -> list[str]:
+        """
+        Return the sorted paths of all the files under a directory, at any depth.
+
+        Args:
+            directory (str): Absolute path of the directory.
+        Returns:
+            list[str]: Sorted file paths.
+        """
+        if self._sorted is None:
+            self._sorted = sorted(self._files)
+        prefix = directory.rstrip("/") + "/"
+        start = bisect.bisect_left(self._sorted, prefix)
+        end = bisect.bisect_left(self._sorted, prefix[:-1] + chr(ord("/") + 1))
+        return self._sorted[start:end]
+
+
+path_index = AgentFSPathIndex()
+
+
+class ReadCacheStats(TypedDict):
+    """
+    Represents the hit-rate metrics of the AgentFS read cache.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+    hit_rate: float
+
+
+class AgentFSReadCache:
+    """
+    Size-bounded LRU cache of the (decoded) content of the files read from AgentFS, so that files the agent reads or edits repeatedly are not fetched and decoded from SQLite every time.
+
+    The cache is write-through: the AgentFS tools update it when they write a file, and it is cleared when AgentFS is loaded or synced.
+    """
+
+    def __init__(self, max_size: int = AGENTFS_READ_CACHE_MAX_SIZE) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size (int): Maximum total size of the cached contents, in characters.
+        """
+        self.max_size = max_size
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._size = 0
+        self._db_path: Path | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_db(self) -> None:
+        # the cache only holds content from the database of the current working directory
+        db_path = AGENTFS_FILE.resolve()
+        if self._db_path != db_path:
+            self.clear()
+            self._db_path = db_path
+
+    def get(self, path: str) -> str | None:
+        """
+        Get the cached content of a file, marking it as recently used.
+
+        Args:
+            path (str): Absolute path of the file.
+        Returns:
+            str | None: Cached content, or None if the file is not cached.
+        """
+        self._check_db()
+        content = self._entries.get(path)
+        if content is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(path)
+        self.hits += 1
+        return content
+
+    def put(self, path: str, content: str) -> None:
+        """
+        Cache the content of a file, evicting the least recently used files if the cache is full.
+
+        Args:
+            path (str): Absolute path of the file.
+            content (str): Content of the file.
+        """
+        self._check_db()
+        self.invalidate(path)
+        if len(content) > self.max_size:
+            return
+        self._entries[path] = content
+        self._size += len(content)
+        while self._size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        """
+        Remove a file from the cache.
+
+        Args:
+            path (str): Absolute path of the file.
+        """
+        content = self._entries.pop(path, None)
+        if content is not None:
+            self._size -= len(content)
+
+    def clear(self) -> None:
+        """
+        Remove all the files from the cache (metrics are preserved).
+        """
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> ReadCacheStats:
+        """
+        Get the hit-rate metrics of the cache.
+
+        Returns:
+            ReadCacheStats: Cache metrics.
+        """
+        total = self.hits + self.misses
+        return ReadCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self._entries),
+            size=self._size,
+            hit_rate=self.hits / total if total > 0 else 0.0,
+        )
+
+
+read_cache = AgentFSReadCache()
+
+
+async def _read_text(agentfs: AgentFS, path: str) -> str:
+    """
+    Read a text file from AgentFS, going through the read cache.
+
+    Args:
+        agentfs (AgentFS): AgentFS instance.
+        path (str): Absolute path of the file (it must exist).
+    Returns:
+        str: Content of the file.
+    """
+    content = read_cache.get(path)
+    if content is None:
+        content = cast(str, await agentfs.fs.read_file(path))
+        read_cache.put(path, content)
+    return content
+
+
+async def _files_under(agentfs: AgentFS, directory: str) -> list[str]:
+    """
+    List all the files under a directory, at any depth, merging the real filesystem (if the overlay is enabled) and AgentFS.
+
+    Args:
+        agentfs (AgentFS): AgentFS instance.
+        directory (str): Absolute path of the directory.
+    Returns:
+        list[str]: Sorted file paths.
+    """
+    await path_index.ensure_built(agentfs)
+    files = path_index.files_under(directory)
+    if overlay.is_visible(directory) and os.path.isdir(directory):
+        merged = set(files)
+        merged.update(overlay.walker.walk(directory))
+        files = sorted(merged)
+    return files
+
+
+async def _read_for_search(
+    agentfs: AgentFS, path: str, semaphore: asyncio.Semaphore
+) -> str | None:
+    async with semaphore:
+        try:
+            if path in path_index:
+                cached = read_cache.get(path)
+                if cached is not None:
+                    return cached
+                text = cast(
+                    bytes, await agentfs.fs.read_file(path, encoding=None)
+                ).decode("utf-8")
+                read_cache.put(path, text)
+                return text
+            # only reached in overlay mode: search the real file without copying it
+            with open(path, "rb") as f:
+                return f.read().decode("utf-8")
+        except (ErrnoException, OSError, UnicodeDecodeError):
+            return None
 
 
 async def _is_accessible_path(
@@ -83,37 +700,28 @@ async def _is_accessible_path(
         return False
 
 
-async def describe_dir_content_agentfs(directory: str) -> str:
+async def describe_dir_content_agentfs(
+    directory: str, offset: int = 0, limit: int = 200, depth: int = 1
+) -> str:
     """
     Describe the contents of a directory, listing files and subfolders.
 
     Args:
         directory (str): Path to the directory.
+        offset (int): Number of entries to skip (for pagination).
+        limit (int): Maximum number of entries to list.
+        depth (int): How many levels to descend. A depth greater than 1 returns a tree with file sizes.
     Returns:
         str: Description of the directory contents or an error message.
     """
     agentfs = await configure_agentfs()
     directory = str(Path(directory).resolve())
-    if not await _is_accessible_path(agentfs, directory, "dir"):
+    if not await _is_directory(agentfs, directory):
         return f"Directory {directory} does not exist"
-    children = await agentfs.fs.readdir(directory)
-    if not children:
-        return f"Directory {directory} is empty"
-    description = f"Content of {directory}\n"
-    files = []
-    directories = []
-    for child in children:
-        fullpath = os.path.join(directory, child)
-        if (await agentfs.fs.stat(fullpath)).is_file():
-            files.append(fullpath)
-        else:
-            directories.append(fullpath)
-    description += "FILES:\n- " + "\n- ".join(files)
-    if not directories:
-        description += "\nThis folder does not have any sub-folders"
-    else:
-        description += "\nSUBFOLDERS:\n- " + "\n- ".join(directories)
-    return description
+    if offset < 0 or limit < 1 or depth < 1:
+        return "offset should be non-negative, while limit and depth should be positive"
+    entries = await _scan_dir_agentfs(agentfs, directory, 1, depth)
+    return _render_dir_content(directory, entries, offset, limit, depth)
 
 
 async def read_file_agentfs(file_path: str) -> str:
@@ -126,57 +734,139 @@ async def read_file_agentfs(file_path: str) -> str:
         str: File contents or an error message if the file does not exist.
     """
     file_path = str(Path(file_path).resolve())
+    cached = read_cache.get(file_path)
+    if cached is not None:
+        return cached
     agentfs = await configure_agentfs()
+    await _read_through(agentfs, file_path)
     if not await _is_accessible_path(agentfs, file_path, "file"):
         return f"No such file: {file_path}"
-    text = await agentfs.fs.read_file(file_path)
-    return cast(str, text)
+    text = cast(str, await agentfs.fs.read_file(file_path))
+    read_cache.put(file_path, text)
+    return text
+
 
+def _format_match(match: str | tuple[str, ...]) -> str:
+    return match if isinstance(match, str) else ", ".join(match)
 
-async def grep_file_content_agentfs(file_path: str, pattern: str) -> str:
+
+async def grep_file_content_agentfs(
+    file_path: str,
+    pattern: str,
+    path_pattern: str | None = None,
+    max_matches: int = 100,
+) -> str:
     """
-    Search for a regex pattern in a file's content and return all matches.
+    Search for a regex pattern in a file's content and return all matches. If a directory is provided, all the files under it are searched concurrently.
 
     Args:
-        file_path (str): Path to the file.
+        file_path (str): Path to the file or directory.
         pattern (str): Regex pattern to search for.
+        path_pattern (str | None): When searching a directory, only search files whose path (relative to the directory) matches this regex.
+        max_matches (int): Maximum number of matches to return.
     Returns:
         str: List of matches or a message if no matches are found.
     """
     file_path = str(Path(file_path).resolve())
     agentfs = await configure_agentfs()
+    r = re.compile(pattern=pattern, flags=re.MULTILINE)
+    if await _is_directory(agentfs, file_path):
+        return await _grep_dir(agentfs, file_path, r, path_pattern, max_matches)
+    await _read_through(agentfs, file_path)
     if not await _is_accessible_path(agentfs, file_path, "file"):
         return f"No such file: {file_path}"
-    content = await agentfs.fs.read_file(file_path)
-    r = re.compile(pattern=pattern, flags=re.MULTILINE)
-    matches = r.findall(cast(str, content))
+    content = await _read_text(agentfs, file_path)
+    matches = [_format_match(m) for m in r.findall(content)]
+    if matches:
+        result = f"MATCHES for {pattern} in {file_path}:\n\n- " + "\n- ".join(
+            matches[:max_matches]
+        )
+        if len(matches) > max_matches:
+            result += f"\n(showing the first {max_matches} of {len(matches)} matches)"
+        return result
+    return "No matches found"
+
+
+async def _grep_dir(
+    agentfs: AgentFS,
+    directory: str,
+    r: re.Pattern,
+    path_pattern: str | None,
+    max_matches: int,
+) -> str:
+    files = await _files_under(agentfs, directory)
+    if path_pattern is not None:
+        path_pat = re.compile(path_pattern)
+        files = [
+            f
+            for f in files
+            if path_pat.match(os.path.relpath(f, directory)) is not None
+        ]
+    semaphore = asyncio.Semaphore(AGENTFS_MAX_CONCURRENT_READS)
+    matches: list[str] = []
+    truncated = False
+    # read in batches, so that we can stop as soon as enough matches were found
+    batch_size = AGENTFS_MAX_CONCURRENT_READS * 4
+    for i in range(0, len(files), batch_size):
+        batch = files[i : i + batch_size]
+        contents = await asyncio.gather(
+            *[_read_for_search(agentfs, f, semaphore) for f in batch]
+        )
+        for path, content in zip(batch, contents, strict=True):
+            if content is None:
+                continue
+            relpath = os.path.relpath(path, directory)
+            for match in r.findall(content):
+                if len(matches) == max_matches:
+                    truncated = True
+                    break
+                matches.append(f"{relpath}: {_format_match(match)}")
+            if truncated:
+                break
+        if truncated:
+            break
     if matches:
-        return f"MATCHES for {pattern} in {file_path}:\n\n- " + "\n- ".join(matches)
+        result = f"MATCHES for {r.pattern} in {directory}:\n\n- " + "\n- ".join(matches)
+        if truncated:
+            result += f"\n(showing the first {max_matches} matches)"
+        return result
     return "No matches found"
 
 
-async def glob_paths_agentfs(directory: str, pattern: str) -> str:
+async def glob_paths_agentfs(
+    directory: str, pattern: str, recursive: bool = False, max_results: int = 200
+) -> str:
     """
     Find all paths in a directory matching a regex pattern.
 
     Args:
         directory (str): Path to the directory.
         pattern (str): Regex pattern to match files or folders.
+        recursive (bool): Whether to match the pattern against the paths (relative to the directory) of all the files under the directory, at any depth.
+        max_results (int): Maximum number of paths to return.
     Returns:
         str: List of matching paths or a message if no matches are found.
     """
     directory = str(Path(directory).resolve())
     agentfs = await configure_agentfs()
-    if not await _is_accessible_path(agentfs, directory, "dir"):
+    if not await _is_directory(agentfs, directory):
         return f"Directory {directory} does not exist"
-    entries = await agentfs.fs.readdir(directory)
+    if recursive:
+        entries = [
+            os.path.relpath(f, directory)
+            for f in await _files_under(agentfs, directory)
+        ]
+    else:
+        entries = sorted(await _list_children(agentfs, directory))
     pat = re.compile(pattern)
-    matches = []
-    for entry in entries:
-        if pat.match(entry) is not None:
-            matches.append(entry)
+    matches = [entry for entry in entries if pat.match(entry) is not None]
     if matches:
-        return f"MATCHES for {pattern} in {directory}:\n\n- " + "\n- ".join(matches)
+        result = f"MATCHES for {pattern} in {directory}:\n\n- " + "\n- ".join(
+            matches[:max_results]
+        )
+        if len(matches) > max_results:
+            result += f"\n(showing the first {max_results} of {len(matches)} matches)"
+        return result
     return "No matches found"
 
 
@@ -193,13 +883,19 @@ async def write_file_agentfs(file_path: str, content: str, overwrite: bool) -> s
     """
     file_path = str(Path(file_path).resolve())
     agentfs = await configure_agentfs()
-    if (await _is_accessible_path(agentfs, file_path, "file")) and not overwrite:
+    exists = await _is_accessible_path(agentfs, file_path, "file") or (
+        overlay.is_visible(file_path) and os.path.isfile(file_path)
+    )
+    if exists and not overwrite:
         return f"File {file_path} already exist and overwrite is set to False. Cannot proceed"
     else:
         try:
             await agentfs.fs.write_file(file_path, content=content, encoding="utf-8")
         except Exception as e:
+            read_cache.invalidate(file_path)
             return f"There was an error while writing the file: {e}"
+        path_index.add(file_path)
+        read_cache.put(file_path, content)
         return "File written with success"
 
 
@@ -219,13 +915,15 @@ async def edit_file_agentfs(
     """
     file_path = str(Path(file_path).resolve())
     agentfs = await configure_agentfs()
+    await _read_through(agentfs, file_path)
     if not await _is_accessible_path(agentfs, file_path, "file"):
         return f"No such file: {file_path}"
-    content = await agentfs.fs.read_file(file_path)
-    content = cast(str, content)
+    content = await _read_text(agentfs, file_path)
     content = content.replace(old_string, new_string, count)
     try:
         await agentfs.fs.write_file(file_path, content=content, encoding="utf-8")
     except Exception as e:
+        read_cache.invalidate(file_path)
         return f"An error occurred while editing the file: {e}"
+    read_cache.put(file_path, content)
     return "File edited with success"
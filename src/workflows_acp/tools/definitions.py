@@ -23,7 +23,7 @@ from .todo import create_todos, list_todos, update_todo
 
 describe_dir_content_tool = Tool(
     name="describe_dir_content",
-    description="Describes the contents of a directory, listing files and subfolders.",
+    description="Describes the contents of a directory, listing files and subfolders. Results are paginated with `offset` and `limit`; use `depth` greater than 1 to get a tree with file sizes.",
     fn=describe_dir_content,
 )
 
@@ -59,7 +59,7 @@ edit_file_tool = Tool(
 
 describe_dir_content_tool_agentfs = Tool(
     name="describe_dir_content",
-    description="Describes the contents of a directory, listing files and subfolders.",
+    description="Describes the contents of a directory, listing files and subfolders. Results are paginated with `offset` and `limit`; use `depth` greater than 1 to get a tree with file sizes.",
     fn=describe_dir_content_agentfs,
 )
 
@@ -71,13 +71,13 @@ read_file_tool_agentfs = Tool(
 
 grep_file_content_tool_agentfs = Tool(
     name="grep_file_content",
-    description="Searches for a regex pattern in a file and returns all matches.",
+    description="Searches for a regex pattern in a file and returns all matches. If a directory is given, all the files under it (optionally filtered by the `path_pattern` regex) are searched.",
     fn=grep_file_content_agentfs,
 )
 
 glob_paths_tool_agentfs = Tool(
     name="glob_paths",
-    description="Finds files and folders in a directory matching a regex pattern.",
+    description="Finds files and folders in a directory matching a regex pattern. Set `recursive` to match the pattern against the relative paths of all the files under the directory.",
     fn=glob_paths_agentfs,
 )
 
@@ -187,11 +187,6 @@ DefaultToolType = Literal[
 
 
 def filter_tools(names: list[DefaultToolType], use_agentfs: bool = False) -> list[Tool]:
-    tools: list[Tool] = []
     to_filter = TOOLS if not use_agentfs else AGENTFS_TOOLS
-    for name in names:
-        for tool in to_filter:
-            if tool.name == name:
-                tools.append(tool)
-                break
-    return tools
+    by_name = {tool.name: tool for tool in to_filter}
+    return [by_name[name] for name in names if name in by_name]
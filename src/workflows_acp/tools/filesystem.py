@@ -2,37 +2,113 @@ import glob
 import os
 import re
 
+from typing_extensions import TypedDict
 
-def describe_dir_content(directory: str) -> str:
+
+class DirEntry(TypedDict):
+    """
+    Represents an entry of a directory listing.
+    """
+
+    path: str
+    is_file: bool
+    size: int
+    depth: int
+
+
+def _render_dir_content(
+    directory: str, entries: list[DirEntry], offset: int, limit: int, depth: int
+) -> str:
+    """
+    Render a (paginated) directory listing, either flat or as a tree.
+
+    Args:
+        directory (str): Path to the listed directory.
+        entries (list[DirEntry]): Entries of the directory, in pre-order and sorted by name.
+        offset (int): Number of entries to skip.
+        limit (int): Maximum number of entries to render.
+        depth (int): Depth of the listing. A depth greater than 1 renders a tree.
+    Returns:
+        str: Description of the directory contents.
+    """
+    if not entries:
+        return f"Directory {directory} is empty"
+    if depth <= 1:
+        ordered = [e for e in entries if e["is_file"]] + [
+            e for e in entries if not e["is_file"]
+        ]
+    else:
+        ordered = entries
+    page = ordered[offset : offset + limit]
+    if not page:
+        return f"No more entries in {directory}: it has {len(ordered)} entries and offset is {offset}"
+    if depth <= 1:
+        files = [e["path"] for e in page if e["is_file"]]
+        directories = [e["path"] for e in page if not e["is_file"]]
+        sections: list[str] = []
+        if files:
+            sections.append("FILES:\n- " + "\n- ".join(files))
+        elif len(directories) == len(ordered):
+            sections.append("This folder does not have any files")
+        if directories:
+            sections.append("SUBFOLDERS:\n- " + "\n- ".join(directories))
+        elif all(e["is_file"] for e in ordered):
+            sections.append("This folder does not have any sub-folders")
+        description = f"Content of {directory}\n" + "\n".join(sections)
+    else:
+        description = f"Tree of {directory} (depth: {depth})"
+        for e in page:
+            indent = "  " * (e["depth"] - 1)
+            name = os.path.basename(e["path"])
+            if e["is_file"]:
+                description += f"\n{indent}- {name} ({e['size']} bytes)"
+            else:
+                description += f"\n{indent}- {name}/"
+    if offset + len(page) < len(ordered):
+        description += f"\nShowing entries {offset + 1}-{offset + len(page)} of {len(ordered)}: use offset={offset + len(page)} to see more"
+    return description
+
+
+def _scan_dir(directory: str, depth: int, max_depth: int) -> list[DirEntry]:
+    entries: list[DirEntry] = []
+    with os.scandir(directory) as it:
+        children = sorted(it, key=lambda entry: entry.name)
+    for child in children:
+        fullpath = os.path.join(directory, child.name)
+        is_file = child.is_file()
+        entries.append(
+            DirEntry(
+                path=fullpath,
+                is_file=is_file,
+                size=child.stat().st_size if is_file else 0,
+                depth=depth,
+            )
+        )
+        if not is_file and depth < max_depth:
+            entries.extend(_scan_dir(fullpath, depth + 1, max_depth))
+    return entries
+
+
+def describe_dir_content(
+    directory: str, offset: int = 0, limit: int = 200, depth: int = 1
+) -> str:
     """
     Describe the contents of a directory, listing files and subfolders.
 
     Args:
         directory (str): Path to the directory.
+        offset (int): Number of entries to skip (for pagination).
+        limit (int): Maximum number of entries to list.
+        depth (int): How many levels to descend. A depth greater than 1 returns a tree with file sizes.
     Returns:
         str: Description of the directory contents or an error message.
     """
     if not os.path.exists(directory) or not os.path.isdir(directory):
         return f"No such directory: {directory}"
-    children = os.listdir(directory)
-    if not children:
-        return f"Directory {directory} is empty"
-    description = f"Content of {directory}\n"
-    files = []
-    directories = []
-    for child in children:
-        fullpath = os.path.join(directory, child)
-        if os.path.isfile(fullpath):
-            files.append(fullpath)
-        else:
-            directories.append(fullpath)
-    files = sorted(files)
-    description += "FILES:\n- " + "\n- ".join(files)
-    if not directories:
-        description += "\nThis folder does not have any sub-folders"
-    else:
-        description += "\nSUBFOLDERS:\n- " + "\n- ".join(directories)
-    return description
+    if offset < 0 or limit < 1 or depth < 1:
+        return "offset should be non-negative, while limit and depth should be positive"
+    entries = _scan_dir(directory, 1, depth)
+    return _render_dir_content(directory, entries, offset, limit, depth)
 
 
 def read_file(file_path: str) -> str:
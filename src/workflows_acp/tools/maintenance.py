@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import time
+
+from agentfs_sdk import AgentFS, AgentFSOptions
+from agentfs_sdk.errors import ErrnoException
+from agentfs_sdk.filesystem import S_IFMT, S_IFREG
+from pathlib import Path
+from typing_extensions import TypedDict
+from .agentfs import ReadCacheStats, configure_agentfs, path_index, read_cache
+from ..constants import AGENTFS_FILE, AGENTFS_TABLES
+
+
+class AgentFSStats(TypedDict):
+    """
+    Represents the storage usage of the AgentFS database, and the hit-rate metrics of the read cache of the current process.
+    """
+
+    db_size: int
+    wal_size: int
+    page_size: int
+    page_count: int
+    free_pages: int
+    fragmentation: float
+    files: int
+    files_size: int
+    read_cache: ReadCacheStats
+
+
+def _file_size(path: Path) -> int:
+    return path.stat().st_size if path.exists() else 0
+
+
+def _wal_file(db_file: Path) -> Path:
+    return db_file.with_name(db_file.name + "-wal")
+
+
+async def _pragma(agentfs: AgentFS, name: str) -> int:
+    cursor = await agentfs.get_database().execute(f"PRAGMA {name}")
+    # always exhaust cursors: closing a connection with a pending statement is not supported
+    rows = await cursor.fetchall()
+    return int(rows[0][0]) if len(rows) > 0 else 0
+
+
+async def agentfs_stats() -> AgentFSStats:
+    """
+    Report the size of the AgentFS database, its WAL and how fragmented it is, along with the hit-rate metrics of the read cache.
+
+    Returns:
+        AgentFSStats: Storage statistics.
+    """
+    agentfs = await configure_agentfs()
+    try:
+        page_count = await _pragma(agentfs, "page_count")
+        free_pages = await _pragma(agentfs, "freelist_count")
+        cursor = await agentfs.get_database().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM fs_inode WHERE (mode & ?) = ?",
+            (S_IFMT, S_IFREG),
+        )
+        files, files_size = (await cursor.fetchall())[0]
+        return AgentFSStats(
+            db_size=_file_size(AGENTFS_FILE),
+            wal_size=_file_size(_wal_file(AGENTFS_FILE)),
+            page_size=await _pragma(agentfs, "page_size"),
+            page_count=page_count,
+            free_pages=free_pages,
+            fragmentation=free_pages / page_count if page_count > 0 else 0.0,
+            files=files,
+            files_size=files_size,
+            read_cache=read_cache.stats(),
+        )
+    finally:
+        await agentfs.close()
+
+
+async def checkpoint_agentfs() -> None:
+    """
+    Checkpoint the write-ahead log of the AgentFS database into the main file and truncate it.
+    """
+    agentfs = await configure_agentfs()
+    try:
+        await agentfs.get_database().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        await agentfs.close()
+
+
+async def _copy_table(source: AgentFS, target: AgentFS, table: str) -> None:
+    cursor = await source.get_database().execute(f"SELECT * FROM {table}")
+    rows = await cursor.fetchall()
+    target_db = target.get_database()
+    # the target database is created with its own root inode and configuration
+    await target_db.execute(f"DELETE FROM {table}")
+    if len(rows) > 0:
+        placeholders = ", ".join("?" for _ in rows[0])
+        await target_db.executemany(
+            f"INSERT INTO {table} VALUES ({placeholders})", rows
+        )
+    await target_db.commit()
+
+
+async def _copy_data(source: AgentFS, target: AgentFS) -> None:
+    # file contents are copied one inode at a time, so that they are never all in memory
+    cursor = await source.get_database().execute("SELECT DISTINCT ino FROM fs_data")
+    inodes = [row[0] for row in await cursor.fetchall()]
+    target_db = target.get_database()
+    await target_db.execute("DELETE FROM fs_data")
+    for ino in inodes:
+        cursor = await source.get_database().execute(
+            "SELECT ino, chunk_index, data FROM fs_data WHERE ino = ?", (ino,)
+        )
+        await target_db.executemany(
+            "INSERT INTO fs_data VALUES (?, ?, ?)", await cursor.fetchall()
+        )
+        await target_db.commit()
+
+
+async def vacuum_agentfs() -> tuple[int, int]:
+    """
+    Compact the AgentFS database, rebuilding it into a new file without free pages and replacing the old one.
+
+    The database should not be in use by a running agent while it is compacted, and it must not be reopened by the same process afterwards, since the database engine keeps its pages cached per process: this is meant to be run through the `vacuum-agentfs` command.
+
+    Returns:
+        tuple[int, int]: Size of the database (including its WAL) before and after compaction.
+    """
+    db_file = AGENTFS_FILE.resolve()
+    compact_file = db_file.with_name(db_file.name + ".compact")
+    for path in (compact_file, _wal_file(compact_file)):
+        if path.exists():
+            path.unlink()
+    source = await configure_agentfs()
+    try:
+        await source.get_database().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        before = _file_size(db_file) + _file_size(_wal_file(db_file))
+        target = await AgentFS.open(AgentFSOptions(path=str(compact_file)))
+        try:
+            for table in AGENTFS_TABLES:
+                await _copy_table(source, target, table)
+            await _copy_data(source, target)
+            await target.get_database().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            await target.close()
+    finally:
+        await source.close()
+    os.replace(compact_file, db_file)
+    if _wal_file(compact_file).exists():
+        os.replace(_wal_file(compact_file), _wal_file(db_file))
+    elif _wal_file(db_file).exists():
+        _wal_file(db_file).unlink()
+    path_index.invalidate()
+    read_cache.clear()
+    return before, _file_size(db_file) + _file_size(_wal_file(db_file))
+
+
+async def gc_agentfs_dir(directory: str | Path, retention: float) -> int:
+    """
+    Remove the files stored in AgentFS under a directory that were not modified within a retention window.
+
+    Args:
+        directory (str | Path): Directory to clean up.
+        retention (float): Retention window, in seconds.
+    Returns:
+        int: Number of removed files.
+    """
+    directory = str(Path(directory).resolve())
+    agentfs = await configure_agentfs()
+    removed = 0
+    try:
+        await path_index.ensure_built(agentfs)
+        threshold = time.time() - retention
+        for path in path_index.files_under(directory):
+            try:
+                stats = await agentfs.fs.stat(path)
+                if stats.mtime >= threshold:
+                    continue
+                await agentfs.fs.unlink(path)
+            except ErrnoException:
+                continue
+            path_index.remove(path)
+            read_cache.invalidate(path)
+            removed += 1
+    finally:
+        await agentfs.close()
+    return removed
+
+
+async def run_maintenance(
+    interval: float,
+    gc_directory: str | Path | None = None,
+    retention: float | None = None,
+) -> None:
+    """
+    Periodically checkpoint the AgentFS database and, optionally, garbage-collect old files. Meant to run as a background task in long-running processes, until it is cancelled.
+
+    Args:
+        interval (float): Seconds between two maintenance runs.
+        gc_directory (str | Path | None): Directory whose old files should be removed.
+        retention (float | None): Retention window for `gc_directory`, in seconds.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if gc_directory is not None and retention is not None:
+                removed = await gc_agentfs_dir(gc_directory, retention)
+                if removed > 0:
+                    logging.info(f"Removed {removed} expired files from {gc_directory}")
+            await checkpoint_agentfs()
+            stats = await agentfs_stats()
+            cache = stats["read_cache"]
+            logging.info(
+                f"AgentFS maintenance: database {stats['db_size']} bytes, WAL {stats['wal_size']} bytes, fragmentation {stats['fragmentation']:.1%}, read cache hit rate {cache['hit_rate']:.1%} ({cache['hits']} hits, {cache['misses']} misses, {cache['evictions']} evictions, {cache['size']} bytes)"
+            )
+        except Exception as e:
+            logging.error(f"AgentFS maintenance failed: {e}")
@@ -0,0 +1,263 @@
+import os
+import re
+
+from pathlib import Path
+from typing import Iterator
+
+from ..constants import (
+    AGENTFS_FILE,
+    BINARY_SNIFF_SIZE,
+    DEFAULT_MAX_FILE_SIZE,
+    DEFAULT_TO_AVOID,
+    DEFAULT_TO_AVOID_FILES,
+    IGNORE_FILES,
+)
+
+
+def _translate_glob(glob: str) -> str:
+    """
+    Translate a gitignore glob (without leading/trailing slashes) into a regex.
+
+    Args:
+        glob (str): Glob pattern.
+    Returns:
+        str: Equivalent regex (not anchored).
+    """
+    regex = ""
+    i = 0
+    n = len(glob)
+    while i < n:
+        c = glob[i]
+        if c == "*":
+            if glob[i : i + 3] == "**/":
+                # zero or more directories
+                regex += "(?:.*/)?"
+                i += 3
+                continue
+            if glob[i : i + 2] == "**":
+                regex += ".*"
+                i += 2
+                continue
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        elif c == "[":
+            j = glob.find("]", i + 2)
+            if j == -1:
+                regex += re.escape(c)
+            else:
+                content = glob[i + 1 : j]
+                if content.startswith("!"):
+                    content = "^" + content[1:]
+                regex += "[" + content.replace("\\", "\\\\") + "]"
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            regex += re.escape(glob[i])
+        else:
+            regex += re.escape(c)
+        i += 1
+    return regex
+
+
+class IgnoreSpec:
+    """
+    Compiled set of gitignore rules, read from a single ignore file.
+    """
+
+    def __init__(self, lines: list[str]) -> None:
+        """
+        Compile the rules of an ignore file.
+
+        Args:
+            lines (list[str]): Lines of the ignore file.
+        """
+        self._rules: list[tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip("\r")
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            if line == "" or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if line == "":
+                continue
+            # patterns with a slash (other than a trailing one) are relative to the ignore file
+            anchored = "/" in line
+            line = line.lstrip("/")
+            regex = _translate_glob(line)
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self._rules.append((re.compile("^" + regex + "$"), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: str) -> "IgnoreSpec | None":
+        """
+        Compile the rules of an ignore file, if it exists.
+
+        Args:
+            path (str): Path to the ignore file.
+        Returns:
+            IgnoreSpec | None: Compiled rules, or None if the file does not exist or cannot be read.
+        """
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+    def match(self, relpath: str, is_dir: bool) -> bool | None:
+        """
+        Match a path against the rules (the last matching rule wins).
+
+        Args:
+            relpath (str): Path relative to the directory of the ignore file, with `/` separators.
+            is_dir (bool): Whether the path is a directory.
+        Returns:
+            bool | None: True if the path is ignored, False if it is explicitly re-included, None if no rule matches.
+        """
+        result: bool | None = None
+        for pattern, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if pattern.match(relpath) is not None:
+                result = not negate
+        return result
+
+
+def looks_binary(content: bytes) -> bool:
+    """
+    Sniff whether some content is binary, looking for NUL bytes in its first chunk.
+
+    Args:
+        content (bytes): Content (or the beginning of it).
+    Returns:
+        bool: True if the content looks binary.
+    """
+    return b"\x00" in content[:BINARY_SNIFF_SIZE]
+
+
+class WorkspaceWalker:
+    """
+    Walks the files of a workspace, honouring `.gitignore`/`.ignore` files, name-based exclusions and a maximum file size.
+
+    Ignore files are compiled once per directory and cached, so the same walker can be reused to check single paths.
+    """
+
+    def __init__(
+        self,
+        root: str | Path | None = None,
+        dirs_to_avoid: list[str] | None = None,
+        files_to_avoid: list[str] | None = None,
+        max_file_size: int | None = DEFAULT_MAX_FILE_SIZE,
+        use_ignore_files: bool = True,
+    ) -> None:
+        """
+        Initialize the walker.
+
+        Args:
+            root (str | Path | None): Root of the workspace (defaults to the current working directory).
+            dirs_to_avoid (list[str] | None): Names of the directories to exclude.
+            files_to_avoid (list[str] | None): Names of the files to exclude.
+            max_file_size (int | None): Files bigger than this (in bytes) are excluded. None disables the limit.
+            use_ignore_files (bool): Whether to honour `.gitignore`/`.ignore` files.
+        """
+        self.root = str(Path(root or Path.cwd()).resolve())
+        self.dirs_to_avoid = set(dirs_to_avoid or DEFAULT_TO_AVOID)
+        self.files_to_avoid = set(files_to_avoid or DEFAULT_TO_AVOID_FILES)
+        self.max_file_size = max_file_size
+        self.use_ignore_files = use_ignore_files
+        self._specs: dict[str, list[tuple[str, IgnoreSpec]]] = {}
+
+    def _specs_for(self, directory: str) -> list[tuple[str, IgnoreSpec]]:
+        """
+        Get the ignore rules that apply to the entries of a directory (its own and the ones inherited from its parents), each with the directory it is relative to.
+        """
+        specs = self._specs.get(directory)
+        if specs is not None:
+            return specs
+        if directory == self.root or not directory.startswith(self.root + os.sep):
+            specs = []
+        else:
+            specs = list(self._specs_for(os.path.dirname(directory)))
+        if self.use_ignore_files:
+            for name in IGNORE_FILES:
+                spec = IgnoreSpec.from_file(os.path.join(directory, name))
+                if spec is not None:
+                    specs.append((directory, spec))
+        self._specs[directory] = specs
+        return specs
+
+    def _is_excluded(self, directory: str, name: str, is_dir: bool) -> bool:
+        """
+        Check whether an entry of a directory is excluded, assuming that the directory itself is not.
+        """
+        if is_dir:
+            if name in self.dirs_to_avoid:
+                return True
+        # never expose the AgentFS database (and its WAL/SHM files)
+        elif name in self.files_to_avoid or name.startswith(AGENTFS_FILE.name):
+            return True
+        ignored = False
+        path = os.path.join(directory, name)
+        for base, spec in self._specs_for(directory):
+            relpath = os.path.relpath(path, base).replace(os.sep, "/")
+            result = spec.match(relpath, is_dir)
+            if result is not None:
+                ignored = result
+        return ignored
+
+    def _is_too_big(self, size: int) -> bool:
+        return self.max_file_size is not None and size > self.max_file_size
+
+    def is_ignored(self, path: str) -> bool:
+        """
+        Check whether a path is excluded, either by itself or because one of its parent directories is.
+
+        Args:
+            path (str): Absolute path.
+        Returns:
+            bool: True if the path is outside of the root or excluded.
+        """
+        path = os.path.normpath(path)
+        if path == self.root:
+            return False
+        if not path.startswith(self.root + os.sep):
+            return True
+        parts = os.path.relpath(path, self.root).split(os.sep)
+        directory = self.root
+        for i, part in enumerate(parts):
+            is_last = i == len(parts) - 1
+            is_dir = not is_last or os.path.isdir(path)
+            if self._is_excluded(directory, part, is_dir):
+                return True
+            directory = os.path.join(directory, part)
+        if os.path.isfile(path):
+            return self._is_too_big(os.path.getsize(path))
+        return False
+
+    def walk(self, directory: str | None = None) -> Iterator[str]:
+        """
+        Yield the absolute paths of all the files that are not excluded under a directory.
+
+        Args:
+            directory (str | None): Directory to walk (defaults to the root). It is assumed not to be excluded.
+        Returns:
+            Iterator[str]: File paths.
+        """
+        for root, dirs, files in os.walk(directory or self.root):
+            dirs[:] = [d for d in dirs if not self._is_excluded(root, d, True)]
+            for file in files:
+                if self._is_excluded(root, file, False):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    continue
+                if not self._is_too_big(size):
+                    yield path
@@ -12,7 +12,7 @@ from .events import (
     PromptEvent,
     OutputEvent,
 )
-from .models import Thought, Observation, Action
+from .models import Thought, Observation
 
 
 class AgentWorkflow(Workflow):
@@ -22,14 +22,31 @@ class AgentWorkflow(Workflow):
     Attributes:
         llm (LLMWrapper): LLM that generates thinking, tool calling and observational responses
         mcp_client (McpWrapper | None): MCP client to interact with MCP tools. None if MCP capabilities are not active.
+        session_id (str | None): ACP session the workflow runs for, used to cancel its MCP calls. None outside of ACP sessions.
+        session_mcp_clients (dict[str, McpWrapper]): MCP clients of the servers declared by the ACP client for the session, by server name.
     """
 
     def __init__(
-        self, llm: LLMWrapper, mcp_client: McpWrapper | None, *args, **kwargs
+        self,
+        llm: LLMWrapper,
+        mcp_client: McpWrapper | None,
+        *args,
+        session_id: str | None = None,
+        session_mcp_clients: dict[str, McpWrapper] | None = None,
+        **kwargs,
     ) -> None:
         super().__init__(*args, **kwargs)
         self.llm = llm
         self.mcp_client = mcp_client
+        self.session_id = session_id
+        self.session_mcp_clients = session_mcp_clients or {}
+
+    def _get_mcp_client(self, server: str) -> McpWrapper:
+        mcp_client = self.session_mcp_clients.get(server, self.mcp_client)
+        assert mcp_client is not None, (
+            "An MCP client must be provided to execute MCP tools"
+        )
+        return mcp_client
 
     @step
     async def think(
@@ -38,6 +55,7 @@ class AgentWorkflow(Workflow):
         if isinstance(ev, InputEvent):
             async with ctx.store.edit_state() as state:
                 state.mode = ev.mode
+            self.llm.select_tools(ev.prompt)
         self.llm.add_user_message(ev.prompt)
         response = await self.llm.generate(schema=Thought)
         if response is not None:
@@ -49,10 +67,16 @@ class AgentWorkflow(Workflow):
     @step
     async def take_action(
         self, ev: ThinkingEvent, ctx: Context
-    ) -> ToolCallEvent | OutputEvent:
-        response = await self.llm.generate(schema=Action)
-        if response is not None:
-            event = response.to_event()
+    ) -> ToolCallEvent | PromptEvent | OutputEvent:
+        try:
+            response = await self.llm.generate_action()
+            event = response.to_event() if response is not None else None
+        except ValueError as e:
+            # malformed tool input (or stop arguments): let the agent fix it instead of failing the run
+            return PromptEvent(
+                prompt=f"The input of your tool call is not valid ({e}), please try again."
+            )
+        if event is not None:
             if not isinstance(event, (OutputEvent)):
                 ctx.write_event_to_stream(event)
             return event
@@ -68,11 +92,12 @@ class AgentWorkflow(Workflow):
             if tool.mcp_metadata is None:
                 result = await tool.execute(ev.tool_input)
             else:
-                assert self.mcp_client is not None, (
-                    "An MCP client must be provided to execute MCP tools"
-                )
-                result = await self.mcp_client.call_tool(
-                    ev.tool_name, ev.tool_input, tool.mcp_metadata["server"]
+                server = tool.mcp_metadata["server"]
+                result = await self._get_mcp_client(server).call_tool(
+                    ev.tool_name,
+                    ev.tool_input,
+                    server,
+                    session_id=self.session_id,
                 )
             event = ToolResultEvent(tool_name=ev.tool_name, result=result)
             ctx.write_event_to_stream(event)
@@ -89,11 +114,12 @@ class AgentWorkflow(Workflow):
             if tool.mcp_metadata is None:
                 result = await tool.execute(ev.tool_input)
             else:
-                assert self.mcp_client is not None, (
-                    "An MCP client must be provided to execute MCP tools"
-                )
-                result = await self.mcp_client.call_tool(
-                    ev.tool_name, ev.tool_input, tool.mcp_metadata["server"]
+                server = tool.mcp_metadata["server"]
+                result = await self._get_mcp_client(server).call_tool(
+                    ev.tool_name,
+                    ev.tool_input,
+                    server,
+                    session_id=self.session_id,
                 )
             event = ToolResultEvent(tool_name=ev.tool_name, result=result)
         else:
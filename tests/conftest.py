@@ -1,4 +1,5 @@
-from typing import Any, AsyncGenerator, Type, Literal
+from typing import Any, AsyncGenerator, Type, Literal, cast
+from unittest.mock import patch
 from mcp_use.client.session import Tool as McpTool
 from workflows.events import Event
 from workflows_acp.models import Stop, Action, Tool
@@ -16,7 +17,13 @@ from workflows_acp.mcp_wrapper import (
     McpServersConfig,
     McpWrapper,
 )
-from workflows_acp.llms.models import BaseLLM, ChatHistory, ChatMessage
+from workflows_acp.llms.models import (
+    BaseLLM,
+    ChatHistory,
+    ChatMessage,
+    NativeToolCall,
+    ToolSchema,
+)
 from workflows_acp.models import StructuredSchemaT
 from acp.schema import RequestPermissionResponse, AllowedOutcome
 
@@ -41,11 +48,40 @@ class MockLLM(BaseLLM):
         )
         return model  # type: ignore
 
+    async def generate_tool_call(
+        self, tools: list[ToolSchema], chat_history: ChatHistory
+    ) -> NativeToolCall | None:
+        tool_call = NativeToolCall(
+            name="stop",
+            arguments={
+                "stop_reason": "I am done",
+                "final_output": "this is a final result",
+            },
+        )
+        chat_history.append(ChatMessage.from_tool_call(tool_call))
+        return tool_call
+
+
+class MockClientSession:
+    def __init__(self, mcp_session: "MockMcpSession") -> None:
+        self._mcp_session = mcp_session
+
+    async def send_ping(self) -> None:
+        if not self._mcp_session.alive:
+            raise ConnectionError("server is not responding")
+
+
+class MockConnector:
+    def __init__(self, mcp_session: "MockMcpSession") -> None:
+        self.client_session = MockClientSession(mcp_session)
+
 
 class MockMcpSession:
     def __init__(self, *args, **kwargs) -> None:
         self._tools: list[McpTool] | None = kwargs.get("tools")
         self._is_connected = False
+        self.alive = True
+        self.connector = MockConnector(self)
 
     @property
     def is_connected(self) -> bool:
@@ -55,6 +91,9 @@ class MockMcpSession:
         self._is_connected = True
         return None
 
+    async def disconnect(self) -> None:
+        self._is_connected = False
+
     async def list_tools(self) -> list[McpTool] | None:
         return self._tools
 
@@ -137,10 +176,12 @@ class MockWorkflow:
 
 class MockMcpWrapper(McpWrapper):
     def __init__(
-        self, mcp_servers: dict[str, Any], from_config_dict: bool = False
+        self, mcp_servers: dict[str, Any], from_config_dict: bool = False, **kwargs
     ) -> None:
-        self._client = MockMcpClient()
-        self.mcp_servers = MCP_CONFIG_ONE
+        with patch("workflows_acp.mcp_wrapper.MCPClient", new=MockMcpClient):
+            super().__init__(
+                cast(dict[str, Any], MCP_CONFIG_ONE), from_config_dict=True, **kwargs
+            )
 
 
 class MockLLMWrapper(LLMWrapper):
@@ -151,17 +192,31 @@ class MockLLMWrapper(LLMWrapper):
         api_key: str | None = None,
         model: str | None = None,
         llm_provider: Literal["google", "anthropic", "openai"] = "google",
+        native_tool_calling: bool = False,
+        tool_selection_top_k: int | None = None,
+        compact_tools: bool = False,
     ):
-        super().__init__(tools, agent_task, api_key, model, llm_provider)
+        super().__init__(
+            tools,
+            agent_task,
+            api_key,
+            model,
+            llm_provider,
+            native_tool_calling,
+            tool_selection_top_k,
+            compact_tools=compact_tools,
+        )
         self._client = MockLLM(api_key="", model="")
 
 
 class MockACPClient:
     def __init__(self, *args, **kwargs) -> None:
         self.num_updates = 0
+        self.updates: list[Any] = []
 
     async def session_update(self, *args, **kwargs) -> Any:
         self.num_updates += 1
+        self.updates.append(kwargs.get("update"))
 
     async def request_permission(self, *args, **kwargs) -> RequestPermissionResponse:
         return RequestPermissionResponse(
@@ -7,9 +7,11 @@ from anthropic.types.beta.parsed_beta_message import (
     ParsedBetaTextBlock,
 )
 from anthropic.types.beta.beta_usage import BetaUsage
+from anthropic.types.beta.beta_message import BetaMessage
+from anthropic.types.beta.beta_tool_use_block import BetaToolUseBlock
 from workflows_acp.constants import DEFAULT_ANTHROPIC_MODEL, DEFAULT_MODEL
 from workflows_acp.models import Action, Stop
-from workflows_acp.llms.models import ChatHistory, ChatMessage
+from workflows_acp.llms.models import ChatHistory, ChatMessage, ToolSchema
 from workflows_acp.llms.anthropic_llm import AnthropicLLM
 
 
@@ -54,3 +56,44 @@ async def test_anthropic_llm_generate() -> None:
         assert response is not None
         assert isinstance(response, Action)
         assert response.model_dump_json() == content
+
+
+TOOL_SCHEMAS = [
+    ToolSchema(
+        name="read_file",
+        description="Read a file",
+        parameters={"type": "object", "properties": {"path": {"type": "string"}}},
+    )
+]
+
+
+@pytest.mark.asyncio
+async def test_anthropic_llm_generate_tool_call() -> None:
+    with patch.object(AsyncAnthropic, "beta", new_callable=PropertyMock) as mock_beta:
+        mock_create = AsyncMock()
+        mock_create.return_value = BetaMessage(
+            content=[
+                BetaToolUseBlock(
+                    id="1", input={"path": "a.py"}, name="read_file", type="tool_use"
+                )
+            ],
+            model="claude-haiku-4-5",
+            role="assistant",
+            type="message",
+            usage=BetaUsage(input_tokens=0, output_tokens=0),
+            id="1",
+        )
+        mock_beta.return_value.messages.create = mock_create
+
+        llm = AnthropicLLM(api_key="fake-api-key")
+        tool_call = await llm.generate_tool_call(
+            tools=TOOL_SCHEMAS,
+            chat_history=ChatHistory(
+                messages=[ChatMessage(role="user", content="hello")]
+            ),
+        )
+        assert tool_call == {"name": "read_file", "arguments": {"path": "a.py"}}
+        assert (
+            mock_create.call_args.kwargs["tools"][0]["input_schema"]
+            == (TOOL_SCHEMAS[0]["parameters"])
+        )
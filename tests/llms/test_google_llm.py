@@ -2,10 +2,16 @@ import pytest
 
 from unittest.mock import patch, AsyncMock, PropertyMock
 from google.genai import Client as GenAIClient
-from google.genai.types import GenerateContentResponse, Content, Part, Candidate
+from google.genai.types import (
+    GenerateContentResponse,
+    Content,
+    Part,
+    Candidate,
+    FunctionCall,
+)
 from workflows_acp.constants import DEFAULT_GOOGLE_MODEL, DEFAULT_MODEL
 from workflows_acp.models import Action, Stop
-from workflows_acp.llms.models import ChatHistory
+from workflows_acp.llms.models import ChatHistory, ToolSchema
 from workflows_acp.llms.google_llm import GoogleLLM
 
 
@@ -44,3 +50,48 @@ async def test_google_llm_generate() -> None:
         assert response is not None
         assert isinstance(response, Action)
         assert response.model_dump_json() == content
+
+
+TOOL_SCHEMAS = [
+    ToolSchema(
+        name="read_file",
+        description="Read a file",
+        parameters={"type": "object", "properties": {"path": {"type": "string"}}},
+    )
+]
+
+
+@pytest.mark.asyncio
+async def test_google_llm_generate_tool_call() -> None:
+    with patch.object(GenAIClient, "aio", new_callable=PropertyMock) as mock_aio:
+        mock_generate = AsyncMock()
+        mock_generate.return_value = GenerateContentResponse(
+            candidates=[
+                Candidate(
+                    content=Content(
+                        role="model",
+                        parts=[
+                            Part(
+                                function_call=FunctionCall(
+                                    name="read_file", args={"path": "a.py"}
+                                )
+                            )
+                        ],
+                    )
+                )
+            ]
+        )
+        mock_aio.return_value.models.generate_content = mock_generate
+
+        llm = GoogleLLM(api_key="fake-api-key")
+        chat_history = ChatHistory(messages=[])
+        tool_call = await llm.generate_tool_call(
+            tools=TOOL_SCHEMAS, chat_history=chat_history
+        )
+        assert tool_call == {"name": "read_file", "arguments": {"path": "a.py"}}
+        config = mock_generate.call_args.kwargs["config"]
+        assert config.tools[0].function_declarations[0].name == "read_file"
+        assert (
+            chat_history.messages[-1].content
+            == '{"tool_call":{"tool_name":"read_file","tool_input":{"path":"a.py"}}}'
+        )
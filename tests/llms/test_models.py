@@ -1,5 +1,12 @@
+import pytest
+
 from google.genai.types import Content, Part
-from workflows_acp.llms.models import ChatHistory, ChatMessage
+from workflows_acp.llms.models import (
+    ChatHistory,
+    ChatMessage,
+    LogsMemory,
+    total_nbytes,
+)
 
 
 def test_chat_message_conversion() -> None:
@@ -67,3 +74,78 @@ def test_chat_history() -> None:
         assert openai_msg["role"] == chat_history.messages[i].role
         assert openai_msg["content"] == chat_history.messages[i].content
         assert openai_msg.get("type") == "message"
+
+
+def test_chat_history_fork() -> None:
+    chat_history = ChatHistory(
+        messages=[
+            ChatMessage(role="system", content="say hello"),
+            ChatMessage(role="user", content="hi"),
+        ]
+    )
+    fork = chat_history.fork()
+    # the messages are shared, not copied
+    assert fork.messages[1] is chat_history.messages[1]
+    chat_history.append(ChatMessage(role="assistant", content="hello"))
+    fork.append(ChatMessage(role="assistant", content="hey"))
+    assert [message.content for message in chat_history.messages] == [
+        "say hello",
+        "hi",
+        "hello",
+    ]
+    assert [message.content for message in fork.messages] == ["say hello", "hi", "hey"]
+    # replacing a shared message does not affect the other history
+    fork.messages[0] = ChatMessage(role="system", content="say hey")
+    chat_history.messages[0] = ChatMessage(role="system", content="say hi")
+    assert fork.messages[0].content == "say hey"
+    assert chat_history.messages[0].content == "say hi"
+    nested = fork.fork()
+    nested.append(ChatMessage(role="user", content="bye"))
+    assert [message.content for message in nested.messages] == [
+        "say hey",
+        "hi",
+        "hey",
+        "bye",
+    ]
+    assert nested.messages[-1].content == "bye"
+    assert [message.content for message in nested.messages[1:3]] == ["hi", "hey"]
+    assert len(fork.messages) == 3
+    assert fork.to_anthropic_message_history()[0] == "say hey"
+
+
+def test_chat_history_nbytes() -> None:
+    message = ChatMessage(role="user", content="x" * 1000)
+    # messages have no instance dictionary
+    with pytest.raises(AttributeError):
+        message.__dict__
+    assert message.nbytes > 1000
+    chat_history = ChatHistory(
+        messages=[ChatMessage(role="system", content="y" * 1000), message]
+    )
+    # system messages are shared by the sessions, so they are not counted
+    assert chat_history.nbytes == message.nbytes
+    chat_history.append(ChatMessage(role="assistant", content="ok"))
+    size = chat_history.nbytes
+    assert size > message.nbytes
+    fork = chat_history.fork()
+    # the messages shared with the parent are owned by it
+    assert fork.nbytes == 0
+    short = ChatMessage(role="user", content="short")
+    fork.messages[1] = short
+    assert fork.nbytes == short.nbytes
+    assert chat_history.nbytes == size
+    nested = fork.fork()
+    nested.append(message)
+    # shared messages are counted once
+    assert (
+        total_nbytes([chat_history.messages, fork.messages, nested.messages])
+        == size + short.nbytes + message.nbytes
+    )
+    assert total_nbytes([nested.messages]) == size + short.nbytes + message.nbytes
+    # removing a log frees the nodes no other log goes through
+    memory = LogsMemory([chat_history.messages, fork.messages, nested.messages])
+    assert memory.nbytes == size + short.nbytes + message.nbytes
+    assert memory.remove(chat_history.messages) == 0
+    assert memory.remove(nested.messages) == message.nbytes
+    assert memory.remove(fork.messages) == size + short.nbytes
+    assert memory.nbytes == 0
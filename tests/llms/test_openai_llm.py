@@ -3,6 +3,7 @@ import time
 
 from unittest.mock import patch, AsyncMock, PropertyMock
 from openai import AsyncOpenAI
+from openai.types.responses import Response, ResponseFunctionToolCall
 from openai.types.responses.parsed_response import (
     ParsedResponseOutputText,
     ParsedResponseOutputMessage,
@@ -10,7 +11,7 @@ from openai.types.responses.parsed_response import (
 )
 from workflows_acp.constants import DEFAULT_OPENAI_MODEL, DEFAULT_MODEL
 from workflows_acp.models import Action, Stop
-from workflows_acp.llms.models import ChatHistory
+from workflows_acp.llms.models import ChatHistory, ToolSchema
 from workflows_acp.llms.openai_llm import OpenAILLM
 
 
@@ -65,3 +66,57 @@ async def test_openai_llm_generate() -> None:
         assert response is not None
         assert isinstance(response, Action)
         assert response.model_dump_json() == content
+
+
+TOOL_SCHEMAS = [
+    ToolSchema(
+        name="read_file",
+        description="Read a file",
+        parameters={"type": "object", "properties": {"path": {"type": "string"}}},
+    )
+]
+
+
+@pytest.mark.asyncio
+async def test_openai_llm_generate_tool_call() -> None:
+    with patch.object(
+        AsyncOpenAI, "responses", new_callable=PropertyMock
+    ) as mock_responses:
+        mock_create = AsyncMock()
+        mock_create.return_value = Response(
+            id="1",
+            object="response",
+            output=[
+                ResponseFunctionToolCall(
+                    arguments='{"path": "a.py"}',
+                    call_id="1",
+                    name="read_file",
+                    type="function_call",
+                )
+            ],
+            parallel_tool_calls=False,
+            tool_choice="required",
+            tools=[],
+            model="gpt-4.1",
+            created_at=time.time(),
+        )
+        mock_responses.return_value.create = mock_create
+        llm = OpenAILLM(api_key="fake-api-key")
+        tool_call = await llm.generate_tool_call(
+            tools=TOOL_SCHEMAS, chat_history=ChatHistory(messages=[])
+        )
+        assert tool_call == {"name": "read_file", "arguments": {"path": "a.py"}}
+        assert mock_create.call_args.kwargs["tools"][0]["name"] == "read_file"
+        assert not mock_create.call_args.kwargs["parallel_tool_calls"]
+        # truncated arguments are kept as they are, for the model to fix them
+        mock_create.return_value.output[0].arguments = '{"path": "a.'
+        chat_history = ChatHistory(messages=[])
+        tool_call = await llm.generate_tool_call(
+            tools=TOOL_SCHEMAS, chat_history=chat_history
+        )
+        assert tool_call == {
+            "name": "read_file",
+            "arguments": {},
+            "raw_arguments": '{"path": "a.',
+        }
+        assert '{\\"path\\": \\"a.' in chat_history.messages[-1].content
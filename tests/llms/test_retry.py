@@ -4,11 +4,18 @@ import time
 from typing import Type
 from pydantic import BaseModel
 from workflows_acp.llms.retry import retry
-from workflows_acp.llms.models import BaseLLM, ChatHistory
+from workflows_acp.llms.models import BaseLLM, ChatHistory, NativeToolCall, ToolSchema
 from workflows_acp.models import StructuredSchemaT
 
 
-class StableLLM(BaseLLM):
+class NoToolCallsLLM(BaseLLM):
+    async def generate_tool_call(
+        self, tools: list[ToolSchema], chat_history: ChatHistory
+    ) -> NativeToolCall | None:
+        return None
+
+
+class StableLLM(NoToolCallsLLM):
     def __init__(self, api_key: str, model: str) -> None:
         super().__init__(api_key, model)
         self.has_retried = False
@@ -24,7 +31,7 @@ class StableLLM(BaseLLM):
             return schema()
 
 
-class UnstableLLM(BaseLLM):
+class UnstableLLM(NoToolCallsLLM):
     def __init__(self, api_key: str, model: str) -> None:
         super().__init__(api_key, model)
         self.retry_times = 0
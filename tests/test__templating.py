@@ -20,3 +20,10 @@ I ate {{food}} and I drank {{drink}}.
         template.render({"food": "pizza"})
     with pytest.raises(TemplateValidationError):
         template.render({"food": "pizza", "drink": 100})  # type: ignore
+
+
+def test_template_single_pass() -> None:
+    template = Template("{{a}} and {{b}}, {{a}} again")
+    # values are inserted as they are, even if they look like fields
+    assert template.render({"a": "{{b}}", "b": "two"}) == "{{b}} and two, {{b}} again"
+    assert Template("no fields").render({}) == "no fields"
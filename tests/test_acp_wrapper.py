@@ -1,11 +1,12 @@
+import asyncio
 import pytest
 import json
 import os
 import logging
 
 from pathlib import Path
-from typing import cast
-from unittest.mock import patch
+from typing import Any, cast
+from unittest.mock import MagicMock, patch
 from acp import PROTOCOL_VERSION
 from acp.schema import (
     AuthenticateResponse,
@@ -19,18 +20,27 @@ from acp.schema import (
     Implementation,
     PromptCapabilities,
     McpCapabilities,
+    SessionCapabilities,
+    SessionForkCapabilities,
+    SessionListCapabilities,
     SessionModeState,
+    SessionResumeCapabilities,
     TextContentBlock,
+    McpServerStdio,
 )
 from acp.interfaces import Client
 from workflows_acp.acp_wrapper import _create_agent
 from workflows_acp.constants import DEFAULT_MODEL, VERSION, MODES
+from workflows_acp.events import OutputEvent, ToolPermissionEvent
+from workflows_acp.llms import ChatMessage
 from workflows_acp.tools import TOOLS, filter_tools
 from .conftest import (
     MockWorkflow,
+    MockWorkflowHandler,
     MockLLMWrapper,
     MockMcpWrapper,
     MockACPClient,
+    MockMcpClient,
     MCP_CONFIG_ONE,
 )
 
@@ -86,6 +96,21 @@ async def test_acp_wrapper_init(
                 )
                 assert agent._llm.model == "gemini-3-pro-preview"
                 assert agent._mode == "bypass"
+                # the task and the mode are reloaded for new sessions
+                assert agent._config_file is not None
+                agent._config_file._poll_interval = 0
+                config_file = tmp_path / "agent_config.yaml"
+                stat = config_file.stat()
+                config_file.write_text(
+                    'mode: "ask"\nmodel: "gemini-3-pro-preview"\nagent_task: "Write poems"\n'
+                )
+                os.utime(
+                    config_file,
+                    ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000),
+                )
+                await agent.new_session(cwd=str(tmp_path), mcp_servers=[])
+                assert agent._mode == "ask"
+                assert "Write poems" in agent._llm._chat_history.messages[0].content
 
 
 @pytest.mark.asyncio
@@ -156,10 +181,16 @@ async def test_acp_wrapper_main_methods(
                     == InitializeResponse(
                         protocol_version=PROTOCOL_VERSION,
                         agent_capabilities=AgentCapabilities(
+                            load_session=True,
                             prompt_capabilities=PromptCapabilities(
                                 image=False, audio=False, embedded_context=False
                             ),
-                            mcp_capabilities=McpCapabilities(http=False, sse=False),
+                            mcp_capabilities=McpCapabilities(http=True, sse=True),
+                            session_capabilities=SessionCapabilities(
+                                fork=SessionForkCapabilities(),
+                                list=SessionListCapabilities(),
+                                resume=SessionResumeCapabilities(),
+                            ),
                         ),
                         agent_info=Implementation(
                             name="workflows-acp", title="AgentWorkflow", version=VERSION
@@ -238,3 +269,291 @@ async def test_acp_wrapper_main_methods(
                 for i, line in enumerate(content):
                     assert actual_events[i] == line.strip()
                 assert agent._conn.num_updates == len(content)  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_acp_wrapper_persisted_sessions(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key")
+    with patch("workflows_acp.acp_wrapper.McpWrapper", new=MockMcpWrapper) as _:
+        with patch("workflows_acp.acp_wrapper.LLMWrapper", new=MockLLMWrapper) as _:
+            with patch(
+                "workflows_acp.acp_wrapper.AgentWorkflow", new=MockWorkflow
+            ) as _:
+                agent = await _create_agent(use_mcp=False)
+                agent._conn = cast(Client, MockACPClient())
+                new_resp = await agent.new_session(cwd=".", mcp_servers=[])
+                await agent.prompt(
+                    prompt=[TextContentBlock(text="fix the tests", type="text")],
+                    session_id=new_resp.session_id,
+                )
+                # the mock workflow does not use the LLM
+                history = agent._histories[new_resp.session_id]
+                history.append(ChatMessage(role="user", content="fix the tests"))
+                history.append(ChatMessage(role="assistant", content="done"))
+                await agent.close()
+                # after a restart, the session is listed and resumed where it stopped
+                agent = await _create_agent(use_mcp=False)
+                agent._conn = cast(Client, MockACPClient())
+                list_resp = await agent.list_sessions()
+                assert [session.title for session in list_resp.sessions] == [
+                    "fix the tests"
+                ]
+                # a loaded session is replayed to the client
+                await agent.load_session(
+                    cwd=".", mcp_servers=[], session_id=new_resp.session_id
+                )
+                assert [
+                    (update.session_update, update.content.text)
+                    for update in agent._conn.updates  # type: ignore
+                ] == [
+                    ("user_message_chunk", "fix the tests"),
+                    ("agent_message_chunk", "done"),
+                ]
+                await agent.resume_session(cwd=".", session_id=new_resp.session_id)
+                assert new_resp.session_id not in agent._histories
+                await agent.prompt(
+                    prompt=[TextContentBlock(text="thanks", type="text")],
+                    session_id=new_resp.session_id,
+                )
+                messages = agent._histories[new_resp.session_id].messages
+                assert messages[0].role == "system"
+                assert [message.content for message in messages[1:]] == [
+                    "fix the tests",
+                    "done",
+                ]
+                # the fork shares the history of the session, and diverges from it
+                fork_resp = await agent.fork_session(
+                    cwd=".", session_id=new_resp.session_id
+                )
+                assert fork_resp.session_id == "1"
+                await agent.prompt(
+                    prompt=[TextContentBlock(text="other fix", type="text")],
+                    session_id=fork_resp.session_id,
+                )
+                fork_messages = agent._histories[fork_resp.session_id].messages
+                assert [message.content for message in fork_messages[1:]] == [
+                    "fix the tests",
+                    "done",
+                ]
+                assert fork_messages[1] is messages[1]
+                agent._histories[fork_resp.session_id].append(
+                    ChatMessage(role="user", content="other fix")
+                )
+                assert len(agent._histories[new_resp.session_id].messages) == 3
+                assert agent._session_store.load_messages(fork_resp.session_id)[
+                    -1
+                ] == ChatMessage(role="user", content="other fix")
+                new_resp = await agent.new_session(cwd=".", mcp_servers=[])
+                assert new_resp.session_id == "2"
+                await agent.close()
+
+
+@pytest.mark.asyncio
+async def test_acp_wrapper_session_eviction(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key")
+    with patch("workflows_acp.acp_wrapper.McpWrapper", new=MockMcpWrapper) as _:
+        with patch("workflows_acp.acp_wrapper.LLMWrapper", new=MockLLMWrapper) as _:
+            with patch(
+                "workflows_acp.acp_wrapper.AgentWorkflow", new=MockWorkflow
+            ) as _:
+                agent = await _create_agent(
+                    use_mcp=False, persist_sessions=False, sessions_max_memory=1000
+                )
+                agent._conn = cast(Client, MockACPClient())
+                first = await agent.new_session(cwd=str(tmp_path), mcp_servers=[])
+                second = await agent.new_session(cwd=str(tmp_path), mcp_servers=[])
+                await agent.prompt(
+                    prompt=[TextContentBlock(text="hello", type="text")],
+                    session_id=first.session_id,
+                )
+                # the mock workflow does not use the LLM
+                agent._histories[first.session_id].append(
+                    ChatMessage(role="user", content="x" * 10_000)
+                )
+                assert agent.session_memory(first.session_id) > 10_000
+                await agent.prompt(
+                    prompt=[TextContentBlock(text="hello", type="text")],
+                    session_id=second.session_id,
+                )
+                # the first session is idle and over the memory ceiling
+                assert first.session_id not in agent._histories
+                assert first.session_id not in agent._session_infos
+                assert agent.session_memory(first.session_id) == 0
+                assert second.session_id in agent._histories
+                await agent.prompt(
+                    prompt=[TextContentBlock(text="hello", type="text")],
+                    session_id=first.session_id,
+                )
+                # the evicted session is loaded back from the store
+                messages = agent._histories[first.session_id].messages
+                assert messages[-1].content == "x" * 10_000
+                assert messages[0] is agent._llm._get_system_message()
+                assert agent._session_infos[first.session_id].cwd == str(tmp_path)
+                assert agent._session_infos[first.session_id].title == "hello"
+                # forks share the history of their parent, which is counted once
+                agent.sessions_max_memory = 15_000
+                forks = [
+                    (
+                        await agent.fork_session(cwd=".", session_id=first.session_id)
+                    ).session_id
+                    for _ in range(3)
+                ]
+                assert all(session_id in agent._histories for session_id in forks)
+                assert first.session_id in agent._histories
+                assert agent.session_memory(forks[0]) == 0
+                await agent.close()
+
+
+class SlowWorkflow:
+    """Workflow writing to the chat history of the LLM around an await, like a real run, asking for permission when prompted with `ask`"""
+
+    def __init__(self, llm: MockLLMWrapper, **kwargs) -> None:
+        self.llm = llm
+
+    def run(self, start_event, **kwargs) -> MockWorkflowHandler:
+        llm, prompt = self.llm, start_event.prompt.strip()
+        handler = MockWorkflowHandler()
+        handler.ctx = MagicMock()  # type: ignore
+
+        async def stream_events(*args, **kwargs):
+            llm.add_user_message(prompt)
+            if prompt == "ask":
+                yield ToolPermissionEvent(tool_name="write_file", tool_input={})
+            await asyncio.sleep(0.01)
+            llm._chat_history.append(
+                ChatMessage(role="assistant", content=f"answer to {prompt}")
+            )
+            yield OutputEvent(stop_reason="done", final_output="hello", error=None)
+
+        handler.stream_events = stream_events  # type: ignore
+        return handler
+
+
+@pytest.mark.asyncio
+async def test_acp_wrapper_concurrent_prompts(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key")
+    with patch("workflows_acp.acp_wrapper.McpWrapper", new=MockMcpWrapper) as _:
+        with patch("workflows_acp.acp_wrapper.LLMWrapper", new=MockLLMWrapper) as _:
+            with patch(
+                "workflows_acp.acp_wrapper.AgentWorkflow", new=SlowWorkflow
+            ) as _:
+                agent = await _create_agent(use_mcp=False, persist_sessions=False)
+                agent._conn = cast(Client, MockACPClient())
+                sessions = [
+                    (await agent.new_session(cwd=".", mcp_servers=[])).session_id
+                    for _ in range(2)
+                ]
+                await asyncio.gather(
+                    *[
+                        agent.prompt(
+                            prompt=[TextContentBlock(text=f"task {i}", type="text")],
+                            session_id=session_id,
+                        )
+                        for i, session_id in enumerate(sessions)
+                    ]
+                )
+                for i, session_id in enumerate(sessions):
+                    expected = [f"task {i}", f"answer to task {i}"]
+                    history = agent._histories[session_id]
+                    assert [m.content for m in history.messages[1:]] == expected
+                    stored = agent._session_store.load_messages(session_id)
+                    assert [m.content for m in stored] == expected
+                await agent.close()
+
+
+@pytest.mark.asyncio
+async def test_acp_wrapper_cancel_session_servers(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key")
+    with patch("workflows_acp.mcp_wrapper.MCPClient", new=MockMcpClient) as _:
+        with patch("workflows_acp.acp_wrapper.LLMWrapper", new=MockLLMWrapper) as _:
+            agent = await _create_agent(use_mcp=False, persist_sessions=False)
+            agent._conn = cast(Client, MockACPClient())
+            server = McpServerStdio(name="stdio", command="npx", args=[], env=[])
+            resp = await agent.new_session(cwd=".", mcp_servers=[server])
+            clients, _ = agent._shared_mcp_servers.resolve(
+                agent._session_mcp_servers[resp.session_id]
+            )
+            # a call in flight on a server declared by the client for the session
+            call = asyncio.create_task(asyncio.sleep(10))
+            clients["stdio"]._session_calls[resp.session_id] = {call}
+            await agent.cancel(session_id=resp.session_id)
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            await agent.close()
+
+
+class WaitingACPClient(MockACPClient):
+    """Client whose user only answers permission requests once released"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.answer = asyncio.Event()
+
+    async def request_permission(self, *args, **kwargs) -> Any:
+        await self.answer.wait()
+        return await super().request_permission(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_acp_wrapper_prompt_not_blocked_by_permission(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GOOGLE_API_KEY", "fake-api-key")
+    with patch("workflows_acp.acp_wrapper.McpWrapper", new=MockMcpWrapper) as _:
+        with patch("workflows_acp.acp_wrapper.LLMWrapper", new=MockLLMWrapper) as _:
+            with patch(
+                "workflows_acp.acp_wrapper.AgentWorkflow", new=SlowWorkflow
+            ) as _:
+                agent = await _create_agent(use_mcp=False, persist_sessions=False)
+                client = WaitingACPClient()
+                agent._conn = cast(Client, client)
+                waiting, other = [
+                    (await agent.new_session(cwd=".", mcp_servers=[])).session_id
+                    for _ in range(2)
+                ]
+                waiting_prompt = asyncio.create_task(
+                    agent.prompt(
+                        prompt=[TextContentBlock(text="ask", type="text")],
+                        session_id=waiting,
+                    )
+                )
+                await asyncio.sleep(0)
+                # the other session is prompted while the user has not answered yet
+                await asyncio.wait_for(
+                    agent.prompt(
+                        prompt=[TextContentBlock(text="hello", type="text")],
+                        session_id=other,
+                    ),
+                    timeout=1,
+                )
+                assert not waiting_prompt.done()
+                client.answer.set()
+                await waiting_prompt
+                assert [m.content for m in agent._histories[waiting].messages[1:]] == [
+                    "ask",
+                    "answer to ask",
+                ]
+                await agent.close()
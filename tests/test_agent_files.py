@@ -0,0 +1,55 @@
+import os
+import pytest
+
+from pathlib import Path
+from workflows_acp.agent_files import AgentsMdCache, WatchedFile, load_yaml_config
+
+
+def _touch_later(path: Path, content: str) -> None:
+    # make sure the modification time changes, whatever the resolution of the filesystem
+    stat = path.stat()
+    path.write_text(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_watched_file(tmp_path: Path) -> None:
+    path = tmp_path / "agent_config.yaml"
+    watched = WatchedFile(path, parse=load_yaml_config, default={}, poll_interval=0)
+    assert watched.get() == {}
+    assert watched.version == 1
+    path.write_text("agent_task: first")
+    assert watched.get() == {"agent_task": "first"}
+    assert watched.version == 2
+    # unchanged files are not read again
+    assert watched.get() == {"agent_task": "first"}
+    assert watched.version == 2
+    _touch_later(path, "agent_task: second")
+    assert watched.get() == {"agent_task": "second"}
+    # invalid content keeps the previous configuration
+    _touch_later(path, "- not a mapping")
+    assert watched.get() == {"agent_task": "second"}
+    assert watched.version == 3
+    # within the poll interval, the file is not checked
+    throttled = WatchedFile(path, parse=str.upper, default="", poll_interval=60)
+    assert throttled.get() == "- NOT A MAPPING"
+    _touch_later(path, "changed")
+    assert throttled.get() == "- NOT A MAPPING"
+    # there is no previous configuration to fall back on the first time
+    invalid = tmp_path / "invalid.yaml"
+    invalid.write_text("- not a mapping")
+    with pytest.raises(ValueError):
+        WatchedFile(invalid, parse=load_yaml_config, default={}).get()
+
+
+def test_agents_md_cache(tmp_path: Path) -> None:
+    (tmp_path / "one").mkdir()
+    (tmp_path / "two").mkdir()
+    (tmp_path / "one" / "AGENTS.md").write_text("Use tabs")
+    cache = AgentsMdCache(poll_interval=0)
+    assert (
+        cache.instructions(tmp_path / "one")
+        == "## Additional Instructions\n\n```md\nUse tabs\n```\n"
+    )
+    assert cache.instructions(str(tmp_path / "two")) == ""
+    _touch_later(tmp_path / "one" / "AGENTS.md", "Use spaces")
+    assert "Use spaces" in cache.instructions(tmp_path / "one")
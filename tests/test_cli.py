@@ -165,3 +165,32 @@ def test_load_agentfs_command(
     )
     assert result.exit_code == 0
     assert (tmp_path / "agent.db").exists()
+
+
+def test_sync_agentfs_command(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    (tmp_path / "test.txt").write_text("hello")
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(app, ["load-agentfs"])
+    assert result.exit_code == 0
+    (tmp_path / "test1.txt").write_text("world")
+    result = runner.invoke(app, ["sync-agentfs"])
+    assert result.exit_code == 0
+    assert "1 added, 0 updated, 0 removed, 1 unchanged" in result.output
+
+
+def test_stats_agentfs_command(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    result = runner.invoke(app, ["stats-agentfs"])
+    assert result.exit_code == 1
+    (tmp_path / "test.txt").write_text("hello")
+    runner.invoke(app, ["load-agentfs"])
+    result = runner.invoke(app, ["stats-agentfs"])
+    assert result.exit_code == 0
+    assert "Fragmentation" in result.output
+    assert "Files: 1 (5 bytes)" in result.output
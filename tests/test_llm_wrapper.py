@@ -1,13 +1,15 @@
 import pytest
 
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from workflows_acp._templating import Template
 from workflows_acp.constants import DEFAULT_MODEL, DEFAULT_TASK, SYSTEM_PROMPT_STRING
 from workflows_acp.tools import TOOLS
 from workflows_acp.llm_wrapper import LLMWrapper
+from workflows_acp.llms import ChatHistory, ChatMessage
+from workflows_acp.llms.models import NativeToolCall
 from workflows_acp.models import Action, Tool
-from .conftest import MockLLM
+from .conftest import MockLLM, MCP_TOOLS
 
 
 def say_hello() -> str:
@@ -75,3 +77,222 @@ async def test_llm_wrapper_generate() -> None:
         assert len(llm._chat_history.messages) == 2
         assert llm._chat_history.messages[1].role == "assistant"
         assert llm._chat_history.messages[1].content == result.model_dump_json()
+
+
+def test_llm_wrapper_add_tools() -> None:
+    llm = LLMWrapper(tools=[HELLO_TOOL], api_key="fake-api-key")
+    other_tool = Tool(fn=say_hello, name="say_hi", description="Say hi")
+    llm.add_tools([HELLO_TOOL, other_tool])
+    assert [tool.name for tool in llm.tools] == ["say_hello", "say_hi"]
+    assert other_tool.to_string() in llm._chat_history.messages[0].content
+    assert llm.get_tool("say_hi") == other_tool
+
+
+def test_llm_wrapper_set_mcp_tools() -> None:
+    mcp_tool = Tool.from_mcp_tool(MCP_TOOLS[0], "server")
+    llm = LLMWrapper(tools=[HELLO_TOOL, mcp_tool], api_key="fake-api-key")
+    new_tool = Tool.from_mcp_tool(
+        MCP_TOOLS[0].model_copy(update={"name": "subtract"}), "server"
+    )
+    llm.set_mcp_tools("server", [new_tool])
+    assert [tool.name for tool in llm.tools] == ["say_hello", "mcp_server__subtract"]
+    assert new_tool.to_string() in llm._chat_history.messages[0].content
+    assert mcp_tool.to_string() not in llm._chat_history.messages[0].content
+
+
+def test_llm_wrapper_set_session_tools() -> None:
+    mcp_tool = Tool.from_mcp_tool(MCP_TOOLS[0], "server")
+    llm = LLMWrapper(tools=[HELLO_TOOL, mcp_tool], api_key="fake-api-key")
+    session_tool = Tool.from_mcp_tool(
+        MCP_TOOLS[0].model_copy(update={"name": "subtract"}), "session-server"
+    )
+    # tools whose name is taken are skipped
+    llm.set_session_tools([session_tool, mcp_tool])
+    assert llm.session_tools == [session_tool]
+    assert llm.get_tool("mcp_session-server__subtract") is session_tool
+    assert session_tool.to_string() in llm._chat_history.messages[0].content
+    llm.set_session_tools([])
+    assert [tool.name for tool in llm.tools] == ["say_hello", "mcp_server__add"]
+    assert session_tool.to_string() not in llm._chat_history.messages[0].content
+
+
+@pytest.mark.asyncio
+async def test_llm_wrapper_native_tool_calling() -> None:
+    mcp_tool = Tool.from_mcp_tool(MCP_TOOLS[0], "server")
+    llm = LLMWrapper(
+        tools=[HELLO_TOOL, mcp_tool],
+        api_key="fake-api-key",
+        native_tool_calling=True,
+    )
+    # schemas are declared through the API, not in the system prompt
+    assert "- `say_hello`: Say hello" in llm._chat_history.messages[0].content
+    assert HELLO_TOOL.to_string() not in llm._chat_history.messages[0].content
+    schemas = llm.get_tool_schemas()
+    assert [schema["name"] for schema in schemas] == [
+        "say_hello",
+        "mcp_server__add",
+        "stop",
+    ]
+    assert schemas[0]["parameters"] == HELLO_TOOL.input_schema()
+    assert schemas[1]["parameters"] == MCP_TOOLS[0].inputSchema
+    llm._client = MockLLM(api_key="", model="")
+    action = await llm.generate_action()
+    assert action is not None
+    assert action.action_type == "stop"
+    assert action.stop is not None
+    assert action.stop.final_output == "this is a final result"
+    # malformed arguments are reported, so that the model can fix them
+    for tool_call in [
+        NativeToolCall(name="stop", arguments={"final_output": 1}),
+        NativeToolCall(name="say_hello", arguments={}, raw_arguments='{"name": '),
+    ]:
+        with patch.object(
+            llm._client, "generate_tool_call", AsyncMock(return_value=tool_call)
+        ):
+            with pytest.raises(ValueError):
+                await llm.generate_action()
+    with pytest.raises(ValueError, match="No tool can be named `stop`"):
+        LLMWrapper(
+            tools=[HELLO_TOOL.model_copy(update={"name": "stop"})],
+            api_key="fake-api-key",
+            native_tool_calling=True,
+        )
+
+
+@pytest.mark.asyncio
+async def test_llm_wrapper_tool_selection() -> None:
+    tools = [
+        Tool.from_mcp_tool(
+            MCP_TOOLS[0].model_copy(
+                update={"name": name, "description": description, "inputSchema": {}}
+            ),
+            "server",
+        )
+        for name, description in [
+            ("add", "Add two integers together"),
+            ("send_email", "Send an email to a recipient"),
+            ("get_weather", "Get the weather forecast of a city"),
+        ]
+    ]
+    llm = LLMWrapper(
+        tools=[HELLO_TOOL, *tools], api_key="fake-api-key", tool_selection_top_k=1
+    )
+    # all the tools are listed until a request selects some
+    assert tools[2].to_string() in llm._chat_history.messages[0].content
+    llm.select_tools("please send an email to Alice")
+    prompt = llm._chat_history.messages[0].content
+    assert HELLO_TOOL.to_string() in prompt
+    assert tools[1].to_string() in prompt
+    assert tools[0].to_string() not in prompt
+    assert tools[2].to_string() not in prompt
+    assert "use `find_tools`" in prompt
+    # unselected tools can still be searched and then called
+    find_tools = llm.get_tool("find_tools")
+    result = await find_tools.execute({"query": "weather in Rome"})
+    assert result == tools[2].to_string()
+    assert tools[2].to_string() in llm._chat_history.messages[0].content
+    assert llm.get_tool("mcp_server__add") is tools[0]
+    with pytest.raises(ValueError, match="No tool can be named `find_tools`"):
+        LLMWrapper(
+            tools=[HELLO_TOOL.model_copy(update={"name": "find_tools"})],
+            api_key="fake-api-key",
+            tool_selection_top_k=1,
+        )
+
+
+def test_llm_wrapper_compact_tools() -> None:
+    mcp_tool = Tool.from_mcp_tool(MCP_TOOLS[0], "server")
+    llm = LLMWrapper(
+        tools=[HELLO_TOOL, mcp_tool], api_key="fake-api-key", compact_tools=True
+    )
+    prompt = llm._chat_history.messages[0].content
+    assert "- `say_hello()`: Say hello" in prompt
+    assert mcp_tool.to_compact_string() in prompt
+    assert "Tool Output Schema" not in prompt
+    size = llm.system_prompt_size()
+    assert size["compact"] == len(prompt)
+    assert size["compact"] < size["full"]
+
+
+def test_llm_wrapper_reload_instructions(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "session").mkdir()
+    (tmp_path / "session" / "AGENTS.md").write_text("Session instructions")
+    llm = LLMWrapper(tools=[HELLO_TOOL], api_key="fake-api-key")
+    assert "Hello world" in llm._chat_history.messages[0].content
+    llm.load_instructions(str(tmp_path / "session"))
+    prompt = llm._chat_history.messages[0].content
+    assert "Session instructions" in prompt
+    assert "Hello world" not in prompt
+    assert HELLO_TOOL.to_string() in prompt
+    llm.set_task("Write poems")
+    assert "Write poems" in llm._chat_history.messages[0].content
+    llm.set_task(None)
+    assert DEFAULT_TASK in llm._chat_history.messages[0].content
+
+
+def test_llm_wrapper_shared_system_message() -> None:
+    llm = LLMWrapper(tools=[HELLO_TOOL], api_key="fake-api-key")
+    histories = [
+        ChatHistory(
+            messages=[
+                ChatMessage(role="system", content=""),
+                ChatMessage(role="user", content=f"hello {i}"),
+            ]
+        )
+        for i in range(2)
+    ]
+    for history in histories:
+        llm.use_history(history)
+    # the histories of the sessions share the same system message
+    assert histories[0].messages[0] is histories[1].messages[0]
+    llm.set_task("Write poems")
+    assert "Write poems" in histories[1].messages[0].content
+    assert "Write poems" not in histories[0].messages[0].content
+
+
+@pytest.mark.asyncio
+async def test_llm_wrapper_for_session(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "session").mkdir()
+    (tmp_path / "session" / "AGENTS.md").write_text("Session instructions")
+    mcp_tool = Tool.from_mcp_tool(MCP_TOOLS[0], "server")
+    llm = LLMWrapper(
+        tools=[HELLO_TOOL, mcp_tool], api_key="fake-api-key", tool_selection_top_k=1
+    )
+    session_tool = Tool.from_mcp_tool(
+        MCP_TOOLS[0].model_copy(update={"name": "subtract"}), "session-server"
+    )
+    histories = [
+        ChatHistory(messages=[ChatMessage(role="system", content="")]) for _ in range(2)
+    ]
+    views = [
+        llm.for_session(
+            histories[0], session_tools=[session_tool], cwd=str(tmp_path / "session")
+        ),
+        llm.for_session(histories[1]),
+    ]
+    views[0].add_user_message("hello")
+    assert [m.content for m in histories[0].messages[1:]] == ["hello"]
+    assert len(histories[1].messages) == 1
+    # the tools and instructions of a session are only visible to its view
+    assert views[0].get_tool("mcp_session-server__subtract") is session_tool
+    with pytest.raises(ValueError):
+        views[1].get_tool("mcp_session-server__subtract")
+    assert llm.session_tools == []
+    assert "Session instructions" in histories[0].messages[0].content
+    assert "Hello world" in histories[1].messages[0].content
+    assert "Hello world" in llm._chat_history.messages[0].content
+    # the tools found by a session are selected for it only
+    await views[0].get_tool("find_tools").execute({"query": "subtract"})
+    assert views[0]._selected_tools == {"mcp_session-server__subtract"}
+    assert views[1]._selected_tools is None
+    assert llm._selected_tools is None
@@ -0,0 +1,55 @@
+import time
+
+from pathlib import Path
+from copy import deepcopy
+from workflows_acp.mcp_cache import McpToolsCache, McpResultCache, config_hash
+from .conftest import MCP_TOOLS, MCP_CONFIG
+
+
+def test_config_hash() -> None:
+    server = MCP_CONFIG["mcpServers"]["with-stdio"]
+    changed = deepcopy(server)
+    changed["args"] = ["@mcp/other-server"]
+    assert config_hash(server) == config_hash(deepcopy(server))
+    assert config_hash(server) != config_hash(changed)
+
+
+def test_tools_cache(tmp_path: Path) -> None:
+    server = MCP_CONFIG["mcpServers"]["with-stdio"]
+    cache = McpToolsCache(tmp_path / "cache.json")
+    assert cache.get(server) is None
+    assert cache.put(server, MCP_TOOLS)
+    assert not cache.put(server, MCP_TOOLS)
+    # a new instance reads the catalogue back from disk
+    cache = McpToolsCache(tmp_path / "cache.json")
+    assert cache.get(server) == MCP_TOOLS
+    assert cache.get(MCP_CONFIG["mcpServers"]["with-http"]) is None
+    cache.invalidate(server)
+    assert McpToolsCache(tmp_path / "cache.json").get(server) is None
+    # corrupted caches are ignored
+    (tmp_path / "broken.json").write_text("{not json")
+    assert McpToolsCache(tmp_path / "broken.json").get(server) is None
+
+
+def test_result_cache() -> None:
+    cache = McpResultCache(ttl=0.1, max_entries=2)
+    assert cache.get("server", "search", {"q": "a", "n": 1}) == (False, None)
+    cache.put("server", "search", {"q": "a", "n": 1}, "result a")
+    # arguments are canonicalized
+    assert cache.get("server", "search", {"n": 1, "q": "a"}) == (True, "result a")
+    assert cache.get("other", "search", {"q": "a", "n": 1}) == (False, None)
+    cache.put("server", "search", {"q": "b"}, "result b")
+    cache.get("server", "search", {"q": "a", "n": 1})
+    cache.put("server", "search", {"q": "c"}, "result c")
+    # the least recently used result is evicted
+    assert cache.get("server", "search", {"q": "b"}) == (False, None)
+    assert cache.get("server", "search", {"q": "c"}) == (True, "result c")
+    time.sleep(0.15)
+    assert cache.get("server", "search", {"q": "c"}) == (False, None)
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 4
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 1
+    assert stats["hit_rate"] == 3 / 7
@@ -0,0 +1,184 @@
+import asyncio
+import pytest
+
+from typing import Any, cast
+from unittest.mock import patch
+from workflows_acp.mcp_pool import McpSessionPool, McpQueueFullError
+from workflows_acp.mcp_wrapper import McpWrapper
+from .conftest import MockMcpClient, MockMcpSession, MCP_TOOLS, MCP_CONFIG
+
+
+class SlowMcpSession(MockMcpSession):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.die_on_call = False
+
+    async def call_tool(self, *args, **kwargs) -> Any:
+        if self.die_on_call:
+            self._is_connected = False
+            raise ConnectionError("connection closed")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return await super().call_tool(*args, **kwargs)
+
+
+class CountingMcpClient(MockMcpClient):
+    def __init__(self, *args, **kwargs) -> None:
+        self.sessions: list[SlowMcpSession] = []
+
+    async def create_session(self, *args, **kwargs) -> SlowMcpSession:
+        session = SlowMcpSession(tools=MCP_TOOLS)
+        self.sessions.append(session)
+        return session
+
+
+@pytest.mark.asyncio
+async def test_session_reuse_and_in_flight_limit() -> None:
+    client = CountingMcpClient()
+    pool = McpSessionPool(cast(Any, client), max_in_flight=2, ping_interval=0)
+    session = await pool.acquire("with-stdio")
+    assert await pool.acquire("with-stdio") is session
+    assert "with-stdio" in pool
+
+    async def _call() -> None:
+        async with pool.session("with-stdio") as s:
+            await s.call_tool(name="add", arguments={})
+
+    await asyncio.gather(*[_call() for _ in range(6)])
+    assert len(client.sessions) == 1
+    assert client.sessions[0].max_in_flight == 2
+    await pool.close()
+    assert not session.is_connected
+    assert "with-stdio" not in pool
+
+
+@pytest.mark.asyncio
+async def test_health_check_reconnects() -> None:
+    client = CountingMcpClient()
+    pool = McpSessionPool(cast(Any, client), ping_interval=0)
+    session = await pool.acquire("with-stdio")
+    assert await pool.check_health() == []
+    session.alive = False
+    assert await pool.check_health() == ["with-stdio"]
+    assert not session.is_connected
+    new_session = await pool.acquire("with-stdio")
+    assert new_session is not session
+    assert len(client.sessions) == 2
+    # servers with a call in flight are not pinged
+    new_session.alive = False
+    pool._in_flight["with-stdio"] = 1
+    assert await pool.check_health() == []
+    assert new_session.is_connected
+    pool._in_flight["with-stdio"] = 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_health_loop_survives_errors() -> None:
+    client = CountingMcpClient()
+    pool = McpSessionPool(cast(Any, client), ping_interval=0.01)
+    calls = 0
+
+    async def _check_health() -> list[str]:
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("unexpected")
+
+    with patch.object(pool, "check_health", new=_check_health):
+        await pool.acquire("with-stdio")
+        await asyncio.sleep(0.05)
+        assert calls > 1
+        assert pool._health_task is not None and not pool._health_task.done()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_with_backoff() -> None:
+    class FailingMcpClient(CountingMcpClient):
+        async def create_session(self, *args, **kwargs) -> SlowMcpSession:
+            if len(self.sessions) < 2:
+                self.sessions.append(SlowMcpSession())
+                raise ConnectionError("connection refused")
+            return await super().create_session(*args, **kwargs)
+
+    client = FailingMcpClient()
+    pool = McpSessionPool(
+        cast(Any, client), ping_interval=0, reconnect_attempts=3, reconnect_delay=0.01
+    )
+    session = await pool.acquire("with-stdio")
+    assert session.is_connected
+    assert len(client.sessions) == 3
+    pool = McpSessionPool(
+        cast(Any, FailingMcpClient()), ping_interval=0, reconnect_delay=0.01
+    )
+    with pytest.raises(ConnectionError):
+        await pool.acquire("with-stdio", attempts=2)
+
+
+@pytest.mark.asyncio
+async def test_call_tool_reconnects_transparently() -> None:
+    with patch("workflows_acp.mcp_wrapper.MCPClient", new=CountingMcpClient) as _:
+        mcp_client = McpWrapper.from_config_dict(MCP_CONFIG)
+        client = cast(CountingMcpClient, mcp_client._client)
+        result = await mcp_client.call_tool(
+            "mcp_with-stdio__add", {"x": 1}, "with-stdio"
+        )
+        assert result == "Called tool add with arguments: {'x': 1}"
+        # the server dies in the middle of the next call
+        client.sessions[0].die_on_call = True
+        result = await mcp_client.call_tool(
+            "mcp_with-stdio__add", {"x": 2}, "with-stdio"
+        )
+        assert result == "Called tool add with arguments: {'x': 2}"
+        assert len(client.sessions) == 2
+        await mcp_client.close()
+        assert not client.sessions[1].is_connected
+
+
+@pytest.mark.asyncio
+async def test_idle_shutdown() -> None:
+    client = CountingMcpClient()
+    pool = McpSessionPool(cast(Any, client), ping_interval=0)
+    pool.idle_timeouts["with-stdio"] = 0.05
+    session = await pool.acquire("with-stdio")
+    await pool.acquire("with-http")
+    # servers with a call in flight are never shut down
+    async with pool.session("with-stdio"):
+        await asyncio.sleep(0.1)
+        assert session.is_connected
+        assert await pool.close_idle() == []
+    # idle servers are shut down in the background
+    await asyncio.sleep(0.15)
+    assert not session.is_connected
+    assert "with-stdio" not in pool
+    assert "with-http" in pool
+    assert await pool.close_idle() == []
+    # the server is restarted on its next call
+    async with pool.session("with-stdio") as new_session:
+        assert new_session is not session
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_queue_limit() -> None:
+    client = CountingMcpClient()
+    pool = McpSessionPool(
+        cast(Any, client), max_in_flight=4, max_queued=4, ping_interval=0
+    )
+    pool.server_max_in_flight["with-stdio"] = 1
+    pool.server_max_queued["with-stdio"] = 1
+
+    async def _call() -> None:
+        async with pool.session("with-stdio") as s:
+            await s.call_tool(name="add", arguments={})
+
+    # one call in flight, one waiting, one rejected
+    results = await asyncio.gather(*[_call() for _ in range(3)], return_exceptions=True)
+    assert results[:2] == [None, None]
+    assert isinstance(results[2], McpQueueFullError)
+    assert client.sessions[0].max_in_flight == 1
+    await pool.close()
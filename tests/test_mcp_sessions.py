@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+
+from pathlib import Path
+from unittest.mock import patch
+from acp.schema import (
+    EnvVariable,
+    HttpHeader,
+    HttpMcpServer,
+    McpServerStdio,
+    SseMcpServer,
+)
+from workflows_acp.mcp_sessions import (
+    SharedMcpServers,
+    acp_server_to_config,
+    attach_session_servers,
+)
+from workflows_acp.mcp_wrapper import McpWrapper
+from .conftest import MockMcpClient, MockMcpSession, MCP_CONFIG, MCP_TOOLS
+
+STDIO_SERVER = McpServerStdio(
+    name="stdio",
+    command="npx",
+    args=["-y", "server"],
+    env=[EnvVariable(name="TOKEN", value="secret")],
+)
+HTTP_SERVER = HttpMcpServer(
+    name="http",
+    type="http",
+    url="https://example.com/mcp",
+    headers=[HttpHeader(name="Authorization", value="Bearer token")],
+)
+
+
+def test_acp_server_to_config() -> None:
+    assert acp_server_to_config(STDIO_SERVER) == {
+        "command": "npx",
+        "args": ["-y", "server"],
+        "env": {"TOKEN": "secret"},
+    }
+    assert acp_server_to_config(HTTP_SERVER) == {
+        "url": "https://example.com/mcp",
+        "headers": {"Authorization": "Bearer token"},
+    }
+    sse_server = SseMcpServer(
+        name="sse", type="sse", url="https://example.com/sse", headers=[]
+    )
+    assert acp_server_to_config(sse_server) == {
+        "url": "https://example.com/sse",
+        "headers": {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_shared_mcp_servers(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    with patch("workflows_acp.mcp_wrapper.MCPClient", new=MockMcpClient) as _:
+        shared_servers = SharedMcpServers()
+        keys_one = await attach_session_servers(
+            shared_servers, [STDIO_SERVER, HTTP_SERVER]
+        )
+        # the same server is shared
+        keys_two = await attach_session_servers(shared_servers, [STDIO_SERVER])
+        assert keys_two == keys_one[:1]
+        assert shared_servers[keys_one[0]]["refs"] == 2
+        clients, tools = shared_servers.resolve(keys_two)
+        assert list(clients) == ["stdio"]
+        assert [tool.name for tool in tools] == ["mcp_stdio__add"]
+        assert tools[0].mcp_metadata is not None
+        assert tools[0].mcp_metadata["server"] == "stdio"
+        # the same definition, under another name, keeps the name of the session
+        keys_other = await attach_session_servers(
+            shared_servers, [STDIO_SERVER.model_copy(update={"name": "other"})]
+        )
+        assert keys_other != keys_one[:1]
+        clients, tools = shared_servers.resolve(keys_one[:1] + keys_other)
+        assert list(clients) == ["stdio", "other"]
+        assert [tool.name for tool in tools] == ["mcp_stdio__add", "mcp_other__add"]
+        await shared_servers.release(keys_other[0])
+        assert keys_other[0] not in shared_servers
+        # names of the servers in .mcp.json cannot be reused
+        static_client = McpWrapper.from_config_dict(MCP_CONFIG)
+        keys_three = await attach_session_servers(
+            shared_servers,
+            [HTTP_SERVER.model_copy(update={"name": "with-http"})],
+            static_client=static_client,
+        )
+        assert keys_three == []
+        await static_client.close()
+        # servers are closed when no session uses them anymore
+        await shared_servers.release(keys_one[1])
+        assert keys_one[1] not in shared_servers
+        await shared_servers.release(keys_one[0])
+        assert shared_servers[keys_one[0]]["refs"] == 1
+        await shared_servers.release(keys_two[0])
+        assert keys_one[0] not in shared_servers
+
+
+class UnreachableOnceMcpClient(MockMcpClient):
+    attempts = 0
+
+    async def create_session(self, *args, **kwargs) -> MockMcpSession:
+        UnreachableOnceMcpClient.attempts += 1
+        if UnreachableOnceMcpClient.attempts == 1:
+            raise ConnectionError("connection refused")
+        return MockMcpSession(tools=MCP_TOOLS)
+
+
+@pytest.mark.asyncio
+async def test_shared_mcp_servers_retry(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    with patch(
+        "workflows_acp.mcp_wrapper.MCPClient", new=UnreachableOnceMcpClient
+    ) as _:
+        shared_servers = SharedMcpServers(retry_delay=0.01)
+        keys = await attach_session_servers(shared_servers, [STDIO_SERVER])
+        assert shared_servers[keys[0]]["tools"] == []
+        # the server is retried in the background, and its tools are shared once it recovers
+        for _ in range(100):
+            if len(shared_servers[keys[0]]["tools"]) > 0:
+                break
+            await asyncio.sleep(0.01)
+        assert [tool.name for tool in shared_servers[keys[0]]["tools"]] == [
+            "mcp_stdio__add"
+        ]
+        await shared_servers.close()
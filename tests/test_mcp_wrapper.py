@@ -1,18 +1,49 @@
+import asyncio
 import pytest
 import json
+import time
 
 from unittest.mock import patch
 from typing import cast, Any
 from pathlib import Path
 from copy import deepcopy
-from workflows_acp.models import Tool
+from mcp.types import (
+    BlobResourceContents,
+    CallToolResult,
+    EmbeddedResource,
+    ImageContent,
+    ResourceLink,
+    ServerNotification,
+    TextContent,
+    ToolAnnotations,
+    ToolListChangedNotification,
+)
+from workflows_acp.models import Tool, mcp_tool_name
 from workflows_acp.mcp_wrapper import (
     McpWrapper,
     _validate_mcp_server,
     McpValidationError,
     MCP_CONFIG_FILE,
+    normalize_tool_result,
 )
-from .conftest import MockMcpClient, MCP_TOOLS, MCP_CONFIG
+from .conftest import MockMcpClient, MockMcpSession, MCP_TOOLS, MCP_CONFIG
+
+
+class FlakyMcpClient(MockMcpClient):
+    # the HTTP server hangs on the first attempt and fails on the second one
+    def __init__(self, *args, **kwargs) -> None:
+        self.attempts: dict[str, int] = {}
+
+    async def create_session(self, server_name: str, *args, **kwargs) -> MockMcpSession:
+        self.attempts[server_name] = self.attempts.get(server_name, 0) + 1
+        if server_name == "with-http":
+            if self.attempts[server_name] == 1:
+                await asyncio.sleep(10)
+            elif self.attempts[server_name] == 2:
+                raise ConnectionError("connection refused")
+        else:
+            await asyncio.sleep(0.1)
+        return MockMcpSession(tools=MCP_TOOLS)
 
 
 def setup_folder(tmp_path: Path) -> None:
@@ -64,11 +95,278 @@ async def test_mcp_wrapper_methods(
         tools = await mcp_client.all_tools()
         actual_tool = Tool.from_mcp_tool(MCP_TOOLS[0], "with-stdio")
         assert len(tools) == 2
+        # both servers expose `add`, under different names
+        assert [tool.name for tool in tools] == [
+            "mcp_with-stdio__add",
+            "mcp_with-http__add",
+        ]
         assert tools[0].name == actual_tool.name
         assert tools[0].description == actual_tool.description
         assert tools[0].fn is None
         assert tools[0].mcp_metadata == actual_tool.mcp_metadata
         result = await mcp_client.call_tool(
-            tool_name="mcp_add", tool_input={"x": 1, "y": 1}, server="with-stdio"
+            tool_name=tools[0].name,
+            tool_input={"x": 1, "y": 1},
+            server="with-stdio",
         )
         assert result == "Called tool add with arguments: {'x': 1, 'y': 1}"
+
+
+@pytest.mark.asyncio
+async def test_mcp_wrapper_partial_discovery(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    with patch("workflows_acp.mcp_wrapper.MCPClient", new=FlakyMcpClient) as _:
+        mcp_client = McpWrapper.from_config_dict(MCP_CONFIG)
+        start = time.perf_counter()
+        tools = await mcp_client.all_tools(connect_timeout=0.3)
+        assert time.perf_counter() - start < 1
+        assert len(tools) == 1
+        assert tools[0].mcp_metadata is not None
+        assert tools[0].mcp_metadata["server"] == "with-stdio"
+        recovered: list[Tool] = []
+        task = mcp_client.retry_failed_servers(
+            on_recovered=recovered.extend, delay=0.01, connect_timeout=0.3
+        )
+        assert task is not None
+        await asyncio.wait_for(task, timeout=2)
+        assert len(recovered) == 1
+        assert recovered[0].mcp_metadata is not None
+        assert recovered[0].mcp_metadata["server"] == "with-http"
+        assert cast(FlakyMcpClient, mcp_client._client).attempts["with-http"] == 3
+        assert mcp_client.retry_failed_servers(on_recovered=recovered.extend) is None
+        await mcp_client.close()
+
+
+class CatalogueMcpClient(MockMcpClient):
+    tools = MCP_TOOLS
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.created: list[str] = []
+        self.sessions: list[MockMcpSession] = []
+
+    async def create_session(self, server_name: str, *args, **kwargs) -> MockMcpSession:
+        self.created.append(server_name)
+        session = MockMcpSession(tools=self.tools)
+        self.sessions.append(session)
+        return session
+
+
+@pytest.mark.asyncio
+async def test_mcp_wrapper_tools_cache(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    with patch("workflows_acp.mcp_wrapper.MCPClient", new=CatalogueMcpClient) as _:
+        mcp_client = McpWrapper.from_config_dict(MCP_CONFIG)
+        tools = await mcp_client.all_tools()
+        assert len(tools) == 2
+        assert mcp_client.refresh_cached_servers() is None
+        await mcp_client.close()
+        # the second startup does not contact the servers
+        mcp_client = McpWrapper.from_config_dict(MCP_CONFIG)
+        client = cast(CatalogueMcpClient, mcp_client._client)
+        cached_tools = await mcp_client.all_tools()
+        assert cached_tools == tools
+        assert client.created == []
+        # the background refresh notifies the servers whose tools changed
+        changes: list[tuple[str, list[Tool]]] = []
+        mcp_client.add_tools_listener(
+            lambda server, tools: changes.append((server, tools))
+        )
+        new_tool = MCP_TOOLS[0].model_copy(update={"name": "subtract"})
+        CatalogueMcpClient.tools = [new_tool]
+        try:
+            task = mcp_client.refresh_cached_servers()
+            assert task is not None
+            await task
+        finally:
+            CatalogueMcpClient.tools = MCP_TOOLS
+        assert sorted(client.created) == ["with-http", "with-stdio"]
+        assert sorted(server for server, _ in changes) == ["with-http", "with-stdio"]
+        assert changes[0][1][0].name == mcp_tool_name(changes[0][0], "subtract")
+        # tools/list_changed invalidates and refreshes the catalogue of a server
+        changes.clear()
+        client.sessions[0]._tools = [
+            MCP_TOOLS[0].model_copy(update={"name": "multiply"})
+        ]
+        notification = ServerNotification(
+            ToolListChangedNotification(method="notifications/tools/list_changed")
+        )
+        await client.sessions[0].connector.message_handler(notification)
+        await asyncio.sleep(0.1)
+        assert len(changes) == 1
+        assert changes[0][1][0].name == mcp_tool_name(changes[0][0], "multiply")
+        assert mcp_client._cached_tools(changes[0][0]) == changes[0][1]
+        await mcp_client.close()
+
+
+@pytest.mark.asyncio
+async def test_mcp_wrapper_lazy(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    with patch("workflows_acp.mcp_wrapper.MCPClient", new=CatalogueMcpClient) as _:
+        mcp_client = McpWrapper.from_config_dict(MCP_CONFIG, lazy=True)
+        await mcp_client.all_tools()
+        await mcp_client.close()
+        mcp_client = McpWrapper.from_config_dict(MCP_CONFIG, lazy=True, idle_timeout=60)
+        client = cast(CatalogueMcpClient, mcp_client._client)
+        assert mcp_client._pool.idle_timeouts == {"with-stdio": 60}
+        assert len(await mcp_client.all_tools()) == 2
+        task = mcp_client.refresh_cached_servers()
+        assert task is not None
+        await task
+        # only the HTTP server is refreshed, the stdio server is started on first use
+        assert client.created == ["with-http"]
+        result = await mcp_client.call_tool(
+            "mcp_with-stdio__add", {"x": 1}, "with-stdio"
+        )
+        assert result == "Called tool add with arguments: {'x': 1}"
+        assert client.created == ["with-http", "with-stdio"]
+        await mcp_client.close()
+
+
+@pytest.mark.asyncio
+async def test_mcp_wrapper_result_cache(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    config = deepcopy(MCP_CONFIG)
+    config["mcpServers"]["with-http"]["readOnlyTools"] = ["add"]
+    read_only_tool = MCP_TOOLS[0].model_copy(
+        update={"name": "search", "annotations": ToolAnnotations(readOnlyHint=True)}
+    )
+    calls: list[str] = []
+
+    class CountingSession(MockMcpSession):
+        async def call_tool(self, *args, **kwargs) -> Any:
+            calls.append(kwargs["name"])
+            return await super().call_tool(*args, **kwargs)
+
+    class ReadOnlyMcpClient(MockMcpClient):
+        async def create_session(self, *args, **kwargs) -> MockMcpSession:
+            return CountingSession(tools=MCP_TOOLS + [read_only_tool])
+
+    with patch("workflows_acp.mcp_wrapper.MCPClient", new=ReadOnlyMcpClient) as _:
+        mcp_client = McpWrapper.from_config_dict(config, cache_results=True)
+        assert mcp_client.result_cache is not None
+        await mcp_client.all_tools()
+        for _ in range(3):
+            await mcp_client.call_tool(
+                "mcp_with-stdio__search", {"q": "docs"}, "with-stdio"
+            )
+            # allowlisted in the configuration of with-http only
+            await mcp_client.call_tool("mcp_with-http__add", {"x": 1}, "with-http")
+            await mcp_client.call_tool("mcp_with-stdio__add", {"x": 1}, "with-stdio")
+        assert calls.count("search") == 1
+        assert calls.count("add") == 4
+        stats = mcp_client.result_cache.stats()
+        assert stats["hits"] == 4
+        assert stats["misses"] == 2
+        await mcp_client.close()
+        # results are not cached unless requested
+        mcp_client = McpWrapper.from_config_dict(config)
+        assert mcp_client.result_cache is None
+        await mcp_client.close()
+
+
+def test_normalize_tool_result() -> None:
+    # non-MCP results are rendered as they are
+    assert normalize_tool_result("hello") == "hello"
+    result = CallToolResult(
+        content=[
+            TextContent(type="text", text="Found 2 libraries"),
+            TextContent(type="text", text='{\n  "ids": [\n    1,\n    2\n  ]\n}'),
+            ImageContent(type="image", data="A" * 4096, mimeType="image/png"),
+            ResourceLink(
+                type="resource_link",
+                name="README",
+                uri="file:///README.md",
+                mimeType="text/markdown",
+            ),
+            EmbeddedResource(
+                type="resource",
+                resource=BlobResourceContents(
+                    uri="file:///logo.png", mimeType="image/png", blob="AAAA"
+                ),
+            ),
+        ]
+    )
+    assert normalize_tool_result(result) == "\n".join(
+        [
+            "Found 2 libraries",
+            '{"ids":[1,2]}',
+            "[image: image/png, 3.0KB]",
+            "[resource: file:///README.md (README, text/markdown)]",
+            "[resource: file:///logo.png (image/png, 3B)]",
+        ]
+    )
+    # text parts repeating the structured content are dropped
+    result = CallToolResult(
+        content=[TextContent(type="text", text='{"sum": 3}')],
+        structuredContent={"sum": 3},
+    )
+    assert normalize_tool_result(result) == '{"sum":3}'
+    result = CallToolResult(
+        content=[TextContent(type="text", text="Invalid arguments")], isError=True
+    )
+    assert normalize_tool_result(result) == "[error] Invalid arguments"
+    result = CallToolResult(content=[TextContent(type="text", text="a" * 30)])
+    assert (
+        normalize_tool_result(result, max_chars=10)
+        == "a" * 10 + "... [truncated 20 characters]"
+    )
+
+
+@pytest.mark.asyncio
+async def test_mcp_wrapper_call_timeout_and_cancel() -> None:
+    config = deepcopy(MCP_CONFIG)
+    config["mcpServers"]["with-http"]["callTimeout"] = 0.05
+    config["mcpServers"]["with-http"]["maxConcurrentCalls"] = 2
+    config["mcpServers"]["with-http"]["maxQueuedCalls"] = 1
+
+    class HangingSession(MockMcpSession):
+        async def call_tool(self, *args, **kwargs) -> Any:
+            await asyncio.sleep(10)
+
+    class HangingMcpClient(MockMcpClient):
+        async def create_session(self, *args, **kwargs) -> MockMcpSession:
+            return HangingSession(tools=MCP_TOOLS)
+
+    with patch("workflows_acp.mcp_wrapper.MCPClient", new=HangingMcpClient) as _:
+        mcp_client = McpWrapper.from_config_dict(config)
+        assert mcp_client._pool.server_max_in_flight == {"with-http": 2}
+        assert mcp_client._pool.server_max_queued == {"with-http": 1}
+        start = time.monotonic()
+        result = await mcp_client.call_tool("mcp_with-http__add", {"x": 1}, "with-http")
+        assert time.monotonic() - start < 1
+        assert (
+            result
+            == "MCP tool mcp_with-http__add from server with-http did not answer within 0.05 seconds"
+        )
+        # calls of an ACP session are cancelled on request
+        call = asyncio.create_task(
+            mcp_client.call_tool(
+                "mcp_with-stdio__add", {"x": 1}, "with-stdio", session_id="1"
+            )
+        )
+        await asyncio.sleep(0.05)
+        assert mcp_client.cancel_calls("2") == 0
+        assert mcp_client.cancel_calls("1") == 1
+        result = await call
+        assert (
+            result
+            == "The call to MCP tool mcp_with-stdio__add from server with-stdio was cancelled"
+        )
+        assert mcp_client._session_calls == {}
+        await mcp_client.close()
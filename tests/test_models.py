@@ -1,6 +1,7 @@
 import pytest
 import asyncio
 
+from typing import Annotated
 from pydantic import ValidationError
 from mcp_use.client.session import Tool as McpTool
 from workflows_acp.models import (
@@ -88,6 +89,40 @@ async def test_tool_async() -> None:
     assert result == "SUCCESS"
 
 
+@pytest.mark.asyncio
+async def test_tool_argument_validation() -> None:
+    def scale(
+        x: int, factor: Annotated[float, "Scaling factor"] = 2.0, **kwargs
+    ) -> float:
+        return x * factor
+
+    def repeat(text: str, times: int) -> str:
+        return text * times
+
+    tool = Tool(name="scale", description="Scale a number", fn=scale)
+    schema = tool.input_schema()
+    assert schema is not None
+    assert schema["required"] == ["x"]
+    assert schema["properties"]["factor"]["description"] == "Scaling factor"
+    # arguments are coerced, unknown arguments are accepted with **kwargs
+    assert tool.validate_args({"x": "3", "unit": "cm"}) == {"x": 3, "unit": "cm"}
+    assert await tool.execute({"x": "3", "factor": "0.5"}) == 1.5
+    tool.fn = repeat
+    assert (
+        await tool.execute({"text": "a", "times": "many", "other": 1})
+        == "Invalid arguments for tool scale:\n- `times`: Input should be a valid integer, unable to parse string as an integer (got 'many')\n- `other`: Extra inputs are not permitted (got 1)"
+    )
+    assert (
+        await tool.execute({"times": 2})
+        == "Invalid arguments for tool scale:\n- `text`: Field required"
+    )
+    # the description is computed once, and again when the tool changes
+    description = tool.to_string()
+    assert tool.to_string() is description
+    renamed = tool.model_copy(update={"name": "repeat"})
+    assert renamed.to_string().startswith("Tool Name: repeat\n")
+
+
 @pytest.mark.asyncio
 async def test_tool_from_mcp() -> None:
     mcp_tool = McpTool(
@@ -98,7 +133,7 @@ async def test_tool_from_mcp() -> None:
         outputSchema={"result": "number"},
     )
     tool = Tool.from_mcp_tool(mcp_tool, "math")
-    assert tool.name == "mcp_add"
+    assert tool.name == "mcp_math__add"
     assert tool.description == "Add to integers together"
     assert tool.mcp_metadata is not None
     assert tool.mcp_metadata["input_schema"] == {"x": "number", "y": "number"}
@@ -107,7 +142,7 @@ async def test_tool_from_mcp() -> None:
     assert tool.fn is None
     assert (
         tool.to_string()
-        == 'Tool Name: mcp_add\nTool Description: Add to integers together\nFrom MCP Server: math\nTool Input Schema:\n\n```json\n{\n  "x": "number",\n  "y": "number"\n}\n```\n\n\nTool Output Schema:\n\n```json\n{\n  "result": "number"\n}\n```\n\n'
+        == 'Tool Name: mcp_math__add\nTool Description: Add to integers together\nFrom MCP Server: math\nTool Input Schema:\n\n```json\n{\n  "x": "number",\n  "y": "number"\n}\n```\n\n\nTool Output Schema:\n\n```json\n{\n  "result": "number"\n}\n```\n\n'
     )
 
     with pytest.raises(
@@ -121,6 +156,49 @@ async def test_tool_from_mcp() -> None:
         Tool(name="mcp_add", description="Something", fn=None, mcp_metadata=None)
 
 
+def test_tool_to_compact_string() -> None:
+    def read(
+        path: Annotated[str, "Path of the file"], lines: list[int] | None = None
+    ) -> str:
+        return path
+
+    read_tool = Tool(name="read", description="Read   a file.", fn=read)
+    assert (
+        read_tool.to_compact_string()
+        == "- `read(path: string /* Path of the file */, lines?: number[] | null = null)`: Read a file."
+    )
+    mcp_tool = Tool.from_mcp_tool(
+        McpTool(
+            name="search",
+            description="Search the documentation of a library for a topic",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string"},
+                    "mode": {"enum": ["code", "info"], "default": "code"},
+                    "filters": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {"key": {"type": "string"}},
+                        },
+                    },
+                },
+                "required": ["query"],
+            },
+            outputSchema={"type": "object", "properties": {"hits": {"type": "array"}}},
+        ),
+        "docs",
+    )
+    compact = mcp_tool.to_compact_string(max_description_chars=20)
+    assert (
+        compact
+        == '- `mcp_docs__search(query: string, mode?: "code" | "info" = "code", filters?: {key?: string}[])`: Search the...'
+    )
+    assert len(compact) < len(mcp_tool.to_string())
+    assert "hits" not in compact
+
+
 def test_model_to_event() -> None:
     thought = Thought(content="hello")
     thinking_event = thought.to_event()
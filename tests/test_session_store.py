@@ -0,0 +1,102 @@
+import pytest
+
+from pathlib import Path
+from workflows_acp.llms import ChatMessage
+from workflows_acp.session_store import SessionStore, StoredSession
+
+
+def _session(session_id: str, updated_at: str, cwd: str = "/repo") -> StoredSession:
+    return StoredSession(
+        session_id=session_id,
+        cwd=cwd,
+        title=f"Session {session_id}",
+        created_at="2026-01-01T00:00:00",
+        updated_at=updated_at,
+    )
+
+
+def test_session_store_sessions(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.db")
+    assert store.next_session_number() == 0
+    for i in range(5):
+        store.save_session(_session(str(i), f"2026-01-0{i + 1}T00:00:00"))
+    store.save_session(_session("named", "2026-01-03T00:00:00", cwd="/other"))
+    assert store.next_session_number() == 5
+    store.save_session({**_session("1", "2026-01-09T00:00:00"), "title": "Fix bug"})
+    stored = store.get_session("1")
+    assert stored is not None
+    assert stored["title"] == "Fix bug"
+    assert stored["created_at"] == "2026-01-01T00:00:00"
+    # pages go from the most recently updated session
+    pages: list[list[str]] = []
+    cursor: str | None = None
+    while True:
+        sessions, cursor = store.list_sessions(cursor=cursor, limit=2)
+        pages.append([session["session_id"] for session in sessions])
+        if cursor is None:
+            break
+    assert pages == [["1", "4"], ["3", "named"], ["2", "0"]]
+    sessions, cursor = store.list_sessions(cwd="/other")
+    assert [session["session_id"] for session in sessions] == ["named"]
+    assert cursor is None
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        store.list_sessions(cursor="not a cursor")
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_session_store_messages(tmp_path: Path) -> None:
+    path = tmp_path / "sessions.db"
+    store = SessionStore(path, flush_interval=60, max_pending=3)
+    store.append("0", ChatMessage(role="user", content="hello"))
+    store.append("1", ChatMessage(role="user", content="other session"))
+    # messages are queued until enough of them are pending
+    assert SessionStore(path).load_messages("0") == []
+    store.append("0", ChatMessage(role="assistant", content="hi"))
+    assert SessionStore(path).load_messages("0") == [
+        ChatMessage(role="user", content="hello"),
+        ChatMessage(role="assistant", content="hi"),
+    ]
+    store.append("0", ChatMessage(role="user", content="bye"))
+    store.close()
+    reopened = SessionStore(path)
+    assert [message.content for message in reopened.load_messages("0")] == [
+        "hello",
+        "hi",
+        "bye",
+    ]
+    assert reopened.load_messages("2") == []
+
+
+def test_session_store_fork(tmp_path: Path) -> None:
+    path = tmp_path / "sessions.db"
+    store = SessionStore(path, flush_interval=60, max_pending=10)
+    store.save_session(_session("0", "2026-01-01T10:00:00"))
+    store.append("0", ChatMessage(role="user", content="hello"))
+    store.append("0", ChatMessage(role="assistant", content="hi"))
+    store.fork_session("0", _session("1", "2026-01-01T11:00:00"))
+    store.append("0", ChatMessage(role="user", content="parent"))
+    store.append("1", ChatMessage(role="user", content="fork"))
+    store.fork_session("1", _session("2", "2026-01-01T12:00:00"))
+    store.append("2", ChatMessage(role="user", content="nested fork"))
+    store.close()
+    reopened = SessionStore(path)
+    assert [message.content for message in reopened.load_messages("0")] == [
+        "hello",
+        "hi",
+        "parent",
+    ]
+    assert [message.content for message in reopened.load_messages("1")] == [
+        "hello",
+        "hi",
+        "fork",
+    ]
+    assert [message.content for message in reopened.load_messages("2")] == [
+        "hello",
+        "hi",
+        "fork",
+        "nested fork",
+    ]
+    assert reopened.count_messages("2") == 4
+    with pytest.raises(ValueError):
+        reopened.fork_session("3", _session("4", "2026-01-01T12:00:00"))
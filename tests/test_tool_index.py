@@ -0,0 +1,37 @@
+from mcp_use.client.session import Tool as McpTool
+from workflows_acp.models import Tool
+from workflows_acp.tool_index import ToolIndex, _tokenize
+
+
+def _mcp_tool(name: str, description: str, server: str = "server") -> Tool:
+    return Tool.from_mcp_tool(
+        McpTool(name=name, description=description, inputSchema={}), server
+    )
+
+
+def test_tokenize() -> None:
+    assert _tokenize("getLibraryDocs read_file") == [
+        "get",
+        "library",
+        "docs",
+        "read",
+        "file",
+    ]
+
+
+def test_tool_index_search() -> None:
+    tools = [
+        _mcp_tool("create_issue", "Create an issue in a GitHub repository", "github"),
+        _mcp_tool("list_pull_requests", "List the pull requests of a repository"),
+        _mcp_tool("query", "Run a SQL query against the database", "postgres"),
+        _mcp_tool("send_message", "Send a message to a Slack channel", "slack"),
+    ]
+    index = ToolIndex(tools)
+    assert index.search("open an issue on github", 1) == [tools[0]]
+    assert index.search("run this SQL query", 2)[0] is tools[2]
+    assert {tool.name for tool in index.search("repository", 5)} == {
+        "mcp_server__list_pull_requests",
+        "mcp_github__create_issue",
+    }
+    assert index.search("unrelated words", 3) == []
+    assert ToolIndex([]).search("anything", 3) == []
@@ -0,0 +1,40 @@
+import pytest
+
+from workflows_acp.models import Tool
+from workflows_acp.tool_registry import ToolRegistry
+from .conftest import MCP_TOOLS
+
+
+def say_hello() -> str:
+    return "Hello!"
+
+
+HELLO_TOOL = Tool(fn=say_hello, name="say_hello", description="Say hello")
+
+
+def test_tool_registry() -> None:
+    add_one = Tool.from_mcp_tool(MCP_TOOLS[0], "one")
+    add_two = Tool.from_mcp_tool(MCP_TOOLS[0], "two")
+    registry = ToolRegistry([HELLO_TOOL, add_one, add_two])
+    assert len(registry) == 3
+    assert "mcp_one__add" in registry
+    assert registry.get("mcp_two__add") is add_two
+    assert registry.get("mcp_add") is None
+    assert not registry.add(HELLO_TOOL)
+    assert registry.server_tools("one") == [add_one]
+    # the tools of a server are replaced without touching the others
+    subtract_one = Tool.from_mcp_tool(
+        MCP_TOOLS[0].model_copy(update={"name": "subtract"}), "one"
+    )
+    assert registry.set_server_tools("one", [subtract_one]) == [subtract_one]
+    assert [tool.name for tool in registry] == [
+        "say_hello",
+        "mcp_two__add",
+        "mcp_one__subtract",
+    ]
+    assert registry.remove("mcp_two__add") is add_two
+    assert registry.server_tools("two") == []
+    assert registry.remove_server("one") == [subtract_one]
+    assert list(registry) == [HELLO_TOOL]
+    with pytest.raises(ValueError, match="different names"):
+        ToolRegistry([HELLO_TOOL, HELLO_TOOL])
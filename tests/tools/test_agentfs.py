@@ -9,8 +9,14 @@ from workflows_acp.tools.agentfs import (
     edit_file_agentfs,
     configure_agentfs,
     load_all_files,
+    sync_all_files,
     grep_file_content_agentfs,
     glob_paths_agentfs,
+    describe_dir_content_agentfs,
+    overlay,
+    path_index,
+    read_cache,
+    AgentFSReadCache,
     _is_accessible_path,
 )
 
@@ -217,3 +223,205 @@ async def test_glob_paths(
         result
         == "Directory " + str((tmp_path / "hello3").resolve()) + " does not exist"
     )
+
+
+@pytest.mark.asyncio
+async def test_sync_all_files(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    await load_all_files(["hello1", "hello2"], ["test1.txt", "test2.txt"])
+    # test.txt, hello/hello.txt and the .gitignore created by configure_agentfs
+    report = await sync_all_files(["hello1", "hello2"], ["test1.txt", "test2.txt"])
+    assert report == {"added": 0, "updated": 0, "removed": 0, "unchanged": 3}
+    (tmp_path / "test.txt").write_text("Test 100")
+    (tmp_path / "new.txt").write_text("New")
+    os.remove(tmp_path / "hello" / "hello.txt")
+    report = await sync_all_files(["hello1", "hello2"], ["test1.txt", "test2.txt"])
+    assert report == {"added": 1, "updated": 1, "removed": 1, "unchanged": 1}
+    result = await read_file_agentfs(str((tmp_path / "test.txt").resolve()))
+    assert result == "Test 100"
+    result = await read_file_agentfs(str((tmp_path / "new.txt").resolve()))
+    assert result == "New"
+    result = await read_file_agentfs(str((tmp_path / "hello/hello.txt").resolve()))
+    assert result == "No such file: " + str((tmp_path / "hello/hello.txt").resolve())
+    # touching a file without changing its content does not upload it again
+    os.utime(tmp_path / "new.txt", ns=(0, 0))
+    report = await sync_all_files(["hello1", "hello2"], ["test1.txt", "test2.txt"])
+    assert report == {"added": 0, "updated": 0, "removed": 0, "unchanged": 3}
+
+
+@pytest.mark.asyncio
+async def test_overlay(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    overlay.enable(["hello1", "hello2"], ["test1.txt"])
+    try:
+        # reads fall through to the real filesystem
+        result = await read_file_agentfs(str((tmp_path / "test.txt").resolve()))
+        assert result == "Test 0"
+        agentfs = await configure_agentfs()
+        assert await _is_accessible_path(
+            agentfs, str((tmp_path / "test.txt").resolve()), "file"
+        )
+        assert not await _is_accessible_path(
+            agentfs, str((tmp_path / "hello/hello.txt").resolve()), "file"
+        )
+        # excluded files are never read through
+        result = await read_file_agentfs(str((tmp_path / "test1.txt").resolve()))
+        assert result == "No such file: " + str((tmp_path / "test1.txt").resolve())
+        result = await read_file_agentfs(str((tmp_path / "hello2/hello.txt").resolve()))
+        assert result == "No such file: " + str(
+            (tmp_path / "hello2/hello.txt").resolve()
+        )
+        # writes only go to AgentFS
+        result = await write_file_agentfs(
+            str((tmp_path / "test2.txt").resolve()), "changed", False
+        )
+        assert result.endswith(
+            "already exist and overwrite is set to False. Cannot proceed"
+        )
+        result = await write_file_agentfs(
+            str((tmp_path / "test2.txt").resolve()), "changed", True
+        )
+        assert result == "File written with success"
+        result = await read_file_agentfs(str((tmp_path / "test2.txt").resolve()))
+        assert result == "changed"
+        assert (tmp_path / "test2.txt").read_text() == "Test 2"
+        # listings merge both layers
+        await write_file_agentfs(
+            str((tmp_path / "hello/new.txt").resolve()), "new", False
+        )
+        result = await describe_dir_content_agentfs(str((tmp_path / "hello").resolve()))
+        assert str((tmp_path / "hello/hello.txt").resolve()) in result
+        assert str((tmp_path / "hello/new.txt").resolve()) in result
+        assert not (tmp_path / "hello/new.txt").exists()
+        result = await glob_paths_agentfs(str(tmp_path.resolve()), r"test")
+        assert (
+            result.strip()
+            == f"""MATCHES for test in {str(tmp_path.resolve())}:
+
+- test.txt
+- test2.txt"""
+        )
+    finally:
+        overlay.disable()
+
+
+@pytest.mark.asyncio
+async def test_describe_dir_content(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    await load_all_files()
+    root = str(tmp_path.resolve())
+    result = await describe_dir_content_agentfs(root)
+    assert (
+        result
+        == f"Content of {root}\nFILES:\n- {root}/.gitignore\n- {root}/test.txt\n- {root}/test1.txt\n- {root}/test2.txt\nSUBFOLDERS:\n- {root}/hello\n- {root}/hello2"
+    )
+    result = await describe_dir_content_agentfs(root, offset=4, limit=1)
+    assert (
+        result
+        == f"Content of {root}\nSUBFOLDERS:\n- {root}/hello\nShowing entries 5-5 of 6: use offset=5 to see more"
+    )
+    result = await describe_dir_content_agentfs(root, depth=2)
+    assert (
+        "\n- hello/\n  - hello.txt (6 bytes)\n- hello2/\n  - hello.txt (6 bytes)\n- test.txt (6 bytes)"
+        in result
+    )
+    result = await describe_dir_content_agentfs(root, offset=10)
+    assert result == f"No more entries in {root}: it has 6 entries and offset is 10"
+    result = await describe_dir_content_agentfs(str((tmp_path / "hello3").resolve()))
+    assert result == f"Directory {root}/hello3 does not exist"
+
+
+@pytest.mark.asyncio
+async def test_recursive_glob_and_grep(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    await load_all_files()
+    root = str(tmp_path.resolve())
+    result = await glob_paths_agentfs(root, r".*hello\.txt$", recursive=True)
+    assert (
+        result.strip()
+        == f"""MATCHES for .*hello\\.txt$ in {root}:
+
+- hello/hello.txt
+- hello2/hello.txt"""
+    )
+    # files written through the tools are added to the index
+    await write_file_agentfs(str(tmp_path / "hello1/deep/new.txt"), "Test 9", False)
+    assert str(tmp_path.resolve() / "hello1/deep/new.txt") in path_index
+    result = await glob_paths_agentfs(root, r"hello1/", recursive=True)
+    assert "- hello1/deep/new.txt" in result
+    result = await glob_paths_agentfs(root, r".*\.txt$", recursive=True, max_results=2)
+    assert "(showing the first 2 of 6 matches)" in result
+    # grep over a directory
+    result = await grep_file_content_agentfs(root, r"Test \d")
+    assert "- test.txt: Test 0" in result
+    assert "- hello1/deep/new.txt: Test 9" in result
+    result = await grep_file_content_agentfs(root, r"Test \d", path_pattern=r"hello")
+    assert "- test.txt: Test 0" not in result
+    assert "- hello/hello.txt: Test 3" in result
+    result = await grep_file_content_agentfs(root, r"Test \d", max_matches=1)
+    assert "(showing the first 1 matches)" in result
+    result = await grep_file_content_agentfs(root, r"nothing")
+    assert result == "No matches found"
+
+
+@pytest.mark.asyncio
+async def test_read_cache(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_folder(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    await load_all_files()
+    path = str((tmp_path / "test.txt").resolve())
+    before = read_cache.stats()
+    assert await read_file_agentfs(path) == "Test 0"
+    assert await read_file_agentfs(path) == "Test 0"
+    stats = read_cache.stats()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+    # writes and edits go through the cache
+    await write_file_agentfs(path, "Test 10", True)
+    assert await read_file_agentfs(path) == "Test 10"
+    await edit_file_agentfs(path, "10", "11")
+    assert await read_file_agentfs(path) == "Test 11"
+    agentfs = await configure_agentfs()
+    assert await agentfs.fs.read_file(path) == "Test 11"
+    # syncing clears the cache
+    (tmp_path / "test.txt").write_text("Test 12")
+    await sync_all_files()
+    assert read_cache.stats()["entries"] == 0
+    assert await read_file_agentfs(path) == "Test 12"
+
+
+def test_read_cache_eviction() -> None:
+    cache = AgentFSReadCache(max_size=10)
+    cache.put("/a", "12345")
+    cache.put("/b", "12345")
+    assert cache.get("/a") == "12345"
+    cache.put("/c", "12345")
+    # /b is the least recently used entry
+    assert cache.get("/b") is None
+    assert cache.get("/c") == "12345"
+    cache.put("/d", "x" * 11)
+    assert cache.get("/d") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert stats["size"] == 10
+    assert stats["hit_rate"] == 0.5
@@ -24,6 +24,14 @@ def test_describe_dir_content() -> None:
         description
         == "Content of tests/testfiles/last\nFILES:\n- tests/testfiles/last/lastfile.txt\nThis folder does not have any sub-folders"
     )
+    description = describe_dir_content("tests/testfiles", offset=1, limit=2)
+    assert (
+        description
+        == "Content of tests/testfiles\nFILES:\n- tests/testfiles/file1.txt\n- tests/testfiles/file2.md\nShowing entries 2-3 of 4: use offset=3 to see more"
+    )
+    description = describe_dir_content("tests/testfiles", depth=2)
+    assert description.startswith("Tree of tests/testfiles (depth: 2)\n")
+    assert "\n- last/\n  - lastfile.txt (" in description
 
 
 def test_read_file() -> None:
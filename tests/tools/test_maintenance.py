@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import subprocess
+import sys
+import time
+import pytest
+
+from pathlib import Path
+from agentfs_sdk import AgentFS, AgentFSOptions
+from workflows_acp.tools.agentfs import (
+    configure_agentfs,
+    read_cache,
+    read_file_agentfs,
+    write_file_agentfs,
+    _is_accessible_path,
+)
+from workflows_acp.tools.maintenance import (
+    agentfs_stats,
+    checkpoint_agentfs,
+    gc_agentfs_dir,
+    run_maintenance,
+)
+
+# turso keeps databases cached (and locked) per process, so compaction is tested across processes, like the CLI runs it
+FRAGMENT_AND_VACUUM = """
+import asyncio
+from agentfs_sdk import AgentFS, AgentFSOptions
+from workflows_acp.tools.maintenance import vacuum_agentfs
+
+async def main():
+    agentfs = await AgentFS.open(AgentFSOptions(path="agent.db"))
+    for i in range(50):
+        await agentfs.fs.write_file(f"/data/f{i}", f"{i}" * 10000)
+    for i in range(40):
+        await agentfs.fs.unlink(f"/data/f{i}")
+    await agentfs.close()
+    before, after = await vacuum_agentfs()
+    print(before > after)
+
+asyncio.run(main())
+"""
+READ_FILES = """
+import asyncio
+from agentfs_sdk import AgentFS, AgentFSOptions
+
+async def main():
+    agentfs = await AgentFS.open(AgentFSOptions(path="agent.db"))
+    print(sorted(await agentfs.fs.readdir("/data")))
+    print(await agentfs.fs.read_file("/data/f49"))
+    await agentfs.close()
+
+asyncio.run(main())
+"""
+
+
+def _run_script(script: str, cwd: Path) -> list[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.splitlines()
+
+
+async def _fragment(n_files: int, n_removed: int) -> None:
+    agentfs = await AgentFS.open(AgentFSOptions(path="agent.db"))
+    for i in range(n_files):
+        await agentfs.fs.write_file(f"/data/f{i}", f"{i}" * 10000)
+    for i in range(n_removed):
+        await agentfs.fs.unlink(f"/data/f{i}")
+    await agentfs.close()
+
+
+@pytest.mark.asyncio
+async def test_stats_and_checkpoint(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    await _fragment(20, 15)
+    stats = await agentfs_stats()
+    assert stats["files"] == 5
+    assert stats["files_size"] == 100000
+    assert stats["page_size"] > 0
+    assert stats["free_pages"] > 0
+    assert 0 < stats["fragmentation"] < 1
+    # writes from a connection that stays open accumulate in the WAL
+    agentfs = await configure_agentfs()
+    await agentfs.fs.write_file("/data/new", "new" * 10000)
+    wal_size = (await agentfs_stats())["wal_size"]
+    await checkpoint_agentfs()
+    assert (await agentfs_stats())["wal_size"] < wal_size
+
+
+def test_vacuum(tmp_path: Path) -> None:
+    assert _run_script(FRAGMENT_AND_VACUUM, tmp_path)[-1] == "True"
+    assert not (tmp_path / "agent.db.compact").exists()
+    lines = _run_script(READ_FILES, tmp_path)
+    assert lines[0] == str(sorted(f"f{i}" for i in range(40, 50)))
+    assert lines[1] == "49" * 10000
+
+
+@pytest.mark.asyncio
+async def test_gc_agentfs_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    await write_file_agentfs(str(tmp_path / "downloads/old.pdf"), "old", False)
+    await write_file_agentfs(str(tmp_path / "other.txt"), "other", False)
+    assert await gc_agentfs_dir(tmp_path / "downloads", 3600) == 0
+    time.sleep(1.1)
+    assert await gc_agentfs_dir(tmp_path / "downloads", 1) == 1
+    agentfs = await configure_agentfs()
+    assert not await _is_accessible_path(
+        agentfs, str(tmp_path / "downloads/old.pdf"), "file"
+    )
+    assert await _is_accessible_path(agentfs, str(tmp_path / "other.txt"), "file")
+
+
+@pytest.mark.asyncio
+async def test_read_cache_stats(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    read_cache.clear()
+    monkeypatch.setattr(read_cache, "hits", 0)
+    monkeypatch.setattr(read_cache, "misses", 0)
+    monkeypatch.setattr(read_cache, "evictions", 0)
+    path = str(tmp_path / "notes.txt")
+    await write_file_agentfs(path, "notes", False)
+    read_cache.clear()
+    for _ in range(3):
+        assert await read_file_agentfs(path) == "notes"
+    stats = (await agentfs_stats())["read_cache"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+    assert stats["entries"] == 1
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+    # and logged by the maintenance task
+    with caplog.at_level(logging.INFO):
+        task = asyncio.create_task(run_maintenance(0.01))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert "read cache hit rate 66.7% (2 hits, 1 misses" in caplog.text
@@ -0,0 +1,129 @@
+import os
+import pytest
+
+from pathlib import Path
+from unittest.mock import patch
+from workflows_acp.tools import agentfs as agentfs_module
+from workflows_acp.tools.walker import IgnoreSpec, WorkspaceWalker, looks_binary
+from workflows_acp.tools.agentfs import (
+    load_all_files,
+    sync_all_files,
+    configure_agentfs,
+    _is_accessible_path,
+)
+
+
+def setup_workspace(tmp_path: Path) -> None:
+    files = {
+        ".gitignore": "*.log\n/build_out/\ndocs/**/*.tmp\n!keep.log\n",
+        "main.py": "print('hello')",
+        "debug.log": "log",
+        "keep.log": "keep",
+        "big.txt": "x" * 200,
+        "image.png": b"\x89PNG\x00\x00".decode("latin-1"),
+        "build_out/artifact.txt": "artifact",
+        "src/build_out/module.py": "module",
+        "src/.ignore": "generated.py\n",
+        "src/generated.py": "generated",
+        "docs/a/b/notes.tmp": "tmp",
+        "docs/readme.md": "readme",
+        "node_modules/pkg/index.js": "js",
+        ".env": "SECRET=1",
+    }
+    for name, content in files.items():
+        path = tmp_path / name
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_text(content, encoding="latin-1")
+
+
+def test_ignore_spec() -> None:
+    spec = IgnoreSpec(["# comment", "", "*.log", "!keep.log", "/dist/", "a/**/b"])
+    assert spec.match("debug.log", False)
+    assert spec.match("nested/debug.log", False)
+    assert spec.match("keep.log", False) is False
+    assert spec.match("dist", True)
+    assert spec.match("dist", False) is None
+    assert spec.match("nested/dist", True) is None
+    assert spec.match("a/b", True)
+    assert spec.match("a/x/y/b", False)
+    assert spec.match("main.py", False) is None
+
+
+def test_looks_binary() -> None:
+    assert looks_binary(b"\x89PNG\x00\x00")
+    assert not looks_binary("hello world".encode("utf-8"))
+
+
+def test_walker(tmp_path: Path) -> None:
+    setup_workspace(tmp_path)
+    walker = WorkspaceWalker(tmp_path, max_file_size=100)
+    paths = sorted(
+        os.path.relpath(p, tmp_path).replace(os.sep, "/") for p in walker.walk()
+    )
+    assert paths == [
+        ".gitignore",
+        "docs/readme.md",
+        "image.png",
+        "keep.log",
+        "main.py",
+        "src/.ignore",
+        "src/build_out/module.py",
+    ]
+    assert walker.is_ignored(str(tmp_path / "debug.log"))
+    assert walker.is_ignored(str(tmp_path / "big.txt"))
+    assert walker.is_ignored(str(tmp_path / "build_out/artifact.txt"))
+    assert walker.is_ignored(str(tmp_path / "node_modules/pkg/index.js"))
+    assert walker.is_ignored(str(tmp_path.parent))
+    assert not walker.is_ignored(str(tmp_path / "src/build_out/module.py"))
+    assert not walker.is_ignored(str(tmp_path))
+    # without a size limit and ignore files
+    walker = WorkspaceWalker(tmp_path, max_file_size=None, use_ignore_files=False)
+    paths = [os.path.relpath(p, tmp_path) for p in walker.walk()]
+    assert "big.txt" in paths
+    assert "debug.log" in paths
+    assert ".env" not in paths
+
+
+@pytest.mark.asyncio
+async def test_load_all_files_with_walker(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    setup_workspace(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    await load_all_files(max_file_size=100)
+    agentfs = await configure_agentfs()
+    root = tmp_path.resolve()
+    assert await _is_accessible_path(agentfs, str(root / "main.py"), "file")
+    assert await _is_accessible_path(agentfs, str(root / "keep.log"), "file")
+    for skipped in ["debug.log", "big.txt", "image.png", "src/generated.py"]:
+        assert not await _is_accessible_path(agentfs, str(root / skipped), "file")
+    # files that become ignored are removed on sync
+    with open(tmp_path / ".gitignore", "a") as f:
+        f.write("main.py\n")
+    report = await sync_all_files(max_file_size=100)
+    assert report["removed"] == 1
+    assert not await _is_accessible_path(agentfs, str(root / "main.py"), "file")
+
+
+@pytest.mark.asyncio
+async def test_sync_all_files_binary(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "main.py").write_text("print('hello')")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG\x00\x00" + b"x" * 100_000)
+    await load_all_files()
+    agentfs = await configure_agentfs()
+    root = tmp_path.resolve()
+    assert not await _is_accessible_path(agentfs, str(root / "image.png"), "file")
+    # skipped binary files are recorded, and not read again until they change
+    with patch.object(
+        agentfs_module, "_sniff_local_file", wraps=agentfs_module._sniff_local_file
+    ) as sniff:
+        report = await sync_all_files()
+    assert sniff.call_count == 0
+    assert report == {"added": 0, "updated": 0, "removed": 0, "unchanged": 1}
+    # binary files can be uploaded as well
+    report = await sync_all_files(skip_binary=False)
+    assert report["added"] == 1
+    assert await _is_accessible_path(agentfs, str(root / "image.png"), "file")